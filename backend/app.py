@@ -1,18 +1,61 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
 import json
+from typing import Literal, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 import os
 import uvicorn
 import logging
 from dotenv import load_dotenv
 from matching import match_rules
-from llm import call_llm, validate_report_references
+from llm import ReportJSON, call_llm_async, close_async_client, invalidate_cached_reports, validate_report_references
+from jobs import JobQueueFull, ReportJob, ReportJobQueue
+from responses import RequirementsResponses, json_content
+from rule_store import Rulebook, RuleStore
+from streaming import InvalidDocument, NDJSONStreamingResponse, iter_json_documents, ndjson_line
 
 # Load environment variables from parent directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
-app = FastAPI()
+# Process-wide rulebook, parsed and compiled once and hot-reloaded on change;
+# reloads run off the request path
+rule_store = RuleStore(background=True)
+
+# /requirements bodies, encoded once per rulebook version
+requirements_responses = RequirementsResponses()
+
+
+def on_rulebook_reload(previous: Rulebook, rulebook: Rulebook) -> None:
+    """Prepare the new rulebook version's responses and drop cached data it made stale."""
+    # Encode /requirements now rather than on the first request for the new version
+    requirements_responses.payload(rulebook)
+    diff = rulebook.diff
+    if not diff:
+        return
+    dropped = invalidate_cached_reports(diff.affected, diff.dropped_outcomes or ())
+    logging.info(f"Rulebook version {rulebook.version}: dropped {dropped} cached reports and sections")
+
+
+rule_store.add_listener(on_rulebook_reload)
+
+# Deferred LLM reports (`report=deferred`)
+report_jobs = ReportJobQueue.from_env()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        rule_store.load()
+    except FileNotFoundError:
+        logging.error(f"Requirements file not found: {rule_store.path}")
+    yield
+    await report_jobs.stop()
+    await close_async_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow FE origins
 origins = [
@@ -40,10 +83,8 @@ class BusinessProfile(BaseModel):
 
 
 def load_rules():
-    """Load rules from requirements.json."""
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "requirements.json")
-    with open(data_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Return the current rulebook's rules (loaded once, not per request)."""
+    return rule_store.get().rules
 
 
 @app.get("/health")
@@ -52,46 +93,172 @@ def health():
 
 
 @app.get("/requirements")
-def get_requirements():
+async def get_requirements(request: Request, authority: Optional[str] = Query(None),
+                           priority: Optional[Literal["high", "medium", "low"]] = Query(None)):
+    """
+    All rules, or those of one authority and/or priority.
+
+    The body is pre-serialized per rulebook version and served gzip/brotli
+    compressed when accepted, with a strong ETag; `If-None-Match` gets a 304.
+    """
     try:
-        requirements = load_rules()
-        return {"requirements": requirements, "count": len(requirements)}
+        rulebook = rule_store.get()
     except FileNotFoundError:
         return {"requirements": [], "count": 0, "error": "Requirements file not found"}
+    return requirements_responses.respond(rulebook, request.headers, authority, priority)
+
+
+async def generate_report(profile_dict: dict, matches: list, on_section=None) -> ReportJSON:
+    """Generate the LLM report and check it only cites the matched rules."""
+    report = await call_llm_async(profile_dict, matches, on_section=on_section)
+    
+    # Validate that report only references provided rule IDs
+    if not validate_report_references(report, [rule["id"] for rule in matches]):
+        raise ValueError("Report contains invalid rule references")
+    return report
+
+
+def submit_report_job(profile_dict: dict, matches: list) -> dict:
+    """Queue a deferred report and describe where to fetch it."""
+    async def run(job: ReportJob) -> dict:
+        # Sections are streamed to /reports/{id}/events as the LLM writes them
+        report = await generate_report(profile_dict, matches,
+                                       on_section=lambda section: job.publish("section", section.model_dump()))
+        return report.model_dump()
+    
+    job = report_jobs.submit(run)
+    return {
+        "id": job.id,
+        "status": job.status,
+        "url": f"/reports/{job.id}",
+        "events": f"/reports/{job.id}/events"
+    }
 
 
 @app.post("/assess")
-def assess_business(profile: BusinessProfile):
-    """Assess business profile against licensing requirements."""
+async def assess_business(profile: BusinessProfile,
+                          report: Literal["inline", "deferred"] = Query("inline")):
+    """
+    Assess business profile against licensing requirements.
+
+    With `report=deferred` the matches are returned immediately together with
+    a report job; the report is fetched from `/reports/{id}` or streamed from
+    `/reports/{id}/events`.
+    """
     try:
-        rules = load_rules()
+        rulebook = rule_store.get()
         profile_dict = profile.model_dump()
-        matches = match_rules(profile_dict, rules)
+        matches = match_rules(profile_dict, rulebook.matcher)
         match_ids = [rule["id"] for rule in matches]
         
+        if report == "deferred":
+            try:
+                return json_content({"matches": match_ids, "report": None,
+                                     "report_job": submit_report_job(profile_dict, matches)})
+            except JobQueueFull as e:
+                return json_content({"matches": match_ids, "report": None, "error": str(e)})
+        
         # Generate LLM report
         try:
-            report = call_llm(profile_dict, matches)
-            
-            # Validate that report only references provided rule IDs
-            if not validate_report_references(report, match_ids):
-                raise ValueError("Report contains invalid rule references")
-            
-            return {
+            generated = await generate_report(profile_dict, matches)
+            return json_content({
                 "matches": match_ids,
-                "report": report.model_dump()
-            }
+                "report": generated
+            })
             
         except Exception as llm_error:
             logging.error(f"LLM report generation failed: {str(llm_error)}")
-            return {
+            return json_content({
                 "matches": match_ids,
                 "report": None,
                 "error": f"Report generation failed: {str(llm_error)}"
-            }
+            })
         
     except Exception as e:
-        return {"error": str(e), "matches": [], "report": None}
+        return json_content({"error": str(e), "matches": [], "report": None})
+
+
+@app.get("/reports/{job_id}")
+async def get_report(job_id: str):
+    """Status and, once finished, the report of a deferred report job."""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return json_content(job.to_dict())
+
+
+@app.get("/reports/{job_id}/events")
+async def stream_report_events(job_id: str):
+    """Server-Sent Events for a deferred report job, ending with `report` or `error`."""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    async def events():
+        async for event, data in job.subscribe():
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/assess/batch")
+async def assess_batch(request: Request, report: Literal["skip", "inline", "deferred"] = Query("skip")):
+    """
+    Assess many business profiles in one request.
+
+    The body is a JSON array or NDJSON stream of business profiles. Results
+    are streamed back as NDJSON, one line per profile in input order, while
+    the body is still being read. An NDJSON line that is not exactly one
+    JSON document gets an error line of its own. LLM reports are skipped
+    unless `report=inline` (generated before the line is sent) or
+    `report=deferred` (each line carries a report job).
+    """
+    # Pin one rulebook version for the whole batch
+    try:
+        rulebook = rule_store.get()
+    except FileNotFoundError:
+        return json_content({"results": [], "error": "Requirements file not found"})
+    ndjson = request.headers.get("content-type", "").split(";")[0].strip() == "application/x-ndjson"
+
+    async def results():
+        index = 0
+        try:
+            async for item in iter_json_documents(request.stream(), ndjson=ndjson):
+                if isinstance(item, InvalidDocument):
+                    yield ndjson_line({"index": index, "error": str(item), "matches": []})
+                    index += 1
+                    continue
+                try:
+                    profile = BusinessProfile.model_validate(item)
+                except ValidationError as e:
+                    yield ndjson_line({"index": index, "error": e.errors(include_url=False, include_context=False), "matches": []})
+                    index += 1
+                    continue
+
+                profile_dict = profile.model_dump()
+                matches = match_rules(profile_dict, rulebook.matcher)
+                result = {"index": index, "matches": [rule["id"] for rule in matches]}
+
+                if report == "inline":
+                    try:
+                        result["report"] = (await generate_report(profile_dict, matches)).model_dump()
+                    except Exception as llm_error:
+                        logging.error(f"LLM report generation failed: {str(llm_error)}")
+                        result["report"] = None
+                        result["error"] = f"Report generation failed: {str(llm_error)}"
+                elif report == "deferred":
+                    try:
+                        result["report_job"] = submit_report_job(profile_dict, matches)
+                    except JobQueueFull as e:
+                        result["error"] = str(e)
+
+                yield ndjson_line(result)
+                index += 1
+        except ValueError as e:
+            yield ndjson_line({"index": index, "error": str(e)})
+
+    return NDJSONStreamingResponse(results())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+In-process job queue for deferred LLM report generation.
+
+`/assess?report=deferred` returns matches immediately and hands the report to
+this queue. A bounded pool of worker tasks generates reports; finished jobs are
+retained for a while so clients can fetch them (`GET /reports/{id}`) or follow
+them as Server-Sent Events (`GET /reports/{id}/events`).
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when too many report jobs are already waiting."""
+
+
+class ReportJob:
+    """One deferred report and the events published while it runs."""
+
+    def __init__(self, run: Callable[["ReportJob"], Awaitable[Dict[str, Any]]]):
+        self.id = uuid.uuid4().hex
+        self.status = PENDING
+        self.report: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[Tuple[str, Any]] = []
+        self._run = run
+        self._updated = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def publish(self, event: str, data: Any) -> None:
+        """Record an event and wake every subscriber."""
+        self.events.append((event, data))
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Any]]:
+        """Replay past events, then follow new ones until the job finishes."""
+        seen = 0
+        while True:
+            updated = self._updated
+            while seen < len(self.events):
+                yield self.events[seen]
+                seen += 1
+            if self.finished:
+                return
+            await updated.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "report": self.report,
+            "error": self.error
+        }
+
+
+class ReportJobQueue:
+    """
+    Bounded worker pool for report jobs, with result retention.
+
+    Workers are started lazily on the running event loop, so the queue can be
+    created at import time.
+    """
+
+    def __init__(self, workers: int = 8, max_pending: int = 1000,
+                 retention_seconds: float = 600.0, max_retained: int = 10000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        # Finished jobs in the order they finished, so pruning stops at the first one to keep
+        self._finished: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "ReportJobQueue":
+        """Build a queue configured from REPORT_* environment variables."""
+        return cls(
+            workers=int(os.getenv("REPORT_WORKERS", "8")),
+            max_pending=int(os.getenv("REPORT_QUEUE_SIZE", "1000")),
+            retention_seconds=float(os.getenv("REPORT_RETENTION", "600"))
+        )
+
+    def submit(self, run: Callable[[ReportJob], Awaitable[Dict[str, Any]]]) -> ReportJob:
+        """
+        Queue a report job.
+
+        Args:
+            run: Coroutine function producing the report dict; it receives the
+                job so it can publish intermediate events
+
+        Raises:
+            JobQueueFull: If `max_pending` jobs are already waiting
+        """
+        self._ensure_workers()
+        self._prune()
+        job = ReportJob(run)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull("Report queue is full")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        """Return a pending, running or retained job."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def stop(self) -> None:
+        """Cancel the workers; pending jobs are dropped."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._loop = None
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # First use, or the previous loop is gone (e.g. a new test client)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: ReportJob) -> None:
+        job.status = RUNNING
+        job.publish("status", {"status": RUNNING})
+        try:
+            job.report = await job._run(job)
+            job.status = DONE
+            job.publish("report", job.report)
+        except Exception as e:
+            logger.error(f"Report job {job.id} failed: {str(e)}")
+            job.error = f"Report generation failed: {str(e)}"
+            job.status = FAILED
+            job.publish("error", {"error": job.error})
+        finally:
+            job.finished_at = time.time()
+            if self._jobs.get(job.id) is job:
+                self._finished[job.id] = job
+
+    def _prune(self) -> None:
+        """Drop finished jobs past retention, and the oldest beyond capacity."""
+        cutoff = time.time() - self.retention_seconds
+        while self._finished:
+            job_id, job = next(iter(self._finished.items()))
+            if job.finished_at >= cutoff and len(self._jobs) <= self.max_retained:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
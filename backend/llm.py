@@ -3,12 +3,21 @@
 LLM Report Generation for Business Licensing Advisor.
 """
 
+import asyncio
+import hashlib
 import json
 import os
-from typing import Dict, List, Any, Optional
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Collection, Dict, Iterable, List, Any, Optional, Tuple
 from pydantic import BaseModel, Field, ValidationError
 import logging
 from dotenv import load_dotenv
+from prompt_budget import BASE_COMPLETION_TOKENS, SECTION_COMPLETION_TOKENS, completion_tokens, compress_rules, count_tokens
+from report_cache import ReportCache, content_hash
+from singleflight import SingleFlight
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retries, call_with_retries_async, is_transient
 
 # Load environment variables from .env file in parent directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -17,6 +26,32 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+LLM_MODEL = "gpt-3.5-turbo"
+
+# Bump whenever _create_llm_prompt, the fan-out section/summary prompts,
+# prompt_budget rendering or the system prompt changes, so cached reports generated from the old prompt are no
+# longer served
+PROMPT_VERSION = "3"
+
+SYSTEM_PROMPT = "You are an expert Israeli business licensing consultant. Generate structured reports in both Hebrew and English."
+
+# Generated (non-mock) reports, keyed by report_cache_key
+report_cache = ReportCache.from_env()
+
+# Shared by the sync and async paths: upstream health is per process, not per loop
+retry_policy = RetryPolicy.from_env()
+llm_breaker = CircuitBreaker.from_env()
+
+# In-flight report generations, keyed like report_cache
+report_flights = SingleFlight()
+
+DEFAULT_RECOMMENDATIONS = [
+    "Contact relevant authorities early in the planning process\nפנו לרשויות הרלוונטיות בשלב מוקדם של התכנון",
+    "Prioritize high-priority requirements first\nתעדוף דרישות עדיפות גבוהה קודם",
+    "Ensure all documentation is prepared before submission\nוודאו שכל התיעוד מוכן לפני הגשה",
+    "Consider professional licensing consultation for complex requirements\nשקול ייעוץ מקצועי לרישוי עבור דרישות מורכבות"
+]
+
 
 class ReportSection(BaseModel):
     """Individual section of the report."""
@@ -50,6 +85,10 @@ def call_llm(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]]) -> Re
     Raises:
         ValueError: If invalid input or LLM response
         RuntimeError: If LLM service unavailable
+
+    Transient upstream errors are retried with backoff (LLM_RETRY_ATTEMPTS);
+    while the circuit breaker is open the deterministic mock report is
+    returned instead of calling the API.
     """
     # Validate inputs first (regardless of mode)
     _validate_inputs(profile, matched_rules)
@@ -68,14 +107,330 @@ def call_llm(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]]) -> Re
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is required but not found in environment")
         
+        cache_key, cached = _lookup_cached_report(profile, matched_rules, api_key)
+        if cached is not None:
+            return cached
+        
         # Generate report using actual LLM
-        return _generate_llm_report(profile, matched_rules, api_key)
+        try:
+            report = _generate_llm_report(profile, matched_rules, api_key)
+        except CircuitOpenError:
+            return _serve_fallback(profile, matched_rules)
+        _store_cached_report(cache_key, report, matched_rules)
+        return report
         
     except Exception as e:
         logger.error(f"Error in call_llm: {str(e)}")
         raise
 
 
+async def call_llm_async(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+                         on_section: Optional[Callable[[ReportSection], None]] = None) -> ReportJSON:
+    """
+    Async variant of `call_llm` for the API request path.
+
+    Uses a shared `AsyncOpenAI` client (one pooled HTTP connection per event
+    loop), a per-call timeout (LLM_TIMEOUT) and a concurrency semaphore
+    (LLM_MAX_CONCURRENCY), so slow LLM calls do not tie up threadpool workers.
+    With LLM_FANOUT=true each authority section is generated by its own
+    concurrent completion (see `_generate_llm_report_fanout`).
+
+    Concurrent calls for an equivalent report (same `report_cache_key`) share
+    one generation: the first caller starts it, the others await its result
+    and receive its sections as they are produced (or all at once if the
+    first caller did not stream).
+    
+    Args:
+        profile: Business profile dictionary
+        matched_rules: List of matched licensing rules
+        on_section: Optional callback; when given, the completion is streamed
+            and each section is passed to it as soon as it is complete
+            (mock and cached reports pass all their sections at once)
+    
+    Raises:
+        ValueError: If invalid input or LLM response
+        RuntimeError: If LLM service unavailable
+    """
+    _validate_inputs(profile, matched_rules)
+    
+    mock_mode = os.getenv("LLM_MOCK_MODE", "false").lower() == "true"
+    
+    if mock_mode:
+        logger.info("Running in mock mode - generating synthetic report")
+        return _emit_sections(_generate_mock_report(profile, matched_rules), on_section)
+    
+    try:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY is required but not found in environment")
+        
+        cache_key, cached = await _lookup_cached_report_async(profile, matched_rules, api_key)
+        if cached is not None:
+            return _emit_sections(cached, on_section)
+        
+        flight_key = cache_key or report_cache_key(profile, matched_rules, api_key)
+        received: List[ReportSection] = []
+        
+        def forward(section: ReportSection) -> None:
+            received.append(section)
+            on_section(section)
+        
+        async def generate(publish: Callable[[ReportSection], None]) -> ReportJSON:
+            # The first caller decides whether the completion is streamed
+            return await _generate_and_cache(profile, matched_rules, api_key, cache_key,
+                                             publish if on_section is not None else None)
+        
+        report, shared = await report_flights.do(flight_key, generate,
+                                                 on_event=forward if on_section is not None else None)
+        if shared:
+            logger.info("Joined in-flight report generation")
+            if on_section is not None and not received:
+                _emit_sections(report, on_section)
+        return report
+        
+    except Exception as e:
+        logger.error(f"Error in call_llm_async: {str(e)}")
+        raise
+
+
+async def _generate_and_cache(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]], api_key: str,
+                              cache_key: Optional[str],
+                              on_section: Optional[Callable[[ReportSection], None]]) -> ReportJSON:
+    """Generate a report on the configured async path and cache it."""
+    try:
+        if os.getenv("LLM_FANOUT", "false").lower() == "true":
+            report = await _generate_llm_report_fanout(profile, matched_rules, api_key, on_section)
+        elif on_section is not None:
+            report = await _generate_llm_report_stream(profile, matched_rules, api_key, on_section)
+        else:
+            report = await _generate_llm_report_async(profile, matched_rules, api_key)
+    except CircuitOpenError:
+        return _serve_fallback(profile, matched_rules, on_section)
+    await _store_cached_report_async(cache_key, report, matched_rules)
+    return report
+
+
+def _serve_fallback(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+                    on_section: Optional[Callable[[ReportSection], None]] = None) -> ReportJSON:
+    """
+    Deterministic report served while the LLM circuit breaker is open.
+
+    Not cached, so the next request after the upstream recovers gets a real report.
+    """
+    logger.warning("LLM circuit breaker open - serving deterministic fallback report")
+    return _emit_sections(_generate_mock_report(profile, matched_rules), on_section)
+
+
+def _emit_sections(report: ReportJSON, on_section: Optional[Callable[[ReportSection], None]]) -> ReportJSON:
+    """Pass every section of an already complete report to `on_section`."""
+    if on_section is not None:
+        for section in report.sections:
+            on_section(section)
+    return report
+
+
+def _lookup_cached_report(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+                          api_key: str) -> Tuple[Optional[str], Optional[ReportJSON]]:
+    """Return (cache key, cached report); the key is None when caching is off."""
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None, None
+    cache_key = report_cache_key(profile, matched_rules, api_key)
+    cached = report_cache.get(cache_key)
+    if cached is None:
+        return cache_key, None
+    logger.info("Report cache hit")
+    return cache_key, ReportJSON.model_validate_json(cached)
+
+
+async def _lookup_cached_report_async(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+                                      api_key: str) -> Tuple[Optional[str], Optional[ReportJSON]]:
+    """Like `_lookup_cached_report`, without blocking the event loop on the disk tier."""
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None, None
+    cache_key = report_cache_key(profile, matched_rules, api_key)
+    cached = await report_cache.aget(cache_key)
+    if cached is None:
+        return cache_key, None
+    logger.info("Report cache hit")
+    return cache_key, ReportJSON.model_validate_json(cached)
+
+
+def _store_cached_report(cache_key: Optional[str], report: ReportJSON, matched_rules: List[Dict[str, Any]]) -> None:
+    if cache_key is not None:
+        report_cache.set(cache_key, report.model_dump_json(), _report_tags(matched_rules))
+
+
+async def _store_cached_report_async(cache_key: Optional[str], report: ReportJSON,
+                                     matched_rules: List[Dict[str, Any]]) -> None:
+    if cache_key is not None:
+        await report_cache.aset(cache_key, report.model_dump_json(), _report_tags(matched_rules))
+
+
+def _report_tags(matched_rules: List[Dict[str, Any]]) -> List[str]:
+    return rule_tags(rule["id"] for rule in matched_rules) + [outcome_tag(rule["id"] for rule in matched_rules)]
+
+
+def rule_tags(rule_ids: Iterable[str]) -> List[str]:
+    """Cache tags of entries built from these rules."""
+    return [f"rule:{rule_id}" for rule_id in rule_ids]
+
+
+def outcome_tag(rule_ids: Iterable[str]) -> str:
+    """Cache tag of reports for profiles matching exactly these rules."""
+    return f"outcome:{content_hash(sorted(rule_ids))[:32]}"
+
+
+def invalidate_cached_reports(rule_ids: Iterable[str], outcomes: Iterable[Iterable[str]] = ()) -> int:
+    """
+    Drop cached reports and sections after a rulebook change.
+
+    Args:
+        rule_ids: Rules that changed or were removed; every report and
+            section citing one of them is dropped
+        outcomes: Match outcomes (sets of rule IDs) no profile produces any
+            more; reports generated for them are dropped
+
+    Returns:
+        Number of entries dropped
+    """
+    return report_cache.invalidate(rule_tags(rule_ids) + [outcome_tag(ids) for ids in outcomes])
+
+
+def profile_bucket(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize a profile for cache keys.
+
+    Flags are kept exactly; size and seats are rounded down to
+    LLM_CACHE_BUCKET steps, since nearby values produce the same report.
+    """
+    step = max(int(os.getenv("LLM_CACHE_BUCKET", "10")), 1)
+    bucket = {field: bool(profile[field]) for field in ["serves_alcohol", "uses_gas", "has_misting", "offers_delivery"]}
+    bucket["size_m2"] = int(profile["size_m2"]) // step * step
+    bucket["seats"] = int(profile["seats"]) // step * step
+    return bucket
+
+
+def report_cache_key(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]], api_key: str) -> str:
+    """
+    Content-addressed key for a generated report.
+
+    Covers the matched rule IDs and the rule text that goes into the prompt,
+    the normalized profile bucket, the prompt version and the model. Reports
+    are never shared across API credentials.
+    """
+    return content_hash({
+        "rules": [
+            [rule["id"], content_hash([rule[field] for field in ["title", "desc_en", "desc_he", "authority", "priority"]])]
+            for rule in matched_rules
+        ],
+        "profile": profile_bucket(profile),
+        "prompt_version": PROMPT_VERSION,
+        "model": LLM_MODEL,
+        "credentials": hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    })
+
+
+def section_cache_key(authority: str, rules: List[Dict[str, Any]], api_key: str) -> str:
+    """
+    Content-addressed key for one authority section.
+
+    Covers the authority, the section's rule IDs (sorted) and their text, the
+    prompt version and the model - not the profile - so a section is reused
+    by every profile that matches the same rules of that authority.
+    """
+    return content_hash({
+        "authority": authority,
+        "rules": sorted(
+            [rule["id"], content_hash([rule[field] for field in ["title", "desc_en", "desc_he", "priority"]])]
+            for rule in rules
+        ),
+        "prompt_version": PROMPT_VERSION,
+        "model": LLM_MODEL,
+        "credentials": hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    })
+
+
+def _lookup_cached_section(authority: str, rules: List[Dict[str, Any]],
+                           api_key: str) -> Tuple[Optional[str], Optional[ReportSection]]:
+    """Return (cache key, cached section); the key is None when caching is off."""
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None, None
+    cache_key = section_cache_key(authority, rules, api_key)
+    cached = report_cache.get(cache_key)
+    if cached is None:
+        return cache_key, None
+    return cache_key, ReportSection.model_validate_json(cached)
+
+
+async def _lookup_cached_section_async(authority: str, rules: List[Dict[str, Any]],
+                                       api_key: str) -> Tuple[Optional[str], Optional[ReportSection]]:
+    """Like `_lookup_cached_section`, without blocking the event loop on the disk tier."""
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None, None
+    cache_key = section_cache_key(authority, rules, api_key)
+    cached = await report_cache.aget(cache_key)
+    if cached is None:
+        return cache_key, None
+    return cache_key, ReportSection.model_validate_json(cached)
+
+
+def _store_cached_section(cache_key: Optional[str], section: ReportSection, rules: List[Dict[str, Any]]) -> None:
+    if cache_key is not None:
+        report_cache.set(cache_key, section.model_dump_json(), rule_tags(rule["id"] for rule in rules))
+
+
+@dataclass
+class _SectionPlan:
+    """Sections of a report found in the cache, and cache keys for the rest."""
+    cached: Dict[str, ReportSection]
+    missing: Dict[str, Optional[str]]
+    rules: Dict[str, List[Dict[str, Any]]]
+
+    def store(self, sections: Dict[str, ReportSection]) -> None:
+        """Cache newly generated sections."""
+        for authority, section in sections.items():
+            if authority in self.missing:
+                _store_cached_section(self.missing[authority], section, self.rules[authority])
+
+    async def astore(self, sections: Dict[str, ReportSection]) -> None:
+        """Cache newly generated sections without blocking the event loop."""
+        for authority, section in sections.items():
+            cache_key = self.missing.get(authority)
+            if cache_key is not None:
+                await report_cache.aset(cache_key, section.model_dump_json(),
+                                        rule_tags(rule["id"] for rule in self.rules[authority]))
+
+    def add(self, authority: str, cache_key: Optional[str], section: Optional[ReportSection]) -> None:
+        if section is None:
+            self.missing[authority] = cache_key
+        else:
+            self.cached[authority] = section
+
+    def log_hits(self) -> None:
+        if self.cached:
+            logger.info(f"Section cache hit for {len(self.cached)} of {len(self.cached) + len(self.missing)} sections")
+
+
+def _plan_sections(matched_rules: List[Dict[str, Any]], api_key: str) -> _SectionPlan:
+    """Look up every authority section of a report in the section cache."""
+    authority_rules = _group_by_authority(matched_rules)
+    plan = _SectionPlan(cached={}, missing={}, rules=authority_rules)
+    for authority, rules in authority_rules.items():
+        plan.add(authority, *_lookup_cached_section(authority, rules, api_key))
+    plan.log_hits()
+    return plan
+
+
+async def _plan_sections_async(matched_rules: List[Dict[str, Any]], api_key: str) -> _SectionPlan:
+    """Like `_plan_sections`, without blocking the event loop on the disk tier."""
+    authority_rules = _group_by_authority(matched_rules)
+    plan = _SectionPlan(cached={}, missing={}, rules=authority_rules)
+    for authority, rules in authority_rules.items():
+        plan.add(authority, *await _lookup_cached_section_async(authority, rules, api_key))
+    plan.log_hits()
+    return plan
+
+
 def _validate_inputs(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]]) -> None:
     """Validate input parameters."""
     if not isinstance(profile, dict):
@@ -113,17 +468,12 @@ def _generate_mock_report(profile: Dict[str, Any], matched_rules: List[Dict[str,
     
     # Group rules by authority for sections
     sections = []
-    authority_rules = {}
-    for rule in matched_rules:
-        auth = rule["authority"]
-        if auth not in authority_rules:
-            authority_rules[auth] = []
-        authority_rules[auth].append(rule)
+    authority_rules = _group_by_authority(matched_rules)
     
     # Create sections for each authority
     for authority, rules in authority_rules.items():
         auth_rule_ids = [rule["id"] for rule in rules]
-        priority = "high" if any(rule["priority"] == "high" for rule in rules) else "medium"
+        priority = _section_priority(rules)
         
         content = f"Requirements from {authority}:\n"
         content += f"רישיונות מ{authority}:\n\n"
@@ -172,71 +522,288 @@ This assessment identified licensing requirements from {len(authorities)} author
 
 
 def _generate_llm_report(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]], api_key: str) -> ReportJSON:
-    """Generate report using actual LLM service."""
+    """
+    Generate report using actual LLM service.
+
+    Sections already in the section cache are reused; the LLM only writes
+    the missing ones plus the summary and recommendations.
+    """
     try:
         import openai
     except ImportError:
         raise RuntimeError("OpenAI library not installed. Run: pip install openai")
     
-    # Configure OpenAI
+    # Configure OpenAI; retries are done by `call_with_retries`, not the client
     openai.api_key = api_key
+    openai.max_retries = 0
     
     # Prepare prompt
-    prompt = _create_llm_prompt(profile, matched_rules)
+    plan = _plan_sections(matched_rules, api_key)
+    prompt = _create_llm_prompt(profile, matched_rules, skip_authorities=plan.cached)
     
     try:
         # Call OpenAI API
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert Israeli business licensing consultant. Generate structured reports in both Hebrew and English."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,
-            max_tokens=1000
+        response = call_with_retries(
+            lambda: openai.chat.completions.create(
+                model=LLM_MODEL,
+                messages=_chat_messages(prompt),
+                temperature=0.3,
+                max_tokens=_completion_tokens(matched_rules, skip_authorities=plan.cached),
+                timeout=_llm_timeout()
+            ),
+            retry_policy,
+            llm_breaker
         )
         
         # Parse and validate response
         llm_output = response.choices[0].message.content
+        return _parse_llm_response(llm_output, matched_rules, plan)
+        
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"LLM API error: {str(e)}")
+        raise RuntimeError(f"LLM API integration failed: {str(e)}")
+
+
+async def _generate_llm_report_async(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+                                     api_key: str) -> ReportJSON:
+    """Generate report using the shared async LLM client, reusing cached sections."""
+    runtime = _get_async_runtime(api_key)
+    plan = await _plan_sections_async(matched_rules, api_key)
+    prompt = _create_llm_prompt(profile, matched_rules, skip_authorities=plan.cached)
+    
+    try:
+        llm_output = await _complete(runtime, prompt, _completion_tokens(matched_rules, skip_authorities=plan.cached))
+        report, parsed_sections = _parse_report(llm_output, matched_rules, plan.cached)
+        await plan.astore(parsed_sections)
+        return report
+        
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"LLM API error: {str(e)}")
+        raise RuntimeError(f"LLM API integration failed: {str(e)}")
+
+
+async def _generate_llm_report_fanout(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]], api_key: str,
+                                      on_section: Optional[Callable[[ReportSection], None]] = None) -> ReportJSON:
+    """
+    Generate report with one completion per authority, run concurrently.
+
+    A short extra completion writes the summary and recommendations. Latency
+    tracks the slowest call rather than the sum of all sections, and each
+    section is cached on its own (`section_cache_key`).
+    """
+    runtime = _get_async_runtime(api_key)
+    plan = await _plan_sections_async(matched_rules, api_key)
+    
+    async def generate_section(authority: str, rules: List[Dict[str, Any]]) -> ReportSection:
+        section = plan.cached.get(authority)
+        if section is None:
+            llm_output = await _complete(runtime, _create_section_prompt(authority, rules), SECTION_COMPLETION_TOKENS)
+            section = _parse_section_response(llm_output, authority, rules)
+            await plan.astore({authority: section})
+        if on_section is not None:
+            on_section(section)
+        return section
+    
+    async def generate_overview() -> ReportJSON:
+        llm_output = await _complete(runtime, _create_summary_prompt(profile, matched_rules), BASE_COMPLETION_TOKENS)
         return _parse_llm_response(llm_output, matched_rules)
+    
+    try:
+        overview, *sections = await asyncio.gather(
+            generate_overview(),
+            *(generate_section(authority, rules) for authority, rules in _group_by_authority(matched_rules).items())
+        )
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"LLM API error: {str(e)}")
+        raise RuntimeError(f"LLM API integration failed: {str(e)}")
+    
+    return overview.model_copy(update={"sections": sections})
+
+
+async def _complete(runtime: "_AsyncRuntime", prompt: str, max_tokens: int) -> str:
+    """
+    Run one chat completion on the shared client and return its text.
+
+    Each attempt holds a semaphore slot; backoff between retries does not.
+    """
+    async def attempt() -> Any:
+        async with runtime.semaphore:
+            return await runtime.client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=_chat_messages(prompt),
+                temperature=0.3,
+                max_tokens=max_tokens,
+                timeout=runtime.timeout
+            )
+    
+    response = await call_with_retries_async(attempt, retry_policy, llm_breaker)
+    return response.choices[0].message.content
+
+
+async def _generate_llm_report_stream(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+                                      api_key: str, on_section: Callable[[ReportSection], None]) -> ReportJSON:
+    """
+    Generate report from streamed completion deltas, emitting sections as they close.
+
+    Cached sections are emitted once the stream is open; only the missing ones
+    are streamed. Opening the stream is retried, but a stream that fails
+    part-way is not - its sections may already have been emitted.
+    """
+    runtime = _get_async_runtime(api_key)
+    plan = await _plan_sections_async(matched_rules, api_key)
+    prompt = _create_llm_prompt(profile, matched_rules, skip_authorities=plan.cached)
+    parser = ReportStreamParser(matched_rules, known_sections=plan.cached)
+    
+    async def open_stream() -> Any:
+        # The slot is held until the stream has been consumed
+        await runtime.semaphore.acquire()
+        try:
+            return await runtime.client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=_chat_messages(prompt),
+                temperature=0.3,
+                max_tokens=_completion_tokens(matched_rules, skip_authorities=plan.cached),
+                timeout=runtime.timeout,
+                stream=True
+            )
+        except BaseException:
+            runtime.semaphore.release()
+            raise
+    
+    try:
+        stream = await call_with_retries_async(open_stream, retry_policy, llm_breaker)
+        try:
+            for section in plan.cached.values():
+                on_section(section)
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for section in parser.feed(chunk.choices[0].delta.content):
+                    on_section(section)
+        except Exception as e:
+            if is_transient(e):
+                llm_breaker.record_failure()
+            raise
+        finally:
+            try:
+                await stream.close()
+            finally:
+                runtime.semaphore.release()
         
+        for section in parser.finish():
+            on_section(section)
+        await plan.astore(parser.parsed_sections)
+        return parser.report()
+        
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"LLM API error: {str(e)}")
         raise RuntimeError(f"LLM API integration failed: {str(e)}")
 
 
-def _create_llm_prompt(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]]) -> str:
-    """Create prompt for LLM."""
-    rule_details = "\n".join([
-        f"ID: {rule['id']} | Authority: {rule['authority']} | Priority: {rule['priority']}\n"
-        f"Title: {rule['title']}\n"
-        f"EN: {rule['desc_en']}\n"
-        f"HE: {rule['desc_he']}\n"
+def _chat_messages(prompt: str) -> List[Dict[str, str]]:
+    """System + user messages for a report completion."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _llm_timeout() -> float:
+    """Per-attempt LLM call timeout in seconds (LLM_TIMEOUT)."""
+    return float(os.getenv("LLM_TIMEOUT", "30"))
+
+
+@dataclass
+class _AsyncRuntime:
+    """Async client and concurrency limit bound to one event loop."""
+    loop: asyncio.AbstractEventLoop
+    api_key: str
+    client: Any
+    semaphore: asyncio.Semaphore
+    timeout: float
+
+
+_async_runtime: Optional[_AsyncRuntime] = None
+
+
+def _get_async_runtime(api_key: str) -> _AsyncRuntime:
+    """
+    Return the shared `AsyncOpenAI` client for the running event loop.
+
+    The client's HTTP connection pool and the semaphore belong to the loop
+    they were created on, so a new pair is built if the loop (or key) changes.
+    """
+    global _async_runtime
+    loop = asyncio.get_running_loop()
+    runtime = _async_runtime
+    if runtime is not None and runtime.loop is loop and runtime.api_key == api_key:
+        return runtime
+    
+    try:
+        import openai
+    except ImportError:
+        raise RuntimeError("OpenAI library not installed. Run: pip install openai")
+    
+    timeout = _llm_timeout()
+    runtime = _AsyncRuntime(
+        loop=loop,
+        api_key=api_key,
+        # Retries are done by `call_with_retries_async`, not the client
+        client=openai.AsyncOpenAI(api_key=api_key, timeout=timeout, max_retries=0),
+        semaphore=asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "256"))),
+        timeout=timeout
+    )
+    _async_runtime = runtime
+    return runtime
+
+
+async def close_async_client() -> None:
+    """Close the shared async client if it belongs to the running loop."""
+    global _async_runtime
+    runtime = _async_runtime
+    if runtime is not None and runtime.loop is asyncio.get_running_loop():
+        _async_runtime = None
+        await runtime.client.close()
+
+
+def _create_llm_prompt(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+                       skip_authorities: Collection[str] = ()) -> str:
+    """
+    Create prompt for LLM.
+
+    Rule details are compressed (see prompt_budget) so the whole prompt,
+    system prompt included, stays within LLM_PROMPT_TOKENS. Sections of
+    `skip_authorities` (already cached) are not requested; their rules are
+    listed by title only, as context for the summary.
+    """
+    section_format = "".join(
+        f"## {authority} Requirements\n[List specific {authority} requirements]\n\n"
+        for authority in _group_by_authority(matched_rules) if authority not in skip_authorities
+    )
+    listed_rules = [
+        dict(rule, desc_en="", desc_he="") if rule["authority"] in skip_authorities else rule
         for rule in matched_rules
-    ])
+    ]
     
-    return f"""Generate a licensing report for an Israeli restaurant business.
+    def render(rule_details: str) -> str:
+        return f"""Generate a licensing report for an Israeli restaurant business.
 
-BUSINESS PROFILE:
-- Size: {profile['size_m2']}m²
-- Seats: {profile['seats']}
-- Serves Alcohol: {profile['serves_alcohol']}
-- Uses Gas: {profile['uses_gas']}
-- Has Misting: {profile['has_misting']}
-- Offers Delivery: {profile['offers_delivery']}
+{_profile_block(profile)}
 
-MATCHED RULES ({len(matched_rules)} total):
+MATCHED RULES ({len(matched_rules)} total, grouped by authority):
 {rule_details}
 
 REQUIREMENTS:
-1. Start with a brief summary paragraph
-2. Create sections for each authority with specific requirements
+1. Start with a brief summary paragraph covering all matched rules
+2. Create a section with specific requirements for each authority in the format below
 3. End with actionable recommendations
 
 FORMAT YOUR RESPONSE AS:
@@ -244,207 +811,367 @@ FORMAT YOUR RESPONSE AS:
 ## Summary
 [Brief overview of licensing requirements]
 
-## Israel Police Requirements  
-[List specific police requirements if any]
+{section_format}## Recommendations
+- [Actionable recommendation 1]
+- [Actionable recommendation 2]
+- [Actionable recommendation 3]
 
-## Ministry of Health Requirements
-[List specific health requirements if any]
+Use clear headers and bullet points. Include both Hebrew and English where relevant."""
+    
+    frame_tokens = _count_tokens(SYSTEM_PROMPT) + _count_tokens(render(""))
+    budget = max(int(os.getenv("LLM_PROMPT_TOKENS", "3000")) - frame_tokens, 0)
+    rule_details, _ = compress_rules(listed_rules, budget, count=_count_tokens)
+    return render(rule_details)
+
+
+def _create_section_prompt(authority: str, rules: List[Dict[str, Any]]) -> str:
+    """
+    Prompt for one authority's section in fan-out mode.
+
+    The profile is left out on purpose: the matched rules already reflect it,
+    and this keeps sections reusable across profiles.
+    """
+    def render(rule_details: str) -> str:
+        return f"""Write the {authority} section of a licensing report for an Israeli restaurant business.
+
+RULES ({len(rules)} total):
+{rule_details}
+
+List the specific requirements as bullet points, citing the rule IDs.
+Include both Hebrew and English where relevant. Do not add headers, a summary or recommendations."""
+    
+    frame_tokens = _count_tokens(SYSTEM_PROMPT) + _count_tokens(render(""))
+    budget = max(int(os.getenv("LLM_PROMPT_TOKENS", "3000")) - frame_tokens, 0)
+    rule_details, _ = compress_rules(rules, budget, count=_count_tokens)
+    return render(rule_details)
+
+
+def _create_summary_prompt(profile: Dict[str, Any], matched_rules: List[Dict[str, Any]]) -> str:
+    """Short prompt for the summary and recommendations in fan-out mode."""
+    rule_titles = "\n".join(
+        f"- {rule['id']} ({rule['authority']}, {rule['priority']}): {rule['title']}"
+        for rule in matched_rules
+    )
+    
+    return f"""Summarize the licensing requirements for an Israeli restaurant business.
+
+{_profile_block(profile)}
+
+MATCHED RULES ({len(matched_rules)} total):
+{rule_titles}
 
-## Fire & Rescue Authority Requirements
-[List specific fire requirements if any]
+FORMAT YOUR RESPONSE AS:
+
+## Summary
+[Brief overview of licensing requirements]
 
 ## Recommendations
 - [Actionable recommendation 1]
 - [Actionable recommendation 2]
 - [Actionable recommendation 3]
 
-Use clear headers and bullet points. Include both Hebrew and English where relevant."""
+Include both Hebrew and English where relevant."""
+
+
+def _profile_block(profile: Dict[str, Any]) -> str:
+    return f"""BUSINESS PROFILE:
+- Size: {profile['size_m2']}m²
+- Seats: {profile['seats']}
+- Serves Alcohol: {profile['serves_alcohol']}
+- Uses Gas: {profile['uses_gas']}
+- Has Misting: {profile['has_misting']}
+- Offers Delivery: {profile['offers_delivery']}"""
+
+
+def _count_tokens(text: str) -> int:
+    return count_tokens(text, LLM_MODEL)
+
+
+def _completion_tokens(matched_rules: List[Dict[str, Any]], skip_authorities: Collection[str] = ()) -> int:
+    """`max_tokens` sized to the sections to write, capped by LLM_MAX_OUTPUT_TOKENS."""
+    cap = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "2000"))
+    sections = [authority for authority in _group_by_authority(matched_rules) if authority not in skip_authorities]
+    return completion_tokens(len(sections), cap)
+
+
+def _parse_llm_response(llm_output: str, matched_rules: List[Dict[str, Any]],
+                        plan: Optional[_SectionPlan] = None) -> ReportJSON:
+    """
+    Parse LLM response into structured format in a single pass over the text.
+
+    With a section plan, its cached sections are used as-is and the sections
+    the LLM wrote are added to the section cache.
+    """
+    report, parsed_sections = _parse_report(llm_output, matched_rules, plan.cached if plan else None)
+    if plan is not None:
+        plan.store(parsed_sections)
+    return report
 
 
-def _parse_llm_response(llm_output: str, matched_rules: List[Dict[str, Any]]) -> ReportJSON:
-    """Parse LLM response into structured format."""
+def _parse_report(llm_output: str, matched_rules: List[Dict[str, Any]],
+                  known_sections: Optional[Dict[str, ReportSection]] = None
+                  ) -> Tuple[ReportJSON, Dict[str, ReportSection]]:
+    """Parse a complete LLM response; returns the report and the sections taken from the text."""
     logger.info("Parsing actual LLM response")
     
     try:
-        # Extract basic information from matched rules
-        rule_ids = [rule["id"] for rule in matched_rules]
-        authorities = list(set(rule["authority"] for rule in matched_rules))
-        high_priority_count = sum(1 for rule in matched_rules if rule["priority"] == "high")
+        parser = ReportStreamParser(matched_rules, known_sections=known_sections)
+        parser.feed(llm_output)
+        parser.finish()
+        report = parser.report()
         
-        # Try to extract structured content from LLM response
-        # Split response into sections
-        sections = []
+    except Exception as e:
+        logger.error(f"Failed to parse LLM response: {str(e)}")
+        logger.debug(f"LLM output was: {llm_output[:500]}...")  # Log first 500 chars for debugging
+        raise RuntimeError(f"Failed to parse LLM response: {str(e)}")
+    
+    return report, parser.parsed_sections
+
+
+def _parse_section_response(llm_output: str, authority: str, rules: List[Dict[str, Any]]) -> ReportSection:
+    """Turn a fan-out section completion into the authority's `ReportSection`."""
+    parser = ReportStreamParser(rules)
+    parser.feed(f"## {authority} Requirements\n{llm_output}")
+    parser.finish()
+    return parser.report().sections[0]
+
+
+def _group_by_authority(matched_rules: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Group rules by authority, keeping first-seen authority order."""
+    authority_rules: Dict[str, List[Dict[str, Any]]] = {}
+    for rule in matched_rules:
+        authority_rules.setdefault(rule["authority"], []).append(rule)
+    return authority_rules
+
+
+def _section_priority(rules: List[Dict[str, Any]]) -> str:
+    return "high" if any(rule["priority"] == "high" for rule in rules) else "medium"
+
+
+_NAME_TOKEN = re.compile(r"\w+")
+
+
+def _name_tokens(text: str) -> List[str]:
+    """Lowercase word tokens of a header or authority name; '&' reads as 'and'."""
+    return _NAME_TOKEN.findall(text.lower().replace("&", " and "))
+
+
+class AuthorityAliases:
+    """
+    Normalized alias dictionary for matching section headers to authorities.
+
+    Each authority is indexed both as its spaced token sequence
+    ("fire and rescue authority") and run together ("fireandrescueauthority"),
+    covering the header spellings models produce. A header is matched by
+    looking up its token n-grams, so the cost depends on the header length,
+    not on the number of authorities.
+    """
+
+    def __init__(self, authorities: Tuple[str, ...]):
+        self._aliases: Dict[str, str] = {}
+        lengths = {1}
+        for authority in authorities:
+            tokens = _name_tokens(authority)
+            if not tokens:
+                continue
+            self._aliases.setdefault(" ".join(tokens), authority)
+            self._aliases.setdefault("".join(tokens), authority)
+            lengths.add(len(tokens))
+        self._lengths = sorted(lengths)
+
+    def find(self, header: str) -> List[str]:
+        """Authorities named in a header, in order of appearance."""
+        tokens = _name_tokens(header)
+        found: List[str] = []
+        for i in range(len(tokens)):
+            for n in self._lengths:
+                if i + n > len(tokens):
+                    break
+                gram = tokens[i:i + n]
+                for key in (" ".join(gram), "".join(gram)):
+                    authority = self._aliases.get(key)
+                    if authority is not None and authority not in found:
+                        found.append(authority)
+        return found
+
+
+@lru_cache(maxsize=256)
+def _authority_aliases(authorities: Tuple[str, ...]) -> AuthorityAliases:
+    return AuthorityAliases(authorities)
+
+
+def _fallback_authority_content(authority: str, rules: List[Dict[str, Any]]) -> str:
+    """Section content built from rule descriptions when the LLM skipped an authority."""
+    content = f"Requirements from {authority}:\n\n"
+    for rule in rules:
+        content += f"• {rule['title']}\n"
+        content += f"  EN: {rule['desc_en']}\n"
+        if rule.get('desc_he'):
+            content += f"  HE: {rule['desc_he']}\n"
+        content += "\n"
+    return content
+
+
+def _fallback_summary(total_rules: int, high_priority: int, authority_count: int) -> str:
+    return f"Business licensing assessment identified {total_rules} requirements from {authority_count} authorities, with {high_priority} high-priority items requiring immediate attention."
+
+
+class ReportStreamParser:
+    """
+    Single-pass, incremental parser for LLM report text.
+
+    Text is fed as it arrives (streamed deltas, or the whole response at once
+    from `_parse_llm_response`) and consumed line by line; each line is
+    looked at once, whatever the number of authorities. An authority's
+    section is complete once its `##` block is closed by the next unrelated
+    header, so `feed` returns it right away instead of waiting for the whole
+    completion. `finish` closes the last block and adds fallback sections for
+    authorities the model skipped; `report` then assembles the `ReportJSON`.
+
+    Summary: the `## Summary` block (or a line starting with "summary"),
+    else the first two long lines. Recommendations: bullets after the first
+    line mentioning "recommendation", up to the next `##` header.
+
+    `known_sections` (e.g. from the section cache) are used as-is and any
+    text for those authorities is ignored. Sections actually taken from the
+    text are collected in `parsed_sections`.
+    """
+
+    def __init__(self, matched_rules: List[Dict[str, Any]],
+                 known_sections: Optional[Dict[str, ReportSection]] = None):
+        self.matched_rules = matched_rules
+        self._authority_rules = _group_by_authority(matched_rules)
+        self._aliases = _authority_aliases(tuple(self._authority_rules))
+        self._sections: Dict[str, ReportSection] = dict(known_sections or {})
+        self.parsed_sections: Dict[str, ReportSection] = {}
+        self._open: Dict[str, List[str]] = {}
+        self._partial = ""
+        self._line_count = 0
+        self._finished = False
         
-        # Look for section headers or create basic sections by authority
-        authority_rules = {}
-        for rule in matched_rules:
-            auth = rule["authority"]
-            if auth not in authority_rules:
-                authority_rules[auth] = []
-            authority_rules[auth].append(rule)
+        self._summary_lines: List[str] = []
+        self._leading_lines: List[str] = []
+        self._in_summary = False
+        self._summary_done = False
         
-        # Create sections from LLM content
-        for authority, rules in authority_rules.items():
-            auth_rule_ids = [rule["id"] for rule in rules]
-            priority = "high" if any(rule["priority"] == "high" for rule in rules) else "medium"
-            
-            # Extract relevant content for this authority from LLM output
-            section_content = _extract_authority_content(llm_output, authority, rules)
-            
-            sections.append(ReportSection(
-                title=f"{authority} Requirements",
-                content=section_content,
-                rule_ids=auth_rule_ids,
-                priority=priority
-            ))
+        self._recommendations: List[str] = []
+        self._in_recommendations = False
+        self._recommendations_done = False
+
+    def feed(self, text: str) -> List[ReportSection]:
+        """Consume a text delta and return the sections it completed."""
+        if '\n' not in text:
+            self._partial += text
+            return []
+        *lines, self._partial = (self._partial + text).split('\n')
+        completed = []
+        for line in lines:
+            completed.extend(self._consume(line))
+        return completed
+
+    def finish(self) -> List[ReportSection]:
+        """Flush the end of the stream and return the remaining sections."""
+        if self._finished:
+            return []
+        self._finished = True
+        completed = self._consume(self._partial)
+        self._partial = ""
         
-        # Extract summary from LLM output (first paragraph or specific markers)
-        summary = _extract_summary(llm_output, len(matched_rules), high_priority_count, len(authorities))
+        for authority in list(self._open):
+            completed.append(self._close(authority))
+        for authority, rules in self._authority_rules.items():
+            if authority not in self._sections:
+                content = _fallback_authority_content(authority, rules)
+                completed.append(self._add_section(authority, content))
+        return completed
+
+    def report(self) -> ReportJSON:
+        """Assemble the full report; call after `finish`."""
+        if not self._finished:
+            raise RuntimeError("Report stream has not finished")
         
-        # Extract recommendations
-        recommendations = _extract_recommendations(llm_output)
+        high_priority_count = sum(1 for rule in self.matched_rules if rule["priority"] == "high")
+        authorities = list(set(rule["authority"] for rule in self.matched_rules))
+        summary_lines = self._summary_lines or self._leading_lines
+        if summary_lines:
+            summary = ' '.join(summary_lines)
+        else:
+            summary = _fallback_summary(len(self.matched_rules), high_priority_count, len(authorities))
         
         return ReportJSON(
             summary=summary,
-            sections=sections,
-            total_rules=len(matched_rules),
+            sections=[self._sections[authority] for authority in self._authority_rules],
+            total_rules=len(self.matched_rules),
             high_priority_count=high_priority_count,
-            recommendations=recommendations,
+            recommendations=self._recommendations or list(DEFAULT_RECOMMENDATIONS),
             authorities=authorities
         )
-        
-    except Exception as e:
-        logger.error(f"Failed to parse LLM response: {str(e)}")
-        logger.debug(f"LLM output was: {llm_output[:500]}...")  # Log first 500 chars for debugging
-        raise RuntimeError(f"Failed to parse LLM response: {str(e)}")
 
-
-def _extract_authority_content(llm_output: str, authority: str, rules: List[Dict[str, Any]]) -> str:
-    """Extract content relevant to a specific authority from LLM output."""
-    lines = llm_output.split('\n')
-    
-    # Look for authority section header
-    authority_content = []
-    in_authority_section = False
-    
-    # Check for various authority name formats
-    authority_variations = [
-        authority,
-        authority.replace(" ", "").lower(),
-        authority.lower(),
-        authority.replace("&", "and").lower()
-    ]
-    
-    for line in lines:
+    def _consume(self, line: str) -> List[ReportSection]:
         line_clean = line.strip()
-        line_lower = line_clean.lower()
+        self._update_summary(line_clean)
+        self._update_recommendations(line_clean)
+        self._line_count += 1
         
-        # Check if this line starts a new authority section
-        if line_clean.startswith('##') and any(var in line_lower for var in authority_variations):
-            in_authority_section = True
-            authority_content.append(line_clean)
-            continue
+        if not line_clean.startswith('##'):
+            if line_clean:
+                for content in self._open.values():
+                    content.append(line_clean)
+            return []
         
-        # If we hit another ## section, stop collecting
-        elif line_clean.startswith('##') and in_authority_section:
-            break
-        
-        # Collect content while in the authority section
-        elif in_authority_section and line_clean:
-            authority_content.append(line_clean)
-    
-    if authority_content:
-        content = '\n'.join(authority_content)
-    else:
-        # Fallback: create content from rule descriptions
-        content = f"Requirements from {authority}:\n\n"
-        for rule in rules:
-            content += f"• {rule['title']}\n"
-            content += f"  EN: {rule['desc_en']}\n"
-            if rule.get('desc_he'):
-                content += f"  HE: {rule['desc_he']}\n"
-            content += "\n"
-    
-    return content
+        # A header extends the authorities it names and closes all others
+        named = self._aliases.find(line_clean)
+        completed = []
+        for authority in list(self._open):
+            if authority in named:
+                self._open[authority].append(line_clean)
+            else:
+                completed.append(self._close(authority))
+        for authority in named:
+            if authority not in self._sections and authority not in self._open:
+                self._open[authority] = [line_clean]
+        return completed
 
+    def _close(self, authority: str) -> ReportSection:
+        section = self._add_section(authority, '\n'.join(self._open.pop(authority)))
+        self.parsed_sections[authority] = section
+        return section
 
-def _extract_summary(llm_output: str, total_rules: int, high_priority: int, authority_count: int) -> str:
-    """Extract summary from LLM output."""
-    lines = llm_output.split('\n')
-    
-    # Look for explicit summary section
-    summary_lines = []
-    in_summary = False
-    
-    for line in lines:
-        line_clean = line.strip()
-        
-        # Check for summary header
-        if line_clean.startswith('## Summary') or line_clean.lower().startswith('summary'):
-            in_summary = True
-            continue
-        
-        # Stop at next section
-        elif line_clean.startswith('##') and in_summary:
-            break
-        
-        # Collect summary content
-        elif in_summary and line_clean:
-            summary_lines.append(line_clean)
-    
-    # If no explicit summary found, take first meaningful paragraphs
-    if not summary_lines:
-        for line in lines[:15]:
-            line_clean = line.strip()
-            if line_clean and not line_clean.startswith('#') and len(line_clean) > 30:
-                summary_lines.append(line_clean)
-                if len(summary_lines) >= 2:
-                    break
-    
-    if summary_lines:
-        summary = ' '.join(summary_lines)
-    else:
-        # Fallback summary
-        summary = f"Business licensing assessment identified {total_rules} requirements from {authority_count} authorities, with {high_priority} high-priority items requiring immediate attention."
-    
-    return summary
+    def _add_section(self, authority: str, content: str) -> ReportSection:
+        rules = self._authority_rules[authority]
+        section = ReportSection(
+            title=f"{authority} Requirements",
+            content=content,
+            rule_ids=[rule["id"] for rule in rules],
+            priority=_section_priority(rules)
+        )
+        self._sections[authority] = section
+        return section
 
+    def _update_summary(self, line_clean: str) -> None:
+        if self._line_count < 15 and len(self._leading_lines) < 2 \
+                and line_clean and not line_clean.startswith('#') and len(line_clean) > 30:
+            self._leading_lines.append(line_clean)
+        if self._summary_done:
+            return
+        if line_clean.startswith('## Summary') or line_clean.lower().startswith('summary'):
+            self._in_summary = True
+        elif line_clean.startswith('##') and self._in_summary:
+            self._summary_done = True
+        elif self._in_summary and line_clean:
+            self._summary_lines.append(line_clean)
 
-def _extract_recommendations(llm_output: str) -> List[str]:
-    """Extract recommendations from LLM output."""
-    lines = llm_output.split('\n')
-    recommendations = []
-    
-    # Look for recommendations section
-    in_recommendations = False
-    for line in lines:
-        line_clean = line.strip()
-        
-        # Check for recommendations header
+    def _update_recommendations(self, line_clean: str) -> None:
+        if self._recommendations_done:
+            return
         if line_clean.startswith('## Recommendation') or 'recommendation' in line_clean.lower():
-            in_recommendations = True
-            continue
-        
-        # Stop at next section
-        elif line_clean.startswith('##') and in_recommendations:
-            break
-        
-        # Extract bullet point recommendations
-        elif in_recommendations and (line_clean.startswith('•') or line_clean.startswith('-') or line_clean.startswith('*')):
+            self._in_recommendations = True
+        elif line_clean.startswith('##') and self._in_recommendations:
+            self._recommendations_done = True
+        elif self._in_recommendations and line_clean.startswith(('•', '-', '*')):
             rec_text = line_clean.lstrip('•-* ').strip()
             if rec_text:
-                recommendations.append(rec_text)
-    
-    if not recommendations:
-        # Default recommendations
-        recommendations = [
-            "Contact relevant authorities early in the planning process\nפנו לרשויות הרלוונטיות בשלב מוקדם של התכנון",
-            "Prioritize high-priority requirements first\nתעדוף דרישות עדיפות גבוהה קודם",
-            "Ensure all documentation is prepared before submission\nוודאו שכל התיעוד מוכן לפני הגשה",
-            "Consider professional licensing consultation for complex requirements\nשקול ייעוץ מקצועי לרישוי עבור דרישות מורכבות"
-        ]
-    
-    return recommendations
+                self._recommendations.append(rec_text)
 
 
 def validate_report_references(report: ReportJSON, valid_rule_ids: List[str]) -> bool:
@@ -5,38 +5,510 @@ Business licensing rule matching engine.
 
 import json
 import os
-from typing import Dict, List, Any
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Sequence, Tuple, Union
 
+# Largest table build_profile_table will precompute
+MAX_PROFILE_CELLS = 1 << 20
 
-def match_rules(profile: Dict[str, Any], rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Rules per BoundIndex block; each block's masks fit in one machine word
+BOUND_BLOCK = 64
+
+
+class BoundIndex:
+    """
+    Sorted endpoint arrays for one numeric trigger (`area` or `seats`).
+
+    Rules are split into blocks of `BOUND_BLOCK` consecutive bits. Within a
+    block, rules whose lower bound is satisfied by a value are a prefix of
+    the block's min-sorted rules, and rules whose upper bound is satisfied
+    are a suffix of its max-sorted rules, so each block resolves with one
+    bisect per side into word-sized prefix/suffix masks. `mask` joins the
+    block words into one int bitset, which keeps the index linear in the
+    number of rules instead of storing a full-width mask per endpoint.
+    """
+
+    __slots__ = ("trigger", "mins", "maxs", "blocks")
+
+    def __init__(self, trigger: str, rules: Sequence[Dict[str, Any]]):
+        self.trigger = trigger
+        self.blocks: List[Tuple[List[Any], List[int], int, List[Any], List[int], int]] = []
+        mins: List[Any] = []
+        maxs: List[Any] = []
+
+        for start in range(0, len(rules), BOUND_BLOCK):
+            lower: List[Tuple[Any, int]] = []
+            upper: List[Tuple[Any, int]] = []
+            no_min = 0
+            no_max = 0
+            for bit, rule in enumerate(rules[start:start + BOUND_BLOCK]):
+                bounds = rule["triggers"].get(trigger, {})
+                if "min" in bounds:
+                    lower.append((bounds["min"], bit))
+                else:
+                    no_min |= 1 << bit
+                if "max" in bounds:
+                    upper.append((bounds["max"], bit))
+                else:
+                    no_max |= 1 << bit
+
+            lower.sort()
+            upper.sort()
+
+            # min_prefix[k] = block rules with the k smallest lower bounds
+            min_prefix = [0]
+            for _, bit in lower:
+                min_prefix.append(min_prefix[-1] | (1 << bit))
+
+            # max_suffix[k] = block rules with upper bounds at sorted position k or later
+            max_suffix = [0] * (len(upper) + 1)
+            for k in range(len(upper) - 1, -1, -1):
+                max_suffix[k] = max_suffix[k + 1] | (1 << upper[k][1])
+
+            block_mins = [value for value, _ in lower]
+            block_maxs = [value for value, _ in upper]
+            self.blocks.append((block_mins, min_prefix, no_min, block_maxs, max_suffix, no_max))
+            mins.extend(block_mins)
+            maxs.extend(block_maxs)
+
+        self.mins = sorted(mins)
+        self.maxs = sorted(maxs)
+
+    def mask(self, value: Any) -> int:
+        """Bitset of rules whose bounds contain `value`."""
+        words = b"".join(
+            ((no_min | min_prefix[bisect_right(mins, value)])
+             & (no_max | max_suffix[bisect_left(maxs, value)])).to_bytes(BOUND_BLOCK // 8, "little")
+            for mins, min_prefix, no_min, maxs, max_suffix, no_max in self.blocks
+        )
+        return int.from_bytes(words, "little")
+
+
+class CompiledRules:
+    """
+    Immutable, match-ready view of a rulebook.
+
+    Built once per rulebook version (see `rule_store.RuleStore`) and passed
+    straight to `match_rules` instead of a freshly loaded list of rules.
+    Matching a profile is two `BoundIndex` lookups plus one bitset
+    intersection with the per-flag masks; `rules` is pre-sorted by
+    `sort_keys`, so the result needs no per-request sort.
+    """
+
+    __slots__ = ("rules", "sort_keys", "area_index", "seats_index", "flag_masks",
+                 "guard_mask", "suppression_masks")
+
+    def __init__(self, rules: Iterable[Dict[str, Any]],
+                 sort_keys: Optional[Sequence[Tuple[int, float, int]]] = None):
+        rules = list(rules)
+
+        # Precompute (priority rank, tightness, authority ordinal) once and
+        # pre-sort the master list by it. Bit i is the i-th rule in sorted
+        # order, so matches come out already ordered and only need filtering.
+        # The sort is stable, so ties keep rulebook order exactly as
+        # sorting the matched subset would. A compiled rule artifact
+        # supplies the keys ready-made, in rulebook order.
+        if sort_keys is not None:
+            keys = list(sort_keys)
+        else:
+            authority_ordinal = {name: i for i, name in enumerate(sorted({r["authority"] for r in rules}))}
+            keys = [
+                (priority_order(r["priority"]), calculate_tightness(r), authority_ordinal[r["authority"]])
+                for r in rules
+            ]
+        order = sorted(range(len(rules)), key=keys.__getitem__)
+        rules = tuple(rules[i] for i in order)
+        sort_keys = tuple(keys[i] for i in order)
+
+        # flag name -> (all rules constraining the flag, {required value: rules})
+        flag_masks: Dict[str, Tuple[int, Dict[Any, int]]] = {}
+        for i, rule in enumerate(rules):
+            for flag_name, required_value in rule["triggers"].get("flags", {}).items():
+                constrained, by_value = flag_masks.get(flag_name, (0, {}))
+                by_value[required_value] = by_value.get(required_value, 0) | (1 << i)
+                flag_masks[flag_name] = (constrained | (1 << i), by_value)
+
+        # Declarative guards: bit i of guard_mask is set when rule i has a
+        # `suppresses` clause, and suppression_masks[i] holds the rules it drops
+        guard_mask = 0
+        suppression_masks: Dict[int, int] = {}
+        for i, rule in enumerate(rules):
+            if rule.get("suppresses"):
+                guard_mask |= 1 << i
+                suppression_masks[i] = sum(
+                    1 << j for j, other in enumerate(rules) if j != i and suppresses(rule, other)
+                )
+
+        object.__setattr__(self, "rules", rules)
+        object.__setattr__(self, "sort_keys", sort_keys)
+        object.__setattr__(self, "area_index", BoundIndex("area", rules))
+        object.__setattr__(self, "seats_index", BoundIndex("seats", rules))
+        object.__setattr__(self, "flag_masks", flag_masks)
+        object.__setattr__(self, "guard_mask", guard_mask)
+        object.__setattr__(self, "suppression_masks", suppression_masks)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CompiledRules is immutable")
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.rules)
+
+    def with_rules(self, rules: Iterable[Dict[str, Any]]) -> "CompiledRules":
+        """
+        The same compiled rules over edited copies of the rules.
+
+        Only valid when the edits leave everything matching depends on
+        unchanged (same IDs in the same order, same triggers, guards,
+        priorities and authorities; see `rule_store.RulebookDiff`), so the
+        indexes and masks are shared instead of rebuilt.
+        """
+        by_id = {rule["id"]: rule for rule in rules}
+        clone = object.__new__(CompiledRules)
+        for name in CompiledRules.__slots__:
+            object.__setattr__(clone, name, getattr(self, name))
+        object.__setattr__(clone, "rules", tuple(by_id[rule["id"]] for rule in self.rules))
+        return clone
+
+    def match_mask(self, profile: Dict[str, Any]) -> int:
+        """Bitset of rules whose triggers all match the profile."""
+        mask = self.area_index.mask(profile.get("size_m2", 0))
+        mask &= self.seats_index.mask(profile.get("seats", 0))
+
+        for flag_name, (constrained, by_value) in self.flag_masks.items():
+            mask &= ~constrained | by_value.get(profile.get(flag_name, False), 0)
+
+        return mask
+
+    def apply_guards(self, mask: int) -> int:
+        """Drop every rule suppressed by a matched guard rule."""
+        suppressed = 0
+        for i in iter_bits(mask & self.guard_mask):
+            suppressed |= self.suppression_masks[i]
+        return mask & ~suppressed
+
+    def candidates(self, profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Matching rules after guards, already in sort order."""
+        rules = self.rules
+        return [rules[i] for i in iter_bits(self.apply_guards(self.match_mask(profile)))]
+
+
+def interval_points(index: BoundIndex) -> List[float]:
+    """Sorted distinct endpoints of a numeric trigger."""
+    return sorted(set(index.mins) | set(index.maxs))
+
+
+def interval_cell(points: Sequence[float], value: Any) -> int:
+    """
+    Elementary interval of `value` between the endpoints.
+
+    Cell 2k+1 is the endpoint `points[k]` itself and cell 2k the open
+    interval just below it, so bounds are inclusive exactly as in `BoundIndex`.
+    """
+    k = bisect_left(points, value)
+    if k < len(points) and points[k] == value:
+        return 2 * k + 1
+    return 2 * k
+
+
+def cell_value(points: Sequence[float], cell: int) -> float:
+    """A value inside `cell`."""
+    k = cell // 2
+    if cell % 2:
+        return points[k]
+    if not points:
+        return 0
+    if k == 0:
+        return points[0] - 1
+    if k == len(points):
+        return points[-1] + 1
+    return (points[k - 1] + points[k]) / 2
+
+
+class ProfileTable:
+    """
+    Every distinct match outcome of a rulebook, precomputed.
+
+    A profile's matches depend only on which elementary interval between the
+    rules' area and seat endpoints it falls into and on its constrained
+    boolean flags, so the profile space splits into a finite set of cells.
+    The outcome of each cell is computed once from a `CompiledRules`; many
+    cells share an outcome, so cells store an index into `outcomes`.
+    Matching is a bisect per numeric trigger plus an array index.
+    """
+
+    __slots__ = ("compiled", "area_points", "seats_points", "flags", "cells", "outcomes", "outcome_ids")
+
+    def __init__(self, compiled: CompiledRules):
+        area_points = interval_points(compiled.area_index)
+        seats_points = interval_points(compiled.seats_index)
+        flags = sorted(compiled.flag_masks)
+
+        # Numeric cells are independent of the flags: mask them once per cell
+        area_masks = [compiled.area_index.mask(cell_value(area_points, cell))
+                      for cell in range(2 * len(area_points) + 1)]
+        seats_masks = [compiled.seats_index.mask(cell_value(seats_points, cell))
+                       for cell in range(2 * len(seats_points) + 1)]
+        flag_masks = [self._flag_mask(compiled, flags, bits) for bits in range(1 << len(flags))]
+
+        outcome_index: Dict[int, int] = {}
+        outcomes: List[Tuple[Dict[str, Any], ...]] = []
+        cells = array("I")
+        for area_mask in area_masks:
+            for seats_mask in seats_masks:
+                numeric = area_mask & seats_mask
+                for flag_mask in flag_masks:
+                    mask = compiled.apply_guards(numeric & flag_mask)
+                    index = outcome_index.get(mask)
+                    if index is None:
+                        index = outcome_index[mask] = len(outcomes)
+                        outcomes.append(tuple(compiled.rules[i] for i in iter_bits(mask)))
+                    cells.append(index)
+
+        object.__setattr__(self, "compiled", compiled)
+        object.__setattr__(self, "area_points", area_points)
+        object.__setattr__(self, "seats_points", seats_points)
+        object.__setattr__(self, "flags", tuple(flags))
+        object.__setattr__(self, "cells", cells)
+        object.__setattr__(self, "outcomes", tuple(outcomes))
+        object.__setattr__(self, "outcome_ids", tuple(tuple(rule["id"] for rule in rules) for rules in outcomes))
+
+    @staticmethod
+    def _flag_mask(compiled: CompiledRules, flags: List[str], bits: int) -> int:
+        """Rules whose flag triggers allow the flag values encoded in `bits`."""
+        mask = -1
+        for f, flag_name in enumerate(flags):
+            constrained, by_value = compiled.flag_masks[flag_name]
+            mask &= ~constrained | by_value.get(bool(bits >> f & 1), 0)
+        return mask
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ProfileTable is immutable")
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def with_compiled(self, compiled: CompiledRules) -> "ProfileTable":
+        """The same table over `self.compiled.with_rules(...)`; cells and outcome IDs are shared."""
+        by_id = {rule["id"]: rule for rule in compiled.rules}
+        clone = object.__new__(ProfileTable)
+        for name in ProfileTable.__slots__:
+            object.__setattr__(clone, name, getattr(self, name))
+        object.__setattr__(clone, "compiled", compiled)
+        object.__setattr__(clone, "outcomes", tuple(tuple(by_id[rule_id] for rule_id in ids) for ids in self.outcome_ids))
+        return clone
+
+    def lookup(self, profile: Dict[str, Any]) -> Optional[int]:
+        """
+        Outcome index for a profile.
+
+        Returns None for profiles the table does not cover (non-boolean flag
+        values); match those with the compiled rules.
+        """
+        bits = 0
+        for f, flag_name in enumerate(self.flags):
+            value = profile.get(flag_name, False)
+            if value is True:
+                bits |= 1 << f
+            elif value is not False:
+                return None
+        area = interval_cell(self.area_points, profile.get("size_m2", 0))
+        seats = interval_cell(self.seats_points, profile.get("seats", 0))
+        return self.cells[((area * (2 * len(self.seats_points) + 1) + seats) << len(self.flags)) | bits]
+
+    def match(self, profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Matching rules after guards, in sort order (same as `match_rules`)."""
+        index = self.lookup(profile)
+        if index is None:
+            return self.compiled.candidates(profile)
+        return list(self.outcomes[index])
+
+    def classes(self) -> Iterator[Dict[str, Any]]:
+        """
+        Describe every cell: its area and seat intervals, flag values and matched IDs.
+
+        Intervals are (low, high, low inclusive, high inclusive); None is unbounded.
+        """
+        seats_cells = 2 * len(self.seats_points) + 1
+        for position, index in enumerate(self.cells):
+            bits = position & ((1 << len(self.flags)) - 1)
+            numeric = position >> len(self.flags)
+            yield {
+                "size_m2": _describe_cell(self.area_points, numeric // seats_cells),
+                "seats": _describe_cell(self.seats_points, numeric % seats_cells),
+                "flags": {name: bool(bits >> f & 1) for f, name in enumerate(self.flags)},
+                "outcome": index,
+                "matches": list(self.outcome_ids[index])
+            }
+
+
+def _describe_cell(points: Sequence[float], cell: int) -> Tuple[Optional[float], Optional[float], bool, bool]:
+    k = cell // 2
+    if cell % 2:
+        return (points[k], points[k], True, True)
+    return (points[k - 1] if k > 0 else None, points[k] if k < len(points) else None, False, False)
+
+
+def build_profile_table(compiled: CompiledRules, max_cells: int = MAX_PROFILE_CELLS) -> Optional[ProfileTable]:
+    """
+    Precompute a `ProfileTable`, or return None if it would exceed `max_cells`.
+
+    The cell count is (2 * area endpoints + 1) * (2 * seat endpoints + 1)
+    * 2 ** constrained flags.
+    """
+    cells = ((2 * len(interval_points(compiled.area_index)) + 1)
+             * (2 * len(interval_points(compiled.seats_index)) + 1)
+             << len(compiled.flag_masks))
+    if cells > max_cells:
+        return None
+    return ProfileTable(compiled)
+
+
+RuleSet = Union[ProfileTable, CompiledRules, Sequence[Dict[str, Any]]]
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of set bits in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def compile_rules(rules: Iterable[Dict[str, Any]]) -> CompiledRules:
+    """Compile a list of rules into a `CompiledRules` structure."""
+    return CompiledRules(rules)
+
+
+def match_rules(profile: Dict[str, Any], rules: RuleSet) -> List[Dict[str, Any]]:
     """
     Match rules based on profile criteria.
     
     Args:
         profile: Business profile with size_m2, seats, and flags
-        rules: List of licensing rules
+        rules: List of licensing rules, a `CompiledRules` rulebook or its `ProfileTable`
         
     Returns:
         Sorted list of matching rules
     """
-    matched = []
-    
-    for rule in rules:
-        if rule_matches(profile, rule):
-            matched.append(rule)
+    if isinstance(rules, ProfileTable):
+        # Outcome precomputed per profile class
+        return rules.match(profile)
+    if isinstance(rules, CompiledRules):
+        # Guards compiled into bitmasks, pre-sorted at compile time
+        return rules.candidates(profile)
+
+    matched = [rule for rule in rules if rule_matches(profile, rule)]
     
-    # Apply special guard logic for Police exemption
-    exemption_matched = any(r["id"] == "R-Police-Exemption-NoAlcohol-<=200" for r in matched)
-    if exemption_matched:
-        matched = [r for r in matched 
-                  if r["authority"] != "Israel Police" or r["id"] == "R-Police-Exemption-NoAlcohol-<=200"]
+    # Apply declarative guards (e.g. the Police exemption)
+    guards = [r for r in matched if r.get("suppresses")]
+    if guards:
+        matched = [r for r in matched
+                   if not any(g is not r and suppresses(g, r) for g in guards)]
     
-    # Sort by priority, threshold tightness, authority
-    return sorted(matched, key=lambda r: (
-        priority_order(r["priority"]),
-        calculate_tightness(r),
-        r["authority"]
-    ))
+    return sorted(matched, key=rule_sort_key)
+
+
+def suppresses(guard: Dict[str, Any], rule: Dict[str, Any]) -> bool:
+    """Check if a guard rule's `suppresses` clause covers another rule."""
+    clause = guard.get("suppresses") or {}
+    return (rule["authority"] in clause.get("authorities", [])
+            or rule["id"] in clause.get("rule_ids", []))
+
+
+def match_rules_batch(profiles: Sequence[Dict[str, Any]], rules: RuleSet,
+                      chunk_size: int = 1024) -> List[List[Dict[str, Any]]]:
+    """
+    Match many profiles at once with NumPy.
+
+    Profiles become columnar arrays (size_m2, seats, one boolean column per
+    flag) and rules become min/max/required-flag arrays, so the whole
+    profile x rule match matrix is computed in one broadcasted pass per
+    chunk. Guard rules are applied as one matrix product and the
+    priority/tightness/authority order is applied once by permuting the
+    rule columns, so every row is already sorted.
+
+    Args:
+        profiles: Business profiles with size_m2, seats, and flags
+        rules: List of licensing rules or a `CompiledRules` rulebook
+        chunk_size: Profiles per broadcasted pass (bounds peak memory)
+
+    Returns:
+        One sorted list of matching rules per profile, same as `match_rules`
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("NumPy not installed. Run: pip install numpy")
+
+    if isinstance(rules, ProfileTable):
+        rules = rules.compiled
+    if isinstance(rules, CompiledRules):
+        # Columns are already in sort order
+        rule_list = list(rules.rules)
+    else:
+        rule_list = list(rules)
+        if rule_list:
+            # Stable sort of the rule columns by (priority, tightness, authority)
+            _, authority_ordinal = np.unique([r["authority"] for r in rule_list], return_inverse=True)
+            order = np.lexsort((
+                authority_ordinal,
+                np.array([calculate_tightness(r) for r in rule_list], dtype=float),
+                np.array([priority_order(r["priority"]) for r in rule_list])
+            ))
+            rule_list = [rule_list[i] for i in order]
+    if not rule_list:
+        return [[] for _ in profiles]
+
+    def bound_arrays(trigger: str) -> Tuple[Any, Any]:
+        lows = [r["triggers"].get(trigger, {}).get("min", -np.inf) for r in rule_list]
+        highs = [r["triggers"].get(trigger, {}).get("max", np.inf) for r in rule_list]
+        return np.array(lows, dtype=float), np.array(highs, dtype=float)
+
+    area_min, area_max = bound_arrays("area")
+    seats_min, seats_max = bound_arrays("seats")
+
+    # required[r, f]: -1 = flag not constrained, 0/1 = required value
+    flag_names = sorted({name for r in rule_list for name in r["triggers"].get("flags", {})})
+    required = np.full((len(rule_list), len(flag_names)), -1, dtype=np.int8)
+    for i, rule in enumerate(rule_list):
+        for name, value in rule["triggers"].get("flags", {}).items():
+            required[i, flag_names.index(name)] = int(bool(value))
+
+    flag_codes = {True: 1, False: 0}
+
+    # suppression[g, r]: guard column g suppresses rule column r
+    guard_cols = [i for i, r in enumerate(rule_list) if r.get("suppresses")]
+    suppression = np.array([
+        [j != g and suppresses(rule_list[g], other) for j, other in enumerate(rule_list)]
+        for g in guard_cols
+    ], dtype=np.int32).reshape(len(guard_cols), len(rule_list))
+
+    results: List[List[Dict[str, Any]]] = []
+    for start in range(0, len(profiles), chunk_size):
+        chunk = profiles[start:start + chunk_size]
+        size = np.array([p.get("size_m2", 0) for p in chunk], dtype=float)[:, None]
+        seats = np.array([p.get("seats", 0) for p in chunk], dtype=float)[:, None]
+        # Same equality as rule_matches: 1/0 equal True/False, any other
+        # value (None, "yes", ...) satisfies no required flag
+        flags = np.array([[flag_codes.get(p.get(name, False), -2) for name in flag_names] for p in chunk],
+                         dtype=np.int8).reshape(len(chunk), len(flag_names))
+
+        matched = (size >= area_min) & (size <= area_max) & (seats >= seats_min) & (seats <= seats_max)
+        for f in range(len(flag_names)):
+            matched &= (required[:, f] < 0) | (required[:, f] == flags[:, f, None])
+
+        # Declarative guards (e.g. the Police exemption)
+        if guard_cols:
+            matched &= (matched[:, guard_cols].astype(np.int32) @ suppression) == 0
+
+        for row in matched:
+            results.append([rule_list[i] for i in np.flatnonzero(row)])
+
+    return results
 
 
 def rule_matches(profile: Dict[str, Any], rule: Dict[str, Any]) -> bool:
@@ -72,9 +544,17 @@ def rule_matches(profile: Dict[str, Any], rule: Dict[str, Any]) -> bool:
     return True
 
 
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
 def priority_order(priority: str) -> int:
     """Convert priority to sort order (lower number = higher priority)."""
-    return {"high": 0, "medium": 1, "low": 2}.get(priority, 3)
+    return PRIORITY_ORDER.get(priority, 3)
+
+
+def rule_sort_key(rule: Dict[str, Any]) -> Tuple[int, float, str]:
+    """Sort key for matched rules: priority, threshold tightness, authority."""
+    return (priority_order(rule["priority"]), calculate_tightness(rule), rule["authority"])
 
 
 def calculate_tightness(rule: Dict[str, Any]) -> float:
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Token budgeting for LLM report prompts.
+
+Matched rules are rendered grouped by authority, with sentences repeated
+across an authority's rules written once. When the rendered rules exceed the
+prompt budget, detail is dropped from low-priority rules first (Hebrew text,
+then the English description); rule IDs and titles are always kept so the
+report can reference them. The completion budget is sized to the number of
+report sections instead of a fixed `max_tokens`.
+
+Tokens are counted with `tiktoken` when it is installed, otherwise with a
+conservative character-based estimate.
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Detail levels, from richest to leanest
+FULL, ENGLISH_ONLY, TITLE_ONLY = 2, 1, 0
+
+# Which rules lose detail first when the prompt is over budget
+DEGRADE_ORDER = [
+    ("low", ENGLISH_ONLY),
+    ("medium", ENGLISH_ONLY),
+    ("low", TITLE_ONLY),
+    ("medium", TITLE_ONLY),
+    ("high", ENGLISH_ONLY),
+    ("high", TITLE_ONLY)
+]
+
+# Completion tokens for the summary + recommendations, and per section
+BASE_COMPLETION_TOKENS = 250
+SECTION_COMPLETION_TOKENS = 250
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.;])\s+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> Optional[Any]:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Count the tokens `text` uses for `model`.
+
+    Without tiktoken this estimates ~4 ASCII characters per token and
+    ~2 characters per token for other scripts (Hebrew tokenizes densely).
+    """
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def completion_tokens(section_count: int, cap: int) -> int:
+    """`max_tokens` for a report with `section_count` authority sections."""
+    return min(cap, BASE_COMPLETION_TOKENS + SECTION_COMPLETION_TOKENS * section_count)
+
+
+def _dedupe_sentences(text: str, seen: set) -> str:
+    """Drop sentences already seen for this authority; record the new ones."""
+    kept = []
+    for sentence in _SENTENCE_SPLIT.split(text.strip()):
+        key = _NON_WORD.sub(" ", sentence.lower()).strip()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        kept.append(sentence)
+    return " ".join(kept)
+
+
+def _rule_blocks(rule: Dict[str, Any], seen_en: set, seen_he: set) -> Dict[int, str]:
+    """The rule rendered at each detail level."""
+    title_line = f"- ID: {rule['id']} | Priority: {rule['priority']} | Title: {rule['title']}\n"
+    desc_en = _dedupe_sentences(rule["desc_en"], seen_en)
+    desc_he = _dedupe_sentences(rule.get("desc_he", ""), seen_he)
+    en_line = f"  EN: {desc_en}\n" if desc_en else ""
+    he_line = f"  HE: {desc_he}\n" if desc_he else ""
+    return {
+        FULL: title_line + en_line + he_line,
+        ENGLISH_ONLY: title_line + en_line,
+        TITLE_ONLY: title_line
+    }
+
+
+def compress_rules(matched_rules: List[Dict[str, Any]], budget: int,
+                   count: Callable[[str], int] = count_tokens) -> Tuple[str, int]:
+    """
+    Render matched rules for the prompt within a token budget.
+
+    Args:
+        matched_rules: Matched rules, already in priority order
+        budget: Maximum tokens for the rendered rules
+        count: Token counter
+
+    Returns:
+        Tuple of (rendered rules, estimated token count). The count can exceed
+        the budget only when even IDs and titles alone do not fit.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for rule in matched_rules:
+        groups.setdefault(rule["authority"], []).append(rule)
+
+    headers: Dict[str, str] = {}
+    blocks: Dict[str, Dict[int, str]] = {}
+    costs: Dict[str, Dict[int, int]] = {}
+    for authority, rules in groups.items():
+        headers[authority] = f"[{authority}]\n"
+        seen_en: set = set()
+        seen_he: set = set()
+        for rule in rules:
+            rendered = _rule_blocks(rule, seen_en, seen_he)
+            blocks[rule["id"]] = rendered
+            costs[rule["id"]] = {level: count(text) for level, text in rendered.items()}
+
+    levels = {rule["id"]: FULL for rule in matched_rules}
+    total = sum(count(header) for header in headers.values()) + sum(cost[FULL] for cost in costs.values())
+
+    for priority, level in DEGRADE_ORDER:
+        if total <= budget:
+            break
+        # Within a priority, the last-listed rules lose detail first
+        for rule in reversed(matched_rules):
+            if total <= budget:
+                break
+            rule_id = rule["id"]
+            if rule["priority"] != priority or levels[rule_id] <= level:
+                continue
+            total -= costs[rule_id][levels[rule_id]] - costs[rule_id][level]
+            levels[rule_id] = level
+
+    if total > budget:
+        logger.warning(f"Rule details need {total} tokens even without descriptions (budget {budget})")
+
+    rendered = "\n".join(
+        headers[authority] + "".join(blocks[rule["id"]][levels[rule["id"]]] for rule in rules)
+        for authority, rules in groups.items()
+    )
+    return rendered, total
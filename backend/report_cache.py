@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for generated licensing reports.
+
+Entries are keyed by a hash of everything that determines the LLM output
+(matched rule content, a normalized profile bucket, prompt version and model),
+so identical assessments are answered from memory instead of a 1-10 s LLM
+call. An optional SQLite tier lets entries survive restarts; async callers
+use `aget`/`aset`, which run its I/O on a worker thread.
+
+Entries can carry tags (the rule IDs a report cites, see `llm`), so that
+when a rule changes `invalidate` drops exactly the entries built from it.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tags per SQLite statement, well under the bound-parameter limit
+TAG_BATCH = 500
+
+# Disk writes between purges of expired and excess rows
+PURGE_INTERVAL = 256
+
+
+def content_hash(payload: Any) -> str:
+    """Stable SHA-256 of a JSON-serializable payload."""
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """
+    Two-tier report cache: in-memory LRU with TTL, optional SQLite on disk.
+
+    Values are opaque strings (serialized reports). Safe to share between
+    threads; the memory tier and the SQLite tier have separate locks, so a
+    slow disk never blocks memory hits.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400.0,
+                 db_path: Optional[str] = None, clock: Callable[[], float] = time.time,
+                 max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self._writes = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # tag -> keys of the memory tier, and key -> its tags
+        self._tagged: Dict[str, Set[str]] = {}
+        self._entry_tags: Dict[str, Tuple[str, ...]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reports (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS report_tags (tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS report_tags_key ON report_tags (key)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS reports_created ON reports (created)")
+            self._db.commit()
+            with self._db_lock:
+                self._purge_disk()
+
+    @classmethod
+    def from_env(cls) -> "ReportCache":
+        """Build a cache configured from LLM_CACHE_* environment variables."""
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400")),
+            db_path=os.getenv("LLM_CACHE_DB") or None,
+            max_disk_entries=int(os.getenv("LLM_CACHE_DB_SIZE", "100000"))
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if missing or expired."""
+        now = self._clock()
+        value = self._get_memory(key, now)
+        if value is not None or self._db is None:
+            return value
+        return self._promote(key, self._get_disk(key, now))
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Like `get`, with the SQLite lookup run off the event loop."""
+        now = self._clock()
+        value = self._get_memory(key, now)
+        if value is not None or self._db is None:
+            return value
+        return self._promote(key, await asyncio.to_thread(self._get_disk, key, now))
+
+    def set(self, key: str, value: str, tags: Iterable[str] = ()) -> None:
+        """
+        Store a value in both tiers.
+
+        Args:
+            key: Cache key
+            value: Serialized value
+            tags: Labels for `invalidate`, e.g. the rule IDs the value was built from
+        """
+        now = self._clock()
+        tags = tuple(dict.fromkeys(tags))
+        with self._lock:
+            self._store(key, now, value, tags)
+        if self._db is not None:
+            self._set_disk(key, now, value, tags)
+
+    async def aset(self, key: str, value: str, tags: Iterable[str] = ()) -> None:
+        """Like `set`, with the SQLite write run off the event loop."""
+        now = self._clock()
+        tags = tuple(dict.fromkeys(tags))
+        with self._lock:
+            self._store(key, now, value, tags)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, now, value, tags)
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if now - created < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return value
+            self._forget(key)
+            return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[Tuple[float, str, List[str]]]:
+        """Return (created, value, tags) from SQLite, or None if missing or expired."""
+        with self._db_lock:
+            try:
+                row = self._db.execute("SELECT value, created FROM reports WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                value, created = row
+                if now - created >= self.ttl_seconds:
+                    self._db.execute("DELETE FROM reports WHERE key = ?", (key,))
+                    self._db.execute("DELETE FROM report_tags WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                tags = [tag for (tag,) in self._db.execute("SELECT tag FROM report_tags WHERE key = ?", (key,))]
+            except sqlite3.Error as e:
+                # A cache miss, not a failed report
+                logger.warning(f"Report cache disk read failed: {str(e)}")
+                return None
+        return created, value, tags
+
+    def _promote(self, key: str, row: Optional[Tuple[float, str, List[str]]]) -> Optional[str]:
+        """Copy a row read from disk into the memory tier and return its value."""
+        if row is None:
+            return None
+        created, value, tags = row
+        with self._lock:
+            self._store(key, created, value, tags)
+        return value
+
+    def _set_disk(self, key: str, created: float, value: str, tags: Tuple[str, ...]) -> None:
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO reports (key, value, created) VALUES (?, ?, ?)",
+                    (key, value, created)
+                )
+                self._db.execute("DELETE FROM report_tags WHERE key = ?", (key,))
+                self._db.executemany("INSERT INTO report_tags (tag, key) VALUES (?, ?)",
+                                     [(tag, key) for tag in tags])
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Report cache disk write failed: {str(e)}")
+                return
+            self._writes += 1
+            if self._writes % PURGE_INTERVAL == 0:
+                self._purge_disk()
+
+    def _purge_disk(self) -> None:
+        """Delete expired rows, then the oldest rows beyond `max_disk_entries`."""
+        try:
+            self._db.execute("DELETE FROM reports WHERE created <= ?", (self._clock() - self.ttl_seconds,))
+            excess = self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0] - self.max_disk_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM reports WHERE key IN (SELECT key FROM reports ORDER BY created LIMIT ?)", (excess,)
+                )
+            self._db.execute("DELETE FROM report_tags WHERE key NOT IN (SELECT key FROM reports)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Report cache disk purge failed: {str(e)}")
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """
+        Drop every entry carrying any of `tags` from both tiers.
+
+        Returns:
+            Number of entries dropped
+        """
+        tags = list(set(tags))
+        with self._lock:
+            keys = {key for tag in tags for key in self._tagged.get(tag, ())}
+            for key in keys:
+                self._forget(key)
+
+        if self._db is not None and tags:
+            with self._db_lock:
+                try:
+                    disk_keys: List[str] = []
+                    for start in range(0, len(tags), TAG_BATCH):
+                        batch = tags[start:start + TAG_BATCH]
+                        disk_keys.extend(key for (key,) in self._db.execute(
+                            f"SELECT DISTINCT key FROM report_tags WHERE tag IN ({','.join('?' * len(batch))})", batch
+                        ))
+                    self._db.executemany("DELETE FROM reports WHERE key = ?", [(key,) for key in disk_keys])
+                    self._db.executemany("DELETE FROM report_tags WHERE key = ?", [(key,) for key in disk_keys])
+                    self._db.commit()
+                    keys.update(disk_keys)
+                except sqlite3.Error as e:
+                    logger.warning(f"Report cache disk invalidation failed: {str(e)}")
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._entry_tags.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM reports")
+                self._db.execute("DELETE FROM report_tags")
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: str, created: float, value: str, tags: Iterable[str]) -> None:
+        self._forget(key)
+        self._entries[key] = (created, value)
+        tags = tuple(tags)
+        if tags:
+            self._entry_tags[key] = tags
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._forget(next(iter(self._entries)))
+
+    def _forget(self, key: str) -> None:
+        """Remove a key from the memory tier and the tag index."""
+        self._entries.pop(key, None)
+        for tag in self._entry_tags.pop(key, ()):
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Retries and circuit breaking for upstream LLM calls.
+
+Transient failures (timeouts, connection errors, 429 and 5xx responses) are
+retried a bounded number of times with full-jitter exponential backoff.
+Consecutive transient failures trip a circuit breaker; while it is open calls
+fail fast with `CircuitOpenError` instead of each waiting out the client
+timeout, and after `reset_timeout` a single probe call is let through to test
+whether the upstream has recovered.
+
+Other errors (bad credentials, invalid requests) are raised immediately and
+do not count against the breaker - retrying them cannot help.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the upstream while the breaker is open."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether retrying `error` may succeed."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    if isinstance(error, openai.APIConnectionError):
+        # Includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Opens after `failure_threshold` transient failures in a row; after
+    `reset_timeout` seconds it lets one probe through (half-open) and closes
+    again if that succeeds. Safe to share between threads.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        """Build a breaker configured from LLM_BREAKER_* environment variables."""
+        return cls(
+            failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30"))
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; reserves the probe when half-open."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("LLM circuit breaker closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"LLM circuit breaker opened after {self._failures} consecutive failures")
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Give back a probe whose call ended without telling us anything."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build a policy configured from LLM_RETRY_* environment variables."""
+        return cls(
+            max_attempts=int(os.getenv("LLM_RETRY_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+        )
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retry number `attempt` (1-based)."""
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def call_with_retries(call: Callable[[], T], policy: RetryPolicy, breaker: CircuitBreaker,
+                      sleep: Callable[[float], None] = time.sleep) -> T:
+    """
+    Run a blocking upstream call under the retry policy and breaker.
+
+    Raises:
+        CircuitOpenError: If the breaker rejects the call
+    """
+    for attempt in range(1, policy.max_attempts + 1):
+        if not breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+        try:
+            result = call()
+        except Exception as e:
+            if not _handle_failure(e, breaker, attempt, policy):
+                raise
+            sleep(policy.delay(attempt))
+            continue
+        breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
+
+
+async def call_with_retries_async(call: Callable[[], Awaitable[T]], policy: RetryPolicy,
+                                  breaker: CircuitBreaker) -> T:
+    """Async variant of `call_with_retries`; backoff does not block the loop."""
+    for attempt in range(1, policy.max_attempts + 1):
+        if not breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not _handle_failure(e, breaker, attempt, policy):
+                raise
+            await asyncio.sleep(policy.delay(attempt))
+            continue
+        breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
+
+
+def _handle_failure(error: Exception, breaker: CircuitBreaker, attempt: int, policy: RetryPolicy) -> bool:
+    """Book-keep a failed attempt; True if it should be retried."""
+    if not is_transient(error):
+        breaker.release()
+        return False
+    breaker.record_failure()
+    if attempt >= policy.max_attempts:
+        return False
+    logger.warning(f"Transient LLM error (attempt {attempt}/{policy.max_attempts}): {str(error)}")
+    return True
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Pre-serialized `/requirements` responses and the fast JSON response path.
+
+The body for a rulebook version is encoded once, as raw UTF-8 JSON plus gzip
+(and brotli when the `brotli` package is installed), instead of running the
+whole rulebook through the JSON encoder on every request. Each encoding has a
+strong ETag, so revalidating clients get a 304 with no body. Authority and
+priority filters are answered from position indexes built with the payload,
+and each filtered body is encoded once too. After a reload, bodies whose
+rules the `RulebookDiff` does not touch are carried over from the previous
+version, ETags included, so their clients keep getting 304s.
+
+With FAST_JSON=true, `/assess` and `/reports/{id}` responses are serialized
+straight to bytes (`json_content`): with orjson when it is installed,
+otherwise by splicing each Pydantic model's `model_dump_json()` output into
+the envelope. Either way the models skip `model_dump()` plus FastAPI's
+`jsonable_encoder` walk.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+from rule_store import Rulebook, RulebookDiff
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Content codings we can serve, most preferred first
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+def _model_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Mapping):
+        # Rules mapped from a compiled artifact
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _splice(value: Any) -> bytes:
+    """Encode containers ourselves and models with their own serializer."""
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode("utf-8")
+    if isinstance(value, Mapping):
+        return b"{" + b",".join(
+            json.dumps(str(key), ensure_ascii=False).encode("utf-8") + b":" + _splice(item)
+            for key, item in value.items()
+        ) + b"}"
+    if isinstance(value, (list, tuple)):
+        return b"[" + b",".join(_splice(item) for item in value) + b"]"
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize JSON content that may contain Pydantic models to compact UTF-8 bytes.
+
+    Uses orjson when installed, otherwise `model_dump_json()` for the models.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_model_default)
+    return _splice(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by `dumps` instead of FastAPI's encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json_enabled() -> bool:
+    return os.getenv("FAST_JSON", "false").lower() == "true"
+
+
+def json_content(content: Dict[str, Any]) -> Any:
+    """
+    Endpoint return value for a JSON object whose values may be Pydantic models.
+
+    With FAST_JSON=true this is a `FastJSONResponse`; otherwise the models are
+    dumped to dicts and FastAPI encodes the result as usual.
+    """
+    if fast_json_enabled():
+        return FastJSONResponse(content)
+    return {key: value.model_dump() if isinstance(value, BaseModel) else value for key, value in content.items()}
+
+
+class EncodedBody:
+    """One JSON body in every content coding, with its ETags."""
+
+    __slots__ = ("bodies", "etags")
+
+    def __init__(self, document: Dict[str, Any]):
+        raw = dumps(document)
+        digest = hashlib.sha256(raw).hexdigest()[:32]
+        self.bodies: Dict[str, bytes] = {"identity": raw}
+        if len(raw) >= MIN_COMPRESS_BYTES:
+            self.bodies["gzip"] = gzip.compress(raw, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(raw)
+        # Strong validators must differ between encodings of the same content
+        self.etags = {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+            for coding in self.bodies
+        }
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names any encoding of this body."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if "*" in tags:
+            return True
+        # If-None-Match uses the weak comparison
+        tags = {tag[2:] if tag.startswith("W/") else tag for tag in tags}
+        return not tags.isdisjoint(self.etags.values())
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Sequence[str]) -> str:
+    """Pick the preferred content coding the client accepts, else identity."""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in ENCODINGS:
+        if coding in available and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+class RequirementsPayload:
+    """Encoded `/requirements` bodies for one rulebook version."""
+
+    def __init__(self, rules: Sequence[Dict[str, Any]], previous: Optional["RequirementsPayload"] = None,
+                 diff: Optional[RulebookDiff] = None):
+        self.rules = tuple(rules)
+        by_authority: Dict[str, List[int]] = {}
+        by_priority: Dict[str, List[int]] = {}
+        for i, rule in enumerate(self.rules):
+            by_authority.setdefault(rule["authority"], []).append(i)
+            by_priority.setdefault(rule["priority"], []).append(i)
+        self.by_authority: Dict[str, Tuple[int, ...]] = {key: tuple(ids) for key, ids in by_authority.items()}
+        self.by_priority: Dict[str, Tuple[int, ...]] = {key: tuple(ids) for key, ids in by_priority.items()}
+        self._lock = threading.Lock()
+        self._bodies: Dict[Tuple[Optional[str], Optional[str]], EncodedBody] = {}
+        if previous is not None and diff is not None and not diff.reordered:
+            self._carry_over(previous, diff)
+        self.body(None, None)
+
+    def _carry_over(self, previous: "RequirementsPayload", diff: RulebookDiff) -> None:
+        """Reuse the previous version's bodies for filters no added, removed or changed rule falls in."""
+        touched = [rule for rule in previous.rules if rule["id"] in diff.affected]
+        touched += [rule for rule in self.rules if rule["id"] in diff.changed or rule["id"] in diff.added]
+        for (authority, priority), body in previous._bodies.items():
+            if not any((authority is None or rule["authority"] == authority)
+                       and (priority is None or rule["priority"] == priority) for rule in touched):
+                self._bodies[(authority, priority)] = body
+
+    def body(self, authority: Optional[str], priority: Optional[str]) -> EncodedBody:
+        """Encoded body for a filter; built on first use and kept for the version."""
+        key = (authority, priority)
+        body = self._bodies.get(key)
+        if body is not None:
+            return body
+
+        positions = range(len(self.rules))
+        if authority is not None:
+            positions = self.by_authority.get(authority, ())
+        if priority is not None:
+            wanted = set(self.by_priority.get(priority, ()))
+            positions = [i for i in positions if i in wanted]
+        rules = [self.rules[i] for i in positions]
+        body = EncodedBody({"requirements": rules, "count": len(rules)})
+
+        # Only filters on indexed values are kept, so arbitrary query strings
+        # cannot grow the memo
+        if (authority is None or authority in self.by_authority) and (priority is None or priority in self.by_priority):
+            with self._lock:
+                body = self._bodies.setdefault(key, body)
+        return body
+
+
+class RequirementsResponses:
+    """Builds the `RequirementsPayload` once per rulebook version and serves it."""
+
+    def __init__(self, max_age: Optional[int] = None):
+        if max_age is None:
+            max_age = int(os.getenv("REQUIREMENTS_MAX_AGE", "60"))
+        self.cache_control = f"public, max-age={max_age}"
+        self._lock = threading.Lock()
+        self._current: Optional[Tuple[Rulebook, RequirementsPayload]] = None
+
+    def payload(self, rulebook: Rulebook) -> RequirementsPayload:
+        """Payload for a rulebook snapshot, built on its first request."""
+        with self._lock:
+            current = self._current
+            if current is None or current[0] is not rulebook:
+                # Bodies carry over only from the version the diff was taken against
+                previous = None
+                if current is not None and rulebook.diff is not None and current[0].version + 1 == rulebook.version:
+                    previous = current[1]
+                current = self._current = (rulebook, RequirementsPayload(rulebook.rules, previous, rulebook.diff))
+            return current[1]
+
+    def respond(self, rulebook: Rulebook, headers: Any,
+                authority: Optional[str] = None, priority: Optional[str] = None) -> Response:
+        """
+        Response for a request, honouring If-None-Match and Accept-Encoding.
+
+        Args:
+            rulebook: Current rulebook
+            headers: Request headers
+            authority: Optional authority filter
+            priority: Optional priority filter
+        """
+        body = self.payload(rulebook).body(authority, priority)
+        coding = choose_encoding(headers.get("accept-encoding"), list(body.bodies))
+        response_headers = {
+            "ETag": body.etags[coding],
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding"
+        }
+        if body.matches(headers.get("if-none-match")):
+            return Response(status_code=304, headers=response_headers)
+        if coding != "identity":
+            response_headers["Content-Encoding"] = coding
+        return Response(content=body.bodies[coding], media_type="application/json", headers=response_headers)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Compiled binary form of the rulebook.
+
+`requirements.json` is mostly bilingual text, but matching only needs the
+triggers, IDs, authorities and priorities. The artifact written next to it by
+`scripts/parse_pdf.py` stores those as fixed-width arrays and keeps every
+string in one UTF-8 blob addressed by an offset table:
+
+    header      magic, format version, rule count, metadata length
+    metadata    JSON: source sha256, flag, authority and priority names,
+                key layouts, section offsets
+    bounds      float64[4n]  area min/max, seats min/max (NaN = unbounded)
+    shape       uint8[n]     which bounds are integers, which triggers exist
+    flag_mask   uint64[n]    bit f set: the rule constrains flag f
+    flag_value  uint64[n]    bit f: the value flag f must have
+    priority    uint8[n]     index into the priority names
+    sort_keys   int32[n] priority rank, float64[n] tightness, int32[n] authority ordinal
+    layout      uint32[n]    index into the key layouts
+    offsets     uint32[n * len(FIELDS) + 1]
+    strings     UTF-8 blob
+
+A key layout is the order of a rule's keys and of the keys inside its
+triggers, so mapped rules iterate and serialize exactly like the JSON they
+were compiled from (and `/requirements` bodies and ETags do not depend on
+which of the two was loaded). Rulebooks have only a handful of distinct
+layouts.
+
+The backend memory-maps the file. Loading reads the numeric arrays, the IDs
+and any guard clauses; rules with identical triggers share one `triggers`
+dict. Titles and descriptions stay in the mapping and `ArtifactRule` decodes them
+on access. The mapped pages are shared by every worker process through the
+page cache instead of being parsed into each worker's heap.
+
+The file is always replaced atomically (`os.replace`), never rewritten in
+place, so processes still mapping an older version keep reading it safely.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from matching import calculate_tightness, priority_order
+from schema import KNOWN_FLAGS, PRIORITIES
+
+MAGIC = b"LRBK"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sIII")
+
+# Rule keys stored in their own columns; other keys (e.g. `suppresses`) go in "extra"
+RULE_FIELDS = ("id", "title", "desc_he", "desc_en", "authority", "priority", "source_ref", "triggers")
+# Strings in the blob, per rule; "extra" is the JSON of any other keys.
+# Only the id (and extra, when present) is decoded at load time.
+FIELDS = ("id", "title", "desc_he", "desc_en", "source_ref", "extra")
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+BOUNDS = (("area", "min"), ("area", "max"), ("seats", "min"), ("seats", "max"))
+BOUND_INDEX = {bound: b for b, bound in enumerate(BOUNDS)}
+# shape bits: 0-3 bound b is an integer, 4-6 the rule has area/seats/flags triggers
+HAS_TRIGGER = {"area": 1 << 4, "seats": 1 << 5, "flags": 1 << 6}
+MAX_FLAGS = 64
+
+
+def artifact_path_for(rules_path: str) -> str:
+    """Path of the compiled artifact next to a requirements.json."""
+    return os.path.splitext(rules_path)[0] + ".bin"
+
+
+class ArtifactRule(Mapping):
+    """
+    Read-only rule backed by a `RuleArtifact`.
+
+    Behaves like the rule's dict from requirements.json (and must be treated
+    as read-only like it; `triggers` is shared between rules). Titles,
+    descriptions and source references are decoded from the mapped string
+    blob each time they are read and are never kept on the heap.
+    """
+
+    __slots__ = ("_artifact", "_index", "_eager", "_keys")
+
+    def __init__(self, artifact: "RuleArtifact", index: int, eager: Dict[str, Any], keys: Tuple[str, ...]):
+        self._artifact = artifact
+        self._index = index
+        self._eager = eager
+        # The rule's keys in source order, shared by rules with the same layout
+        self._keys = keys
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._eager[key]
+        except KeyError:
+            field = FIELD_INDEX.get(key)
+            if field is None or key == "extra" or key not in self._keys:
+                raise
+            return self._artifact.string(self._index, field)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"ArtifactRule({dict(self)!r})"
+
+
+class RuleArtifact:
+    """A memory-mapped compiled rulebook."""
+
+    __slots__ = ("path", "source_sha256", "rules", "sort_keys", "_mmap", "_offsets", "_strings")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Rule artifact {path} is empty")
+        try:
+            self._load()
+        except (ValueError, KeyError, IndexError, struct.error) as e:
+            self.close()
+            raise ValueError(f"Invalid rule artifact {path}: {str(e)}")
+
+    def _load(self) -> None:
+        view = memoryview(self._mmap)
+        magic, version, count, meta_length = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"unsupported format {magic!r} v{version}")
+        meta = json.loads(bytes(view[HEADER.size:HEADER.size + meta_length]))
+        sections: Dict[str, List[int]] = meta["sections"]
+        if any(start + length > len(view) for start, length in sections.values()):
+            raise ValueError("truncated")
+
+        def numbers(name: str, code: str) -> Tuple[Any, ...]:
+            start, length = sections[name]
+            if length != count * struct.calcsize(code):
+                raise ValueError(f"{name} has {length // struct.calcsize(code)} entries for {count} rules")
+            return struct.unpack_from(f"<{count}{code}", view, start)
+
+        shapes = numbers("shape", "B")
+        flag_masks = numbers("flag_mask", "Q")
+        flag_values = numbers("flag_value", "Q")
+        priority_index = numbers("priority", "B")
+        layout_index = numbers("layout", "I")
+        self.sort_keys = tuple(zip(numbers("priority_rank", "i"), numbers("tightness", "d"),
+                                   numbers("authority_ordinal", "i")))
+
+        start, length = sections["offsets"]
+        if length != 4 * (count * len(FIELDS) + 1) or sections["bounds"][1] != 32 * count:
+            raise ValueError(f"string table or bounds do not fit {count} rules")
+        offsets = view[start:start + length]
+        if sys.byteorder == "little":
+            self._offsets: Sequence[int] = offsets.cast("I")
+        else:
+            self._offsets = struct.unpack_from(f"<{length // 4}I", offsets)
+        start, length = sections["strings"]
+        self._strings = view[start:start + length]
+        self.source_sha256: str = meta["source_sha256"]
+        flag_names: List[str] = meta["flags"]
+        authorities: List[str] = meta["authorities"]
+        priorities: List[str] = meta["priorities"]
+        unknown = (set(flag_names) - set(KNOWN_FLAGS)) | (set(priorities) - set(PRIORITIES))
+        if unknown:
+            raise ValueError(f"unknown flags or priorities {sorted(unknown)}")
+        flag_bit = {name: f for f, name in enumerate(flag_names)}
+        layouts = [(tuple(keys), trigger_keys) for keys, trigger_keys in meta["layouts"]]
+
+        start, length = sections["bounds"]
+        bounds = bytes(view[start:start + length])
+        offsets, strings, width = self._offsets, self._strings, len(FIELDS)
+        id_field, extra_field = FIELD_INDEX["id"], FIELD_INDEX["extra"]
+        shared_triggers: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        rules = []
+        for i in range(count):
+            keys, trigger_keys = layouts[layout_index[i]]
+            key = (bounds[32 * i:32 * i + 32], shapes[i], flag_masks[i], flag_values[i], layout_index[i])
+            triggers = shared_triggers.get(key)
+            if triggers is None:
+                triggers = shared_triggers[key] = _triggers(struct.unpack("<4d", key[0]), shapes[i], flag_values[i],
+                                                            flag_bit, trigger_keys)
+            position = i * width
+            eager: Dict[str, Any] = {
+                "id": str(strings[offsets[position + id_field]:offsets[position + id_field + 1]], "utf-8"),
+                "authority": authorities[self.sort_keys[i][2]],
+                "priority": priorities[priority_index[i]],
+                "triggers": triggers
+            }
+            if offsets[position + extra_field] != offsets[position + extra_field + 1]:
+                eager.update(json.loads(self.string(i, extra_field)))
+            rules.append(ArtifactRule(self, i, eager, keys))
+        self.rules: Tuple[ArtifactRule, ...] = tuple(rules)
+
+    def check(self) -> None:
+        """
+        Cheap structural check of the mapped rules, without decoding any text.
+
+        Column sizes, flag and priority names are checked when the file is
+        mapped; this checks that the string table is consistent and that
+        every rule has a distinct, non-empty ID.
+
+        Raises:
+            ValueError: If the artifact is inconsistent
+        """
+        offsets = self._offsets
+        if offsets[0] != 0 or offsets[-1] != len(self._strings) or any(
+                start > end for start, end in zip(offsets, offsets[1:])):
+            raise ValueError(f"Invalid rule artifact {self.path}: string table out of order")
+        ids = [rule["id"] for rule in self.rules]
+        if not all(ids) or len(set(ids)) != len(ids):
+            raise ValueError(f"Invalid rule artifact {self.path}: empty or duplicate rule IDs")
+
+    def string(self, index: int, field: int) -> str:
+        """Decode one string field of rule `index` from the blob."""
+        position = index * len(FIELDS) + field
+        return str(self._strings[self._offsets[position]:self._offsets[position + 1]], "utf-8")
+
+    def close(self) -> None:
+        """Unmap the file. Only for tests and tools: rules must no longer be read."""
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views into the mapping are still alive; the GC unmaps it later
+            pass
+
+
+def _triggers(bounds: Sequence[float], shape: int, flag_value: int, flag_bit: Dict[str, int],
+              trigger_keys: Sequence[Tuple[str, Sequence[str]]]) -> Dict[str, Any]:
+    """Rebuild a rule's `triggers` dict from its numeric columns, keys in source order."""
+    triggers: Dict[str, Any] = {}
+    for trigger, keys in trigger_keys:
+        if trigger == "flags":
+            triggers["flags"] = {name: bool(flag_value >> flag_bit[name] & 1) for name in keys}
+            continue
+        bound = triggers[trigger] = {}
+        for side in keys:
+            b = BOUND_INDEX[(trigger, side)]
+            bound[side] = int(bounds[b]) if shape >> b & 1 else bounds[b]
+    return triggers
+
+
+def load_artifact(path: str) -> RuleArtifact:
+    """
+    Map a compiled rulebook.
+
+    Raises:
+        OSError: If the file cannot be opened
+        ValueError: If it is not a valid artifact of this format version
+    """
+    return RuleArtifact(path)
+
+
+def write_artifact(rules: Sequence[Dict[str, Any]], path: str, source_sha256: str) -> int:
+    """
+    Compile validated rules into an artifact at `path`, replacing it atomically.
+
+    Args:
+        rules: Rules as loaded from requirements.json (already validated)
+        path: Output path, usually `artifact_path_for(rules_path)`
+        source_sha256: SHA-256 of the requirements.json bytes the rules came from
+
+    Returns:
+        Size of the artifact in bytes
+
+    Raises:
+        ValueError: If a rule uses triggers the artifact cannot represent
+    """
+    flag_names = sorted({name for rule in rules for name in rule["triggers"].get("flags", {})})
+    if len(flag_names) > MAX_FLAGS:
+        raise ValueError(f"At most {MAX_FLAGS} flags are supported, got {len(flag_names)}")
+    flag_bit = {name: f for f, name in enumerate(flag_names)}
+    authorities = sorted({r["authority"] for r in rules})
+    authority_ordinal = {name: i for i, name in enumerate(authorities)}
+    priorities = sorted({r["priority"] for r in rules})
+    if len(priorities) > 255:
+        raise ValueError(f"At most 255 priorities are supported, got {len(priorities)}")
+    priority_index = {name: i for i, name in enumerate(priorities)}
+
+    bounds: List[float] = []
+    shapes: List[int] = []
+    flag_masks: List[int] = []
+    flag_values: List[int] = []
+    # JSON of each distinct key layout -> its index
+    layouts: Dict[str, int] = {}
+    layout_index: List[int] = []
+    offsets: List[int] = [0]
+    blob = bytearray()
+    for rule in rules:
+        triggers = rule["triggers"]
+        unknown = set(triggers) - set(HAS_TRIGGER)
+        if unknown:
+            raise ValueError(f"Unsupported triggers {sorted(unknown)} in rule {rule['id']}")
+
+        shape = 0
+        for trigger, bit in HAS_TRIGGER.items():
+            if trigger in triggers:
+                shape |= bit
+        for b, (trigger, side) in enumerate(BOUNDS):
+            value = triggers.get(trigger, {}).get(side)
+            if value is None:
+                bounds.append(math.nan)
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Non-numeric {trigger}.{side} in rule {rule['id']}")
+            bounds.append(float(value))
+            if isinstance(value, int):
+                shape |= 1 << b
+        shapes.append(shape)
+        for trigger, bound in triggers.items():
+            if trigger != "flags" and set(bound) - {"min", "max"}:
+                raise ValueError(f"Unsupported {trigger} bounds {sorted(bound)} in rule {rule['id']}")
+        key_layout = json.dumps([list(rule), [[trigger, list(value)] for trigger, value in triggers.items()]],
+                            ensure_ascii=False)
+        layout_index.append(layouts.setdefault(key_layout, len(layouts)))
+
+        mask = value_bits = 0
+        for name, required in triggers.get("flags", {}).items():
+            if not isinstance(required, bool):
+                raise ValueError(f"Flag {name} must be true or false in rule {rule['id']}")
+            mask |= 1 << flag_bit[name]
+            value_bits |= int(required) << flag_bit[name]
+        flag_masks.append(mask)
+        flag_values.append(value_bits)
+
+        extra = {key: value for key, value in rule.items() if key not in RULE_FIELDS}
+        for field in FIELDS:
+            text = json.dumps(extra, ensure_ascii=False) if field == "extra" and extra else rule.get(field, "")
+            blob += text.encode("utf-8")
+            offsets.append(len(blob))
+
+    columns = [
+        ("bounds", struct.pack(f"<{len(bounds)}d", *bounds)),
+        ("shape", bytes(shapes)),
+        ("flag_mask", struct.pack(f"<{len(rules)}Q", *flag_masks)),
+        ("flag_value", struct.pack(f"<{len(rules)}Q", *flag_values)),
+        ("priority", bytes(priority_index[r["priority"]] for r in rules)),
+        ("priority_rank", struct.pack(f"<{len(rules)}i", *(priority_order(r["priority"]) for r in rules))),
+        ("tightness", struct.pack(f"<{len(rules)}d", *(calculate_tightness(r) for r in rules))),
+        ("authority_ordinal", struct.pack(f"<{len(rules)}i", *(authority_ordinal[r["authority"]] for r in rules))),
+        ("layout", struct.pack(f"<{len(rules)}I", *layout_index)),
+        ("offsets", struct.pack(f"<{len(offsets)}I", *offsets)),
+        ("strings", bytes(blob))
+    ]
+
+    # Section offsets depend on the metadata length, which contains them:
+    # lay out with a fixed-width placeholder, then fill in the real values
+    def layout(meta_length: int) -> Dict[str, List[int]]:
+        position = _align(HEADER.size + meta_length)
+        sections = {}
+        for name, data in columns:
+            sections[name] = [position, len(data)]
+            position = _align(position + len(data))
+        return sections
+
+    meta_length = 0
+    while True:
+        meta = json.dumps({"source_sha256": source_sha256, "flags": flag_names, "authorities": authorities,
+                           "priorities": priorities, "layouts": [json.loads(key) for key in layouts],
+                           "sections": layout(meta_length)},
+                          ensure_ascii=False).encode("utf-8")
+        if len(meta) <= meta_length:
+            break
+        meta_length = len(meta) + 16
+    meta = meta.ljust(meta_length)
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, len(rules), meta_length) + meta)
+    for name, data in columns:
+        out += bytes(_align(len(out)) - len(out))
+        out += data
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(out)
+    os.replace(tmp_path, path)
+    return len(out)
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def read_artifact_if_fresh(path: str, source_sha256: str) -> Optional[RuleArtifact]:
+    """
+    Map the artifact at `path` if it was compiled from the given source.
+
+    Returns:
+        The artifact, or None if it is missing, unreadable or stale
+    """
+    try:
+        artifact = load_artifact(path)
+    except (OSError, ValueError):
+        return None
+    if artifact.source_sha256 != source_sha256:
+        artifact.close()
+        return None
+    return artifact
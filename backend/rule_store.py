@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Process-wide rulebook store for the licensing rules.
+
+Parses, validates and compiles `data/requirements.json` once and keeps the
+result in an immutable snapshot. When a compiled artifact built from the same
+file contents sits next to it (see `rule_artifact`), the rules are
+memory-mapped from the artifact instead of parsed. The file's mtime is
+re-checked at most once per `check_interval` seconds; when it changes the new
+version is built off to the side and swapped in atomically, so a broken edit
+never replaces a good rulebook.
+
+Each new version carries a `RulebookDiff` against the one it replaces. When
+an edit leaves everything matching depends on unchanged, the compiled rules
+and profile table of the previous version are reused instead of rebuilt, and
+listeners registered with `add_listener` use the diff to drop only the cached
+data built from the affected rules. With `background=True` the reload runs
+on its own thread and requests keep getting the previous version until the
+new one is swapped in.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from matching import CompiledRules, ProfileTable, RuleSet, build_profile_table, compile_rules
+from rule_artifact import artifact_path_for, read_artifact_if_fresh
+from schema import check_rulebook
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "requirements.json")
+
+# Rule fields that decide what a rule matches and where it sorts
+MATCH_FIELDS = ["triggers", "suppresses", "priority", "authority"]
+
+
+@dataclass(frozen=True)
+class RulebookDiff:
+    """Structural difference between two rulebook versions, by rule ID."""
+    added: FrozenSet[str]
+    removed: FrozenSet[str]
+    # Rules present in both versions whose content differs
+    changed: FrozenSet[str]
+    # Changed rules whose MATCH_FIELDS differ, so the profiles they match may differ
+    triggers_changed: FrozenSet[str]
+    # Rules present in both versions are in a different order (match tie-breaks)
+    reordered: bool = False
+    # Match outcomes (sorted rule IDs) no profile class produces any more;
+    # None when a profile table is missing on either side
+    dropped_outcomes: Optional[FrozenSet[Tuple[str, ...]]] = None
+
+    @property
+    def affected(self) -> FrozenSet[str]:
+        """Rules whose previous content is no longer in the rulebook."""
+        return self.changed | self.removed
+
+    @property
+    def matching_changed(self) -> bool:
+        """Whether any profile may match differently than before."""
+        return bool(self.added or self.removed or self.triggers_changed or self.reordered)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.reordered)
+
+
+def diff_rules(old: Sequence[Dict[str, Any]], new: Sequence[Dict[str, Any]]) -> RulebookDiff:
+    """
+    Compare two validated rulebooks rule by rule.
+
+    Args:
+        old: Rules of the previous version
+        new: Rules of the new version
+
+    Returns:
+        The added, removed and changed rule IDs
+    """
+    old_by_id = {rule["id"]: rule for rule in old}
+    new_by_id = {rule["id"]: rule for rule in new}
+    changed = set()
+    triggers_changed = set()
+    for rule_id, rule in new_by_id.items():
+        before = old_by_id.get(rule_id)
+        if before is None or before is rule or before == rule:
+            continue
+        changed.add(rule_id)
+        if any(before.get(field) != rule.get(field) for field in MATCH_FIELDS):
+            triggers_changed.add(rule_id)
+
+    kept_old = [rule["id"] for rule in old if rule["id"] in new_by_id]
+    kept_new = [rule["id"] for rule in new if rule["id"] in old_by_id]
+    return RulebookDiff(
+        added=frozenset(new_by_id.keys() - old_by_id.keys()),
+        removed=frozenset(old_by_id.keys() - new_by_id.keys()),
+        changed=frozenset(changed),
+        triggers_changed=frozenset(triggers_changed),
+        reordered=kept_old != kept_new
+    )
+
+
+def dropped_outcomes(old: Optional[ProfileTable], new: Optional[ProfileTable]) -> Optional[FrozenSet[Tuple[str, ...]]]:
+    """Outcomes of `old` that `new` no longer produces, as sorted rule IDs."""
+    if old is None or new is None:
+        return None
+    if old is new or old.outcome_ids is new.outcome_ids:
+        return frozenset()
+    return frozenset({tuple(sorted(ids)) for ids in old.outcome_ids} - {tuple(sorted(ids)) for ids in new.outcome_ids})
+
+
+@dataclass(frozen=True)
+class Rulebook:
+    """Immutable snapshot of one rulebook version."""
+    version: int
+    mtime_ns: int
+    size: int
+    rules: Tuple[Dict[str, Any], ...]
+    compiled: CompiledRules
+    # Precomputed outcome per profile class; None if the table would be too large
+    table: Optional[ProfileTable] = None
+    # Compiled artifact the rules are mapped from; None if parsed from JSON
+    artifact_path: Optional[str] = None
+    # Difference from the version this one replaced; None for the first load
+    diff: Optional[RulebookDiff] = None
+
+    @property
+    def matcher(self) -> RuleSet:
+        """Fastest rule set for `match_rules`."""
+        return self.table if self.table is not None else self.compiled
+
+
+def validate_rules(rules: Any) -> List[Dict[str, Any]]:
+    """
+    Validate a parsed rulebook against the shared schema.
+
+    Returns:
+        The validated rules
+
+    Raises:
+        RulebookValidationError: If the rulebook has any error (a ValueError);
+            its `issues` list every problem found, with JSON paths
+    """
+    return check_rulebook(rules)
+
+
+# Called with (previous, new) after a reloaded version is swapped in
+RulebookListener = Callable[[Rulebook, Rulebook], None]
+
+
+class RuleStore:
+    """
+    Holds the current `Rulebook` and hot-reloads it when the file changes.
+
+    `get()` is safe to call from any thread; readers always see either the
+    previous or the new snapshot, never a partially built one.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, check_interval: Optional[float] = None,
+                 background: bool = False):
+        if check_interval is None:
+            check_interval = float(os.getenv("RULES_RELOAD_INTERVAL", "1.0"))
+        self.path = path
+        self.check_interval = check_interval
+        self.background = background
+        self._lock = threading.Lock()
+        self._current: Optional[Rulebook] = None
+        self._next_check = 0.0
+        self._listeners: List[RulebookListener] = []
+        self._reloader: Optional[threading.Thread] = None
+        self._reloader_lock = threading.Lock()
+        # Held while a reload is swapped in and its listeners run, so they
+        # see versions in order; reentrant so a listener may call get()
+        self._notify_lock = threading.RLock()
+
+    def add_listener(self, listener: RulebookListener) -> None:
+        """
+        Call `listener(previous, new)` after each reload is swapped in.
+
+        Listeners run on the reloading thread, one reload at a time, so they
+        see versions in order; `new.diff` says what changed.
+        """
+        self._listeners.append(listener)
+
+    def get(self) -> Rulebook:
+        """Return the current rulebook, reloading it first if the file changed."""
+        current = self._current
+        if current is None:
+            return self._refresh(force=False)
+        if time.monotonic() >= self._next_check:
+            if not self.background:
+                return self._refresh(force=False)
+            self._refresh_in_background()
+        return current
+
+    def load(self) -> Rulebook:
+        """Load the rulebook now, regardless of the reload interval."""
+        return self._refresh(force=True)
+
+    def wait_for_reload(self, timeout: Optional[float] = None) -> None:
+        """Wait until a background reload in progress has finished."""
+        reloader = self._reloader
+        if reloader is not None:
+            reloader.join(timeout)
+
+    def _refresh_in_background(self) -> None:
+        # One reloader at a time; callers keep the current version meanwhile
+        with self._reloader_lock:
+            if self._reloader is not None and self._reloader.is_alive():
+                return
+            self._reloader = threading.Thread(target=self._refresh_quietly, name="rulebook-reload", daemon=True)
+            self._reloader.start()
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self._refresh(force=False)
+        except Exception as e:
+            logger.error(f"Background rulebook reload failed: {str(e)}")
+
+    def _refresh(self, force: bool) -> Rulebook:
+        with self._notify_lock:
+            previous = self._current
+            rulebook = self._swap(force)
+            if previous is not None and rulebook is not previous:
+                self._notify(previous, rulebook)
+            return rulebook
+
+    def _swap(self, force: bool) -> Rulebook:
+        with self._lock:
+            now = time.monotonic()
+            current = self._current
+            if current is not None and not force and now < self._next_check:
+                return current
+            self._next_check = now + self.check_interval
+
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if current is None:
+                    raise
+                logger.warning(f"Rules file {self.path} disappeared - keeping version {current.version}")
+                return current
+
+            if current is not None and (stat.st_mtime_ns, stat.st_size) == (current.mtime_ns, current.size):
+                return current
+
+            try:
+                rulebook = self._build(stat, current)
+            except (ValueError, OSError) as e:
+                # RulebookValidationError is a ValueError
+                if current is None:
+                    raise
+                logger.error(f"Failed to reload rules, keeping version {current.version}: {str(e)}")
+                return current
+
+            self._current = rulebook
+            source = rulebook.artifact_path or self.path
+            logger.info(f"Loaded rulebook version {rulebook.version} ({len(rulebook.rules)} rules from {source})")
+            return rulebook
+
+    def _notify(self, previous: Rulebook, rulebook: Rulebook) -> None:
+        diff = rulebook.diff
+        logger.info(f"Rulebook version {rulebook.version}: {len(diff.added)} added, {len(diff.removed)} removed, "
+                    f"{len(diff.changed)} changed ({len(diff.triggers_changed)} matching differently)")
+        for listener in self._listeners:
+            try:
+                listener(previous, rulebook)
+            except Exception as e:
+                logger.error(f"Rulebook listener failed for version {rulebook.version}: {str(e)}")
+
+    def _build(self, stat: os.stat_result, current: Optional[Rulebook]) -> Rulebook:
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+
+        artifact = read_artifact_if_fresh(artifact_path_for(self.path), hashlib.sha256(raw).hexdigest())
+        if artifact is not None:
+            # Compiled from these exact bytes after they were validated; check
+            # that the file still holds a well-formed rulebook before trusting it
+            try:
+                artifact.check()
+            except ValueError as e:
+                logger.warning(f"Ignoring rule artifact: {str(e)}")
+                artifact.close()
+                artifact = None
+        if artifact is not None:
+            rules = artifact.rules
+        else:
+            # Parsed and validated in one pass straight from the bytes
+            rules = check_rulebook(raw)
+
+        diff = diff_rules(current.rules, rules) if current is not None else None
+        if diff is not None and not diff.matching_changed:
+            # Same matches for every profile: share the previous indexes
+            compiled = current.compiled.with_rules(rules)
+            table = current.table.with_compiled(compiled) if current.table is not None else None
+        else:
+            compiled = CompiledRules(rules, artifact.sort_keys) if artifact is not None else compile_rules(rules)
+            table = build_profile_table(compiled)
+            if table is None:
+                logger.warning("Profile table too large - matching with the compiled rules")
+        if diff is not None:
+            diff = replace(diff, dropped_outcomes=dropped_outcomes(current.table, table))
+
+        return Rulebook(
+            version=current.version + 1 if current else 1,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            rules=tuple(rules),
+            compiled=compiled,
+            table=table,
+            artifact_path=artifact.path if artifact is not None else None,
+            diff=diff
+        )
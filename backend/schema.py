@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Schema of `requirements.json`, shared by the backend and the ETL script.
+
+`Rule` and its parts are TypedDicts compiled once into a Pydantic
+`TypeAdapter`, so a whole rulebook is checked in a single pydantic-core pass
+(straight from the JSON bytes when it is read from disk) and validated rules
+come out as the plain dicts the rest of the backend uses. The structural pass
+reports every error, not just the first, each with the JSON path of the
+offending value.
+
+A second pass over the structurally valid rules checks what a schema cannot:
+
+- duplicate IDs and `suppresses.rule_ids` naming unknown rules
+- numeric bounds with min > max, which can never match (contradictory)
+- guards that suppress each other while their triggers overlap, so a profile
+  matching both loses both (contradictory)
+- rules with the same authority and title whose triggers overlap, so one
+  profile gets two tiers of the same requirement (warning)
+- `suppresses.rule_ids` entries whose triggers can never match together with
+  the guard's, so the suppression never takes effect (warning)
+
+Errors gate a rulebook load; warnings are only reported.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Literal, Optional, Sequence, Set, Tuple, Union
+
+from pydantic import ConfigDict, StrictBool, TypeAdapter, ValidationError, with_config
+from typing_extensions import NotRequired, TypedDict
+
+logger = logging.getLogger(__name__)
+
+# Profile flags a rule may constrain (the boolean fields of the business profile)
+FlagName = Literal["serves_alcohol", "uses_gas", "has_misting", "offers_delivery"]
+Priority = Literal["high", "medium", "low"]
+# Ints stay ints, so validated rules serialize exactly like the source file
+Number = Union[int, float]
+
+KNOWN_FLAGS = FlagName.__args__
+PRIORITIES = Priority.__args__
+
+# Issues included in a RulebookValidationError message
+MAX_REPORTED_ISSUES = 5
+
+# Trigger comparisons allowed for the tier overlap and guard contradiction checks
+MAX_OVERLAP_CHECKS = 2_000_000
+
+
+@with_config(ConfigDict(extra="forbid", strict=True))
+class Bounds(TypedDict, total=False):
+    """Inclusive numeric range; a missing bound is unbounded."""
+    min: Number
+    max: Number
+
+
+@with_config(ConfigDict(extra="forbid", strict=True))
+class Triggers(TypedDict, total=False):
+    """Conditions under which a rule applies; all given ones must hold."""
+    area: Bounds
+    seats: Bounds
+    flags: Dict[FlagName, StrictBool]
+
+
+@with_config(ConfigDict(extra="forbid", strict=True))
+class Suppresses(TypedDict, total=False):
+    """Guard clause: rules dropped when this rule matches."""
+    authorities: List[str]
+    rule_ids: List[str]
+
+
+@with_config(ConfigDict(extra="allow", strict=True))
+class Rule(TypedDict):
+    """One licensing rule of requirements.json."""
+    id: str
+    title: str
+    desc_he: str
+    desc_en: str
+    authority: str
+    priority: Priority
+    source_ref: str
+    triggers: Triggers
+    suppresses: NotRequired[Suppresses]
+
+
+# Compiled once; validating a rulebook is one call into pydantic-core
+rulebook_adapter = TypeAdapter(List[Rule])
+
+
+@dataclass(frozen=True)
+class RuleIssue:
+    """One problem found in a rulebook."""
+    path: str
+    message: str
+    severity: str = "error"
+
+    @property
+    def index(self) -> Optional[int]:
+        """Index of the rule this issue is about; None for the whole rulebook."""
+        if self.path.startswith("$["):
+            return int(self.path[2:self.path.index("]")])
+        return None
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+class RulebookValidationError(ValueError):
+    """A rulebook has errors; `issues` holds all of them, warnings included."""
+
+    def __init__(self, issues: List[RuleIssue]):
+        self.issues = issues
+        errors = [issue for issue in issues if issue.severity == "error"]
+        message = "; ".join(str(issue) for issue in errors[:MAX_REPORTED_ISSUES])
+        if len(errors) > MAX_REPORTED_ISSUES:
+            message += f" (and {len(errors) - MAX_REPORTED_ISSUES} more errors)"
+        super().__init__(message)
+
+
+def json_path(loc: Sequence[Union[str, int]]) -> str:
+    """JSON path for a Pydantic error location, e.g. $[3].triggers.area.min."""
+    path = "$"
+    for part in loc:
+        if isinstance(part, int):
+            path += f"[{part}]"
+        elif part != "[key]":
+            path += f".{part}" if part.isidentifier() else f"[{part!r}]"
+    return path
+
+
+def _structural_message(error: Dict[str, Any]) -> str:
+    """Pydantic error message, in this repo's wording where one exists."""
+    loc, kind = error["loc"], error["type"]
+    if not loc and kind == "list_type":
+        return "requirements.json must contain a list of rules"
+    if kind == "missing":
+        return f"Missing required field '{loc[-1]}'"
+    if kind == "extra_forbidden":
+        container = loc[-2] if len(loc) > 1 else "rule"
+        noun = "trigger" if container == "triggers" else f"{container} key"
+        return f"Unknown {noun} '{loc[-1]}'"
+    if kind == "literal_error" and loc[-1] == "priority":
+        return f"Invalid priority {error['input']!r} (expected {', '.join(PRIORITIES)})"
+    if kind == "literal_error" and loc[-1] == "[key]":
+        return f"Unknown flag {error['input']!r} (expected {', '.join(KNOWN_FLAGS)})"
+    if kind in ("dict_type", "typed_dict_type") and loc[-1] in ("triggers", "suppresses"):
+        return f"Invalid {loc[-1]} structure: expected an object"
+    return error["msg"]
+
+
+_INF = float("inf")
+_UNBOUNDED: Dict[str, Any] = {}
+
+
+def _interval(triggers: Dict[str, Any], name: str) -> Tuple[float, float]:
+    bounds = triggers.get(name, {})
+    return bounds.get("min", float("-inf")), bounds.get("max", float("inf"))
+
+
+def triggers_overlap(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Whether some profile satisfies both trigger sets."""
+    for name in ("area", "seats"):
+        a_bounds = a.get(name, _UNBOUNDED)
+        b_bounds = b.get(name, _UNBOUNDED)
+        if (a_bounds or b_bounds) and (max(a_bounds.get("min", -_INF), b_bounds.get("min", -_INF))
+                                       > min(a_bounds.get("max", _INF), b_bounds.get("max", _INF))):
+            return False
+    a_flags = a.get("flags")
+    b_flags = b.get("flags")
+    if not a_flags or not b_flags:
+        return True
+    return all(b_flags.get(name, value) == value for name, value in a_flags.items())
+
+
+class _OverlapSweep:
+    """
+    Finds pairs of rules whose triggers overlap without comparing every pair.
+
+    Rules are bucketed by their flag conditions and only buckets whose flags
+    agree are compared; within two buckets a sweep over the area or seats
+    bounds compares only rules whose intervals on that axis intersect. Small
+    groups, such as the few tiers of one requirement, are compared directly.
+    At most `budget` comparisons are made in total.
+    """
+
+    # Below this many candidate pairs, comparing directly is cheaper than bucketing
+    DIRECT_PAIRS = 32
+
+    def __init__(self, rules: Sequence[Dict[str, Any]], budget: Optional[int] = None):
+        self.rules = rules
+        self.budget = MAX_OVERLAP_CHECKS if budget is None else budget
+        self.exhausted = False
+        self._boxes: Dict[int, Tuple[Tuple[float, float], Tuple[float, float]]] = {}
+
+    def pairs(self, left: Sequence[int], right: Optional[Sequence[int]] = None) -> List[Tuple[int, int]]:
+        """
+        Overlapping pairs (i, j) with i from `left` and j from `right`.
+
+        Without `right`, pairs within `left`, each once with i < j.
+        """
+        if right is None:
+            candidates = [(left[k], j) for k in range(len(left)) for j in left[k + 1:]] \
+                if len(left) * (len(left) - 1) // 2 <= self.DIRECT_PAIRS else None
+        else:
+            candidates = [(i, j) for i in left for j in right] \
+                if len(left) * len(right) <= self.DIRECT_PAIRS else None
+        if candidates is not None:
+            self.budget -= len(candidates)
+            if self.budget < 0:
+                self.exhausted = True
+                return []
+            found = [(i, j) for i, j in candidates
+                     if triggers_overlap(self.rules[i]["triggers"], self.rules[j]["triggers"])]
+            return [(min(pair), max(pair)) for pair in found] if right is None else found
+
+        left_buckets = self._by_flags(left)
+        right_buckets = left_buckets if right is None else self._by_flags(right)
+        found: List[Tuple[int, int]] = []
+        for l, (left_flags, a) in enumerate(left_buckets.items()):
+            for r, (right_flags, b) in enumerate(right_buckets.items()):
+                if right is None and r < l:
+                    continue
+                if all(dict(right_flags).get(name, value) == value for name, value in left_flags):
+                    self._sweep(a, None if right is None and r == l else b, found)
+        if right is None:
+            found = [(min(pair), max(pair)) for pair in found]
+        return found
+
+    def _by_flags(self, indexes: Sequence[int]) -> Dict[Tuple[Tuple[str, bool], ...], List[int]]:
+        buckets: Dict[Tuple[Tuple[str, bool], ...], List[int]] = {}
+        for i in indexes:
+            flags = tuple(sorted(self.rules[i]["triggers"].get("flags", {}).items()))
+            buckets.setdefault(flags, []).append(i)
+        return buckets
+
+    def _box(self, i: int) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+        box = self._boxes.get(i)
+        if box is None:
+            triggers = self.rules[i]["triggers"]
+            box = self._boxes[i] = (_interval(triggers, "area"), _interval(triggers, "seats"))
+        return box
+
+    def _sweep(self, a: List[int], b: Optional[List[int]], found: List[Tuple[int, int]]) -> None:
+        """Add overlapping pairs between `a` and `b` (within `a` if b is None) to `found`."""
+        members = a if b is None else a + b
+        # Sweep the axis with more distinct lower bounds; compare on the other
+        axis = max((0, 1), key=lambda k: len({self._box(i)[k][0] for i in members}))
+        events = sorted((self._box(i)[axis][0], side, i)
+                        for side, group in enumerate([a] if b is None else [a, b]) for i in group)
+        active: List[List[Tuple[float, int]]] = [[], []]
+        for low, side, i in events:
+            high = self._box(i)[axis][1]
+            if low > high:
+                # Contradictory bounds never match (reported on their own)
+                continue
+            other = side if b is None else 1 - side
+            active[other] = [entry for entry in active[other] if entry[0] >= low]
+            i_min, i_max = self._box(i)[1 - axis]
+            for _, j in active[other]:
+                self.budget -= 1
+                if self.budget < 0:
+                    self.exhausted = True
+                    return
+                j_min, j_max = self._box(j)[1 - axis]
+                if max(i_min, j_min) <= min(i_max, j_max):
+                    found.append((j, i) if side else (i, j))
+            active[side].append((high, i))
+
+
+def _check_rules(rules: Sequence[Dict[str, Any]], skip: Set[int]) -> List[RuleIssue]:
+    """Cross-field and cross-rule checks over the structurally valid rules."""
+    issues: List[RuleIssue] = []
+    valid = [i for i in range(len(rules)) if i not in skip] if skip else range(len(rules))
+
+    # Set sizes first, so a clean rulebook skips the per-rule bookkeeping
+    ids = [rules[i]["id"] for i in valid]
+    first_index = dict(zip(reversed(ids), reversed(valid)))
+    if len(first_index) < len(ids):
+        for i, rule_id in zip(valid, ids):
+            if first_index[rule_id] != i:
+                issues.append(RuleIssue(f"$[{i}].id", f"Duplicate id '{rule_id}' (first defined at $[{first_index[rule_id]}])"))
+
+    for i in valid:
+        triggers = rules[i]["triggers"]
+        for name in ("area", "seats"):
+            bounds = triggers.get(name)
+            if bounds and bounds.get("min", float("-inf")) > bounds.get("max", float("inf")):
+                issues.append(RuleIssue(
+                    f"$[{i}].triggers.{name}",
+                    f"Contradictory bounds: min {bounds['min']} > max {bounds['max']}, "
+                    f"rule {rules[i]['id']} can never match"
+                ))
+
+    guards = [i for i in valid if "suppresses" in rules[i]]
+    tier_keys = [(rules[i]["authority"], rules[i]["title"]) for i in valid]
+    tiers: Dict[Tuple[str, str], List[int]] = {}
+    if len(set(tier_keys)) < len(tier_keys):
+        for i, key in zip(valid, tier_keys):
+            tiers.setdefault(key, []).append(i)
+
+    # Tiers of one requirement should not both apply to a profile
+    sweep = _OverlapSweep(rules)
+    overlaps = sorted({pair for indexes in tiers.values() if len(indexes) > 1 for pair in sweep.pairs(indexes)},
+                      key=lambda pair: (pair[1], pair[0]))
+    for i, j in overlaps:
+        issues.append(RuleIssue(
+            f"$[{j}].triggers",
+            f"Overlaps $[{i}] ({rules[i]['id']}): same authority and title, and a profile can match both",
+            "warning"
+        ))
+
+    for g in guards:
+        guard = rules[g]
+        clause = guard["suppresses"]
+        if not clause:
+            issues.append(RuleIssue(f"$[{g}].suppresses", "Invalid suppresses structure: empty guard clause"))
+        for k, rule_id in enumerate(clause.get("rule_ids", [])):
+            path = f"$[{g}].suppresses.rule_ids[{k}]"
+            target = first_index.get(rule_id)
+            if target is None:
+                issues.append(RuleIssue(path, f"Rule {guard['id']} suppresses unknown rule '{rule_id}'"))
+            elif target == g:
+                issues.append(RuleIssue(path, "A guard never suppresses itself; entry has no effect", "warning"))
+            elif not triggers_overlap(guard["triggers"], rules[target]["triggers"]):
+                issues.append(RuleIssue(
+                    path, f"Never takes effect: {rule_id} cannot match together with {guard['id']}", "warning"
+                ))
+
+    # Guards that drop each other when both match leave neither
+    def drops(guard: Dict[str, Any], rule: Dict[str, Any]) -> bool:
+        clause = guard["suppresses"]
+        return rule["authority"] in clause.get("authorities", []) or rule["id"] in clause.get("rule_ids", [])
+
+    # (authority, authority it suppresses) -> guards; guards of A dropping B
+    # and guards of B dropping A drop each other
+    guards_by_target: Dict[Tuple[str, str], List[int]] = {}
+    guard_ids: Dict[str, int] = {}
+    for g in guards:
+        for authority in dict.fromkeys(rules[g]["suppresses"].get("authorities", [])):
+            guards_by_target.setdefault((rules[g]["authority"], authority), []).append(g)
+        guard_ids.setdefault(rules[g]["id"], g)
+
+    contradictions: Set[Tuple[int, int]] = set()
+    for (authority, target), group in guards_by_target.items():
+        if authority == target:
+            contradictions.update(sweep.pairs(group))
+        elif authority < target and (target, authority) in guards_by_target:
+            contradictions.update(sweep.pairs(group, guards_by_target[(target, authority)]))
+    # Guards naming each other (or one naming the other's authority) by rule ID
+    for g in guards:
+        for rule_id in rules[g]["suppresses"].get("rule_ids", []):
+            h = guard_ids.get(rule_id)
+            if (h is not None and h != g and drops(rules[h], rules[g])
+                    and triggers_overlap(rules[g]["triggers"], rules[h]["triggers"])):
+                contradictions.add((min(g, h), max(g, h)))
+
+    for g, h in sorted({(min(pair), max(pair)) for pair in contradictions}, key=lambda pair: (pair[1], pair[0])):
+        issues.append(RuleIssue(
+            f"$[{h}].suppresses",
+            f"Contradictory guards: {rules[g]['id']} and {rules[h]['id']} suppress each other "
+            f"and can match together"
+        ))
+    if sweep.exhausted:
+        issues.append(RuleIssue(
+            "$", f"Stopped comparing triggers after {MAX_OVERLAP_CHECKS:,} checks; tier overlaps "
+                 f"and guard contradictions may be incomplete", "warning"
+        ))
+    return issues
+
+
+def validate_rulebook(data: Union[bytes, str, Any]) -> Tuple[Optional[List[Rule]], List[RuleIssue]]:
+    """
+    Validate a rulebook in one pass, collecting every issue.
+
+    Args:
+        data: requirements.json bytes/text, or the already parsed list
+
+    Returns:
+        Tuple of (rules, issues). rules is None when the rulebook is not
+        structurally valid; issues lists every error and warning with its
+        JSON path, in document order.
+    """
+    from_json = isinstance(data, (bytes, bytearray, str))
+    try:
+        if from_json:
+            rules = rulebook_adapter.validate_json(data)
+        else:
+            rules = rulebook_adapter.validate_python(data)
+        issues = _check_rules(rules, set())
+        issues.sort(key=lambda issue: -1 if issue.index is None else issue.index)
+        return rules, issues
+    except ValidationError as e:
+        errors = e.errors(include_url=False)
+
+    if errors and errors[0]["type"] == "json_invalid":
+        return None, [RuleIssue("$", errors[0]["msg"])]
+    issues = []
+    for error in errors:
+        if error["loc"][-2:-1] in (("min",), ("max",)) and error["loc"][-1] in ("int", "float"):
+            # One error per member of the Number union; report it once
+            if error["loc"][-1] == "float":
+                continue
+            error = dict(error, loc=error["loc"][:-1], msg="Input should be a number")
+        issues.append(RuleIssue(json_path(error["loc"]), _structural_message(error)))
+
+    # Still run the rulebook checks over the rules that are well-formed
+    parsed = json.loads(data) if from_json else data
+    if isinstance(parsed, list):
+        invalid = {error["loc"][0] for error in errors if error["loc"]}
+        issues.extend(_check_rules(parsed, invalid))
+    issues.sort(key=lambda issue: -1 if issue.index is None else issue.index)
+    return None, issues
+
+
+def check_rulebook(data: Union[bytes, str, Any]) -> List[Rule]:
+    """
+    Validate a rulebook and return its rules, logging any warnings.
+
+    Raises:
+        RulebookValidationError: If there is any error (a ValueError)
+    """
+    rules, issues = validate_rulebook(data)
+    warnings = [issue for issue in issues if issue.severity == "warning"]
+    if rules is None or len(warnings) < len(issues):
+        raise RulebookValidationError(issues)
+    for issue in warnings[:MAX_REPORTED_ISSUES]:
+        logger.warning(f"Rulebook: {issue}")
+    if len(warnings) > MAX_REPORTED_ISSUES:
+        logger.warning(f"Rulebook: {len(warnings) - MAX_REPORTED_ISSUES} more warnings")
+    return rules
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of concurrent async calls.
+
+Callers that ask for the same key while a call for it is in flight await that
+call's result instead of starting their own. The shared call runs as its own
+task, so a caller that is cancelled (e.g. a client disconnect) does not cancel
+the work the others are waiting for.
+
+The call can publish progress events (report sections); every caller passing
+`on_event` receives them, including the ones published before it joined.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+EventCallback = Callable[[Any], None]
+
+
+class _Flight:
+    """One in-flight call and the events it has published so far."""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.events: List[Any] = []
+        self.listeners: List[EventCallback] = []
+
+    def publish(self, event: Any) -> None:
+        self.events.append(event)
+        for listener in list(self.listeners):
+            listener(event)
+
+    def subscribe(self, listener: EventCallback) -> None:
+        for event in self.events:
+            listener(event)
+        self.listeners.append(listener)
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls that share a key into one execution."""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, call: Callable[[EventCallback], Awaitable[T]],
+                 on_event: Optional[EventCallback] = None) -> Tuple[T, bool]:
+        """
+        Run `call(publish)` once for all concurrent callers with `key`.
+
+        Args:
+            key: Identifies equivalent calls
+            call: Coroutine function; receives a `publish(event)` callback
+            on_event: Optional callback for the events the call publishes
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller
+            joined a call started by another one. Exceptions of the call are
+            raised to every caller.
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        shared = flight is not None and flight.task.get_loop() is loop and not flight.task.done()
+        if not shared:
+            flight = _Flight()
+            flight.task = loop.create_task(call(flight.publish))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+
+        if on_event is not None:
+            flight.subscribe(on_event)
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            if on_event is not None:
+                flight.listeners.remove(on_event)
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Mark the exception retrieved even if every caller was cancelled
+            flight.task.exception()
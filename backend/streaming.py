@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Streaming helpers for the bulk assessment endpoints.
+
+Request bodies may be a JSON array or NDJSON (one JSON object per line) and
+are decoded incrementally, one document at a time, so memory stays flat no
+matter how large the batch is.
+"""
+
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+from starlette.responses import StreamingResponse
+
+# Largest single JSON document we are willing to buffer while waiting for it
+# to complete; anything bigger is treated as a malformed body.
+MAX_DOCUMENT_CHARS = 1024 * 1024
+
+_WHITESPACE = " \t\r\n"
+
+
+class InvalidDocument(ValueError):
+    """An NDJSON line that is not exactly one JSON document."""
+
+
+async def iter_json_documents(chunks: AsyncIterator[bytes], ndjson: bool = False) -> AsyncIterator[Any]:
+    """
+    Incrementally decode a JSON array or an NDJSON stream.
+
+    NDJSON is decoded one line at a time and each line must hold exactly one
+    JSON document. A line that does not is yielded as an `InvalidDocument`
+    rather than raised, since the lines after it still decode.
+
+    Args:
+        chunks: Raw request body chunks (e.g. `request.stream()`)
+        ndjson: Treat the body as NDJSON even if it starts with "["
+            (e.g. for an `application/x-ndjson` request)
+
+    Yields:
+        Each top-level array element or NDJSON line, as soon as it is complete
+
+    Raises:
+        ValueError: If the body is not a JSON array or valid NDJSON
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    mode = "ndjson" if ndjson else None  # "array" or "ndjson"
+    closed = False
+    # Array mode: what may come next, "first" (element or "]"), "value" or "separator"
+    expecting = "first"
+
+    def drain(final: bool):
+        nonlocal buffer, mode, closed, expecting
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buffer):
+                break
+            if closed:
+                raise ValueError("Unexpected data after end of JSON array")
+
+            if mode is None:
+                if buffer[pos] == "[":
+                    mode = "array"
+                    pos += 1
+                    continue
+                mode = "ndjson"
+            if mode == "ndjson":
+                end = buffer.find("\n", pos)
+                if end < 0:
+                    if not final:
+                        if len(buffer) - pos > MAX_DOCUMENT_CHARS:
+                            raise ValueError("Batch item exceeds maximum size")
+                        break
+                    end = len(buffer)
+                line = buffer[pos:end]
+                pos = min(end + 1, len(buffer))
+                try:
+                    document = json.loads(line)
+                except json.JSONDecodeError as e:
+                    reason = "expected one JSON document per line" if e.msg == "Extra data" else e.msg
+                    yield InvalidDocument(f"Invalid JSON in batch body: {reason}")
+                    continue
+                yield document
+                continue
+            if mode == "array":
+                if buffer[pos] == ",":
+                    if expecting != "separator":
+                        raise ValueError("Invalid JSON in batch body: unexpected ',' in array")
+                    expecting = "value"
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    if expecting == "value":
+                        raise ValueError("Invalid JSON in batch body: trailing ',' in array")
+                    closed = True
+                    pos += 1
+                    continue
+                if expecting == "separator":
+                    raise ValueError("Invalid JSON in batch body: expected ',' between array elements")
+
+            try:
+                document, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if final:
+                    raise ValueError(f"Invalid JSON in batch body: {e.msg}")
+                if len(buffer) - pos > MAX_DOCUMENT_CHARS:
+                    raise ValueError("Batch item exceeds maximum size")
+                break
+            pos = end
+            expecting = "separator"
+            yield document
+
+        buffer = buffer[pos:]
+        if final and mode == "array" and not closed:
+            raise ValueError("Unterminated JSON array")
+
+    async for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        for document in drain(final=False):
+            yield document
+
+    buffer += utf8.decode(b"", final=True)
+    for document in drain(final=True):
+        yield document
+
+
+def ndjson_line(payload: Any) -> bytes:
+    """Serialize one NDJSON result line."""
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose generator may still be reading the request body.
+
+    Starlette's `StreamingResponse` listens for client disconnects by reading
+    from `receive` concurrently, which would swallow request body chunks the
+    generator has not consumed yet. Disconnects are instead surfaced through
+    `request.stream()` itself.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
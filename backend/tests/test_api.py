@@ -6,11 +6,12 @@ Test cases for FastAPI endpoints.
 import json
 import os
 import sys
+import time
 from fastapi.testclient import TestClient
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app import app
+from app import app, rule_store
 
 client = TestClient(app)
 
@@ -41,6 +42,41 @@ def test_requirements_endpoint():
             assert field in rule
 
 
+def test_requirements_compressed_with_etag():
+    """The rulebook is served gzip-encoded with a strong ETag; revalidation gets a 304."""
+    response = client.get("/requirements", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert "max-age" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    plain = client.get("/requirements", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != etag
+    assert plain.json() == response.json()
+
+    revalidated = client.get("/requirements", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+
+def test_requirements_filtered():
+    """Authority/priority filters return the matching subset in rulebook order."""
+    everything = client.get("/requirements").json()["requirements"]
+    authority = everything[0]["authority"]
+
+    data = client.get("/requirements", params={"authority": authority, "priority": "high"}).json()
+    expected = [rule for rule in everything if rule["authority"] == authority and rule["priority"] == "high"]
+    assert data["requirements"] == expected
+    assert data["count"] == len(expected)
+
+    assert client.get("/requirements", params={"authority": "Nobody"}).json() == {"requirements": [], "count": 0}
+    assert client.get("/requirements", params={"priority": "urgent"}).status_code == 422
+
+
 def test_assess_steakhouse():
     """Test /assess endpoint with steakhouse profile."""
     profile = {
@@ -150,12 +186,170 @@ def test_assess_large_hall():
     assert "R-Police-Exterior-Lighting" in matches
 
 
+def test_assess_batch_json_array():
+    """Test /assess/batch streams one NDJSON line per profile in a JSON array."""
+    profiles = [
+        {"size_m2": 120, "seats": 80, "serves_alcohol": True, "uses_gas": True,
+         "has_misting": False, "offers_delivery": False},
+        {"size_m2": 50, "seats": 100, "serves_alcohol": False, "uses_gas": False,
+         "has_misting": False, "offers_delivery": False}
+    ]
+
+    response = client.post("/assess/batch", json=profiles)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1]
+    for profile, line in zip(profiles, lines):
+        single = client.post("/assess", json=profile).json()
+        assert line["matches"] == single["matches"]
+        assert "report" not in line
+
+
+def test_assess_batch_ndjson_with_invalid_item():
+    """Test /assess/batch accepts NDJSON and reports bad items without stopping."""
+    body = "\n".join([
+        json.dumps({"size_m2": 20, "seats": 0, "serves_alcohol": False, "uses_gas": False,
+                    "has_misting": False, "offers_delivery": True}),
+        json.dumps({"size_m2": 100}),
+        json.dumps({"size_m2": 500, "seats": 350, "serves_alcohol": False, "uses_gas": True,
+                    "has_misting": False, "offers_delivery": False})
+    ]) + "\n"
+
+    response = client.post("/assess/batch", content=body,
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert "R-Police-Exemption-NoAlcohol-<=200" in lines[0]["matches"]
+    assert lines[1]["matches"] == [] and lines[1]["error"]
+    assert "R-Police-Exterior-Lighting" in lines[2]["matches"]
+
+
+def test_assess_batch_malformed_body():
+    """Test /assess/batch ends the stream with an error line on malformed JSON."""
+    response = client.post("/assess/batch", content='{"size_m2": 1}\n{"size_m2": \n',
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["index"] == 0 and lines[0]["matches"] == []
+    assert lines[1]["index"] == 1 and lines[1]["error"].startswith("Invalid JSON")
+
+
+def test_assess_batch_array_separators():
+    """Test /assess/batch requires exactly one comma between array elements."""
+    for body in ('[{"size_m2": 1} {"size_m2": 2}]', '[,{"size_m2": 1}]', '[{"size_m2": 1},,{"size_m2": 2}]',
+                 '[{"size_m2": 1},]', '[,]'):
+        response = client.post("/assess/batch", content=body, headers={"content-type": "application/json"})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[-1]["error"].startswith("Invalid JSON"), body
+
+    for body, count in (('[]', 0), (' [ {"size_m2": 1} ,\n {"size_m2": 2} ] ', 2)):
+        response = client.post("/assess/batch", content=body, headers={"content-type": "application/json"})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        # Each element is decoded and fails profile validation, not JSON parsing
+        assert [line["index"] for line in lines] == list(range(count))
+        assert all(isinstance(line["error"], list) for line in lines)
+
+
+def test_assess_batch_ndjson_one_document_per_line():
+    """Test /assess/batch rejects NDJSON lines holding more or less than one document, line by line."""
+    profile = json.dumps({"size_m2": 20, "seats": 0, "serves_alcohol": False, "uses_gas": False,
+                          "has_misting": False, "offers_delivery": True})
+    body = "\n".join([profile + profile, '{"size_m2": ', "", profile, "[" + profile + "]"])
+
+    response = client.post("/assess/batch", content=body,
+                           headers={"content-type": "application/x-ndjson; charset=utf-8"})
+    assert response.status_code == 200
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[0]["error"] == "Invalid JSON in batch body: expected one JSON document per line"
+    assert lines[1]["error"].startswith("Invalid JSON")
+    assert "R-Police-Exemption-NoAlcohol-<=200" in lines[2]["matches"]
+    # A JSON array on an NDJSON line is one (invalid) profile, not a batch
+    assert isinstance(lines[3]["error"], list)
+
+
+def test_assess_batch_missing_requirements(monkeypatch):
+    """Test /assess/batch reports a missing rulebook instead of failing the stream."""
+    def missing():
+        raise FileNotFoundError("requirements.json")
+
+    monkeypatch.setattr(rule_store, "get", missing)
+    response = client.post("/assess/batch", json=[{"size_m2": 1}])
+    assert response.status_code == 200
+    assert response.json() == {"results": [], "error": "Requirements file not found"}
+
+
+def wait_for_report(test_client, job_id, timeout=5.0):
+    """Poll a deferred report job until it finishes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = test_client.get(f"/reports/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Report job {job_id} did not finish")
+
+
+def test_assess_deferred_report(monkeypatch):
+    """Test /assess?report=deferred returns matches at once and the report later."""
+    monkeypatch.setenv("LLM_MOCK_MODE", "true")
+    profile = {
+        "size_m2": 120,
+        "seats": 80,
+        "serves_alcohol": True,
+        "uses_gas": True,
+        "has_misting": False,
+        "offers_delivery": False
+    }
+
+    with TestClient(app) as deferred_client:
+        response = deferred_client.post("/assess?report=deferred", json=profile)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert len(data["matches"]) > 0
+        assert data["report"] is None
+        job_id = data["report_job"]["id"]
+        assert data["report_job"]["url"] == f"/reports/{job_id}"
+
+        job = wait_for_report(deferred_client, job_id)
+        assert job["status"] == "done"
+        assert job["report"]["total_rules"] == len(data["matches"])
+
+        # SSE replays the finished job's events
+        events = deferred_client.get(f"/reports/{job_id}/events")
+        assert events.headers["content-type"].startswith("text/event-stream")
+        assert "event: report" in events.text
+        assert events.text.count("event: section") == len(job["report"]["sections"])
+        assert events.text.index("event: section") < events.text.index("event: report")
+
+
+def test_report_job_not_found():
+    """Test unknown report jobs return 404."""
+    assert client.get("/reports/does-not-exist").status_code == 404
+    assert client.get("/reports/does-not-exist/events").status_code == 404
+
+
 if __name__ == "__main__":
     test_health_endpoint()
     test_requirements_endpoint()
+    test_requirements_compressed_with_etag()
+    test_requirements_filtered()
     test_assess_steakhouse()
     test_assess_cafe_exempt()
     test_assess_ghost_kitchen()
     test_assess_invalid_data()
     test_assess_large_hall()
+    test_assess_batch_json_array()
+    test_assess_batch_ndjson_with_invalid_item()
+    test_assess_batch_ndjson_one_document_per_line()
+    test_assess_batch_malformed_body()
+    test_report_job_not_found()
     print("All API tests passed!")
\ No newline at end of file
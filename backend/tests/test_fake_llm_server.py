@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test cases for the real LLM network path against the local fake OpenAI server.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import openai
+import pytest
+import uvicorn
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts"))
+import llm
+from fake_openai_server import FakeLLMConfig, create_app, fake_completion_text
+from llm import call_llm, call_llm_async, validate_report_references
+from matching import match_rules
+from resilience import CircuitBreaker, RetryPolicy
+
+
+PROFILE = {
+    "size_m2": 120,
+    "seats": 80,
+    "serves_alcohol": True,
+    "uses_gas": True,
+    "has_misting": False,
+    "offers_delivery": False
+}
+
+
+def load_rules():
+    """Load rules from requirements.json."""
+    data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "requirements.json")
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@contextmanager
+def fake_llm_server(monkeypatch, config):
+    """Serve the fake API on a free local port and point the OpenAI clients at it."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    base_url = f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+    app = create_app(config)
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    deadline = time.time() + 5
+    while not server.started and time.time() < deadline:
+        time.sleep(0.01)
+
+    monkeypatch.setenv("LLM_MOCK_MODE", "false")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-fake-server")
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    # The module-level client does not add the trailing slash itself
+    monkeypatch.setattr(openai, "base_url", f"{base_url}/")
+    monkeypatch.setattr(openai, "max_retries", 0)
+    monkeypatch.setattr(llm, "_async_runtime", None)
+    monkeypatch.setattr(llm, "retry_policy", RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01))
+    monkeypatch.setattr(llm, "llm_breaker", CircuitBreaker(failure_threshold=5, reset_timeout=60))
+    try:
+        yield app.state.stats
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def test_fake_completion_text_follows_prompt():
+    """The fake answers with exactly the sections the prompt asks for."""
+    text = fake_completion_text("## Summary\n[...]\n\n## Israel Police Requirements\n[...]\n\n## Recommendations\n")
+    assert "## Israel Police Requirements" in text
+    assert "## Ministry of Health Requirements" not in text
+    assert fake_completion_text("Write the Israel Police section of ...\n- ID: R-1 | x").startswith("- R-1")
+
+
+def test_sync_and_streamed_reports_over_http(monkeypatch):
+    """call_llm and the streamed async path parse real wire responses."""
+    matched = match_rules(PROFILE, load_rules())
+    rule_ids = [rule["id"] for rule in matched]
+
+    with fake_llm_server(monkeypatch, FakeLLMConfig(latency="fixed:0.01", seed=1)) as stats:
+        report = call_llm(PROFILE, matched)
+        sections = []
+        streamed = asyncio.run(call_llm_async(PROFILE, matched, on_section=sections.append))
+
+    assert stats.requests == 2 and stats.streamed == 1
+    for generated in (report, streamed):
+        assert generated.summary.startswith("The business must satisfy")
+        assert generated.recommendations == ["Contact the authorities early", "Address high-priority items first"]
+        assert validate_report_references(generated, rule_ids)
+    assert streamed.sections == report.sections
+    assert sorted(section.title for section in sections) == sorted(section.title for section in report.sections)
+
+
+def test_upstream_errors_surface_as_runtime_errors(monkeypatch):
+    """Injected 500s are retried, then reach the caller as LLM integration failures."""
+    matched = match_rules(PROFILE, load_rules())
+
+    with fake_llm_server(monkeypatch, FakeLLMConfig(error_rate=1.0, error_codes=[500])) as stats:
+        with pytest.raises(RuntimeError, match="LLM API integration failed"):
+            call_llm(PROFILE, matched)
+
+    assert stats.errors == 3
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    """A 4xx other than 429 fails on the first attempt and leaves the breaker closed."""
+    matched = match_rules(PROFILE, load_rules())
+
+    with fake_llm_server(monkeypatch, FakeLLMConfig(error_rate=1.0, error_codes=[401])) as stats:
+        with pytest.raises(RuntimeError, match="LLM API integration failed"):
+            call_llm(PROFILE, matched)
+        assert llm.llm_breaker.state == "closed"
+
+    assert stats.errors == 1
+
+
+def test_open_breaker_serves_fallback_without_calling_upstream(monkeypatch):
+    """Once the breaker trips, reports come from the mock generator immediately."""
+    matched = match_rules(PROFILE, load_rules())
+
+    with fake_llm_server(monkeypatch, FakeLLMConfig(error_rate=1.0, error_codes=[503])) as stats:
+        monkeypatch.setattr(llm, "llm_breaker", CircuitBreaker(failure_threshold=3, reset_timeout=60))
+        with pytest.raises(RuntimeError, match="LLM API integration failed"):
+            call_llm(PROFILE, matched)
+        assert llm.llm_breaker.state == "open"
+
+        sections = []
+        fallback = call_llm(PROFILE, matched)
+        streamed = asyncio.run(call_llm_async(PROFILE, matched, on_section=sections.append))
+
+    assert stats.requests == 3
+    assert fallback == llm._generate_mock_report(PROFILE, matched)
+    assert streamed == fallback
+    assert len(sections) == len(fallback.sections)
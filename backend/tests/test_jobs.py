@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test cases for the deferred report job queue.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import jobs
+from jobs import DONE, ReportJobQueue
+
+
+def test_finished_jobs_are_pruned_oldest_first(monkeypatch):
+    """Expired jobs and the oldest finished jobs beyond capacity are dropped; running ones are kept."""
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    queue = ReportJobQueue(workers=1, retention_seconds=60, max_retained=3)
+    release = asyncio.Event()
+
+    async def report(job):
+        return {"id": job.id}
+
+    async def slow(job):
+        await release.wait()
+        return {}
+
+    async def run():
+        finished = []
+        for _ in range(3):
+            finished.append(queue.submit(report))
+            await queue._queue.join()
+            now[0] += 10
+        # The oldest finished job makes room for a fourth one
+        finished.append(queue.submit(report))
+        await queue._queue.join()
+        assert queue.get(finished[0].id) is None
+        assert all(queue.get(job.id).status == DONE for job in finished[1:])
+
+        # Retention expires finished jobs only
+        running = queue.submit(slow)
+        await asyncio.sleep(0)
+        now[0] += 1000
+        assert [queue.get(job.id) for job in finished] == [None] * 4
+        assert queue.get(running.id) is running
+        release.set()
+        await queue._queue.join()
+        assert queue.get(running.id).status == DONE
+        await queue.stop()
+
+    asyncio.run(run())
+
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Test cases for the async LLM path used by the API.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import llm
+from llm import ReportJSON, ReportStreamParser, _parse_llm_response, call_llm_async, validate_report_references
+from matching import match_rules
+from report_cache import ReportCache
+from resilience import CircuitBreaker
+
+
+PROFILE = {
+    "size_m2": 120,
+    "seats": 80,
+    "serves_alcohol": True,
+    "uses_gas": True,
+    "has_misting": False,
+    "offers_delivery": False
+}
+
+LLM_OUTPUT = """## Summary
+The restaurant needs Police, Health and Fire approvals before opening.
+
+## Israel Police Requirements
+- Install CCTV
+
+## Recommendations
+- Start with the Police chapter
+"""
+
+
+def load_rules():
+    """Load rules from requirements.json."""
+    data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "requirements.json")
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FakeCompletions:
+    """Async stand-in for `client.chat.completions` that tracks concurrency."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            return FakeStream(LLM_OUTPUT, chunk_size=7)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        message = SimpleNamespace(content=LLM_OUTPUT)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeStream:
+    """Async iterator of completion chunks, recording how far it was read."""
+
+    def __init__(self, text, chunk_size):
+        self.deltas = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self.consumed = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.consumed == len(self.deltas):
+            raise StopAsyncIteration
+        delta = self.deltas[self.consumed]
+        self.consumed += 1
+        await asyncio.sleep(0)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    async def close(self):
+        self.closed = True
+
+
+def install_fake_runtime(monkeypatch, completions, max_concurrency):
+    """Route the async path through a fake client on the running loop."""
+
+    def fake_runtime(api_key):
+        loop = asyncio.get_running_loop()
+        if llm._async_runtime is None or llm._async_runtime.loop is not loop:
+            llm._async_runtime = llm._AsyncRuntime(
+                loop=loop,
+                api_key=api_key,
+                client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+                semaphore=asyncio.Semaphore(max_concurrency),
+                timeout=5.0
+            )
+        return llm._async_runtime
+
+    monkeypatch.setenv("LLM_MOCK_MODE", "false")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test-async")
+    # Earlier failing network calls must not leave the breaker open
+    monkeypatch.setattr(llm, "llm_breaker", CircuitBreaker())
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setattr(llm, "_async_runtime", None)
+    monkeypatch.setattr(llm, "_get_async_runtime", fake_runtime)
+
+
+def test_async_calls_are_bounded_by_semaphore(monkeypatch):
+    """Concurrent assessments overlap but never exceed the concurrency limit."""
+    completions = FakeCompletions(delay=0.05)
+    install_fake_runtime(monkeypatch, completions, max_concurrency=3)
+    # Distinct size buckets, so no two requests are coalesced
+    profiles = [dict(PROFILE, size_m2=120 + 10 * i) for i in range(12)]
+    rules = load_rules()
+
+    async def run():
+        return await asyncio.gather(*(call_llm_async(profile, match_rules(profile, rules)) for profile in profiles))
+
+    reports = asyncio.run(run())
+
+    assert len(completions.calls) == 12
+    assert completions.max_in_flight == 3
+    assert all(call["timeout"] == 5.0 for call in completions.calls)
+    for profile, report in zip(profiles, reports):
+        assert isinstance(report, ReportJSON)
+        assert validate_report_references(report, [rule["id"] for rule in match_rules(profile, rules)])
+
+
+def test_async_mock_mode_skips_client(monkeypatch):
+    """Mock mode never touches the async client."""
+    monkeypatch.setenv("LLM_MOCK_MODE", "true")
+    monkeypatch.setattr(llm, "_get_async_runtime", lambda api_key: pytest.fail("client used in mock mode"))
+
+    matched = match_rules(PROFILE, load_rules())
+    report = asyncio.run(call_llm_async(PROFILE, matched))
+    assert report.total_rules == len(matched)
+
+
+def test_async_missing_api_key(monkeypatch):
+    """The async path fails the same way as call_llm without a key."""
+    monkeypatch.setenv("LLM_MOCK_MODE", "false")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY is required"):
+        asyncio.run(call_llm_async(PROFILE, []))
+
+
+def test_stream_parser_matches_full_parse():
+    """Any chunking of the stream yields the same report as the one-shot parser."""
+    matched = match_rules(PROFILE, load_rules())
+    outputs = [
+        LLM_OUTPUT,
+        "No headers at all, just a fairly long paragraph of plain text.\n- recommendation: none",
+        "## Israel Police Requirements\n- A\n## Israel Police Notes\n- B\n## Fire & Rescue Authority\n- C",
+        "Intro line\r\n## Summary\r\nShort.\r\n## Ministry of Health Requirements\r\n* Kitchen\r\n## Recommendations\r\n• Go",
+        ""
+    ]
+    for output in outputs:
+        expected = _parse_llm_response(output, matched)
+        for chunk_size in [1, 3, 16, len(output) + 1]:
+            parser = ReportStreamParser(matched)
+            emitted = []
+            for i in range(0, len(output), chunk_size):
+                emitted.extend(parser.feed(output[i:i + chunk_size]))
+            emitted.extend(parser.finish())
+
+            assert parser.report() == expected
+            assert sorted(section.title for section in emitted) == sorted(section.title for section in expected.sections)
+
+
+def test_streamed_sections_arrive_before_completion(monkeypatch):
+    """A section is handed over as soon as the next header closes it."""
+    completions = FakeCompletions(delay=0)
+    install_fake_runtime(monkeypatch, completions, max_concurrency=3)
+    matched = match_rules(PROFILE, load_rules())
+    received = []
+
+    def on_section(section):
+        stream = completions.last_stream
+        received.append((section.title, stream.consumed < len(stream.deltas)))
+
+    original_create = completions.create
+
+    async def create(**kwargs):
+        completions.last_stream = await original_create(**kwargs)
+        return completions.last_stream
+
+    completions.create = create
+    report = asyncio.run(call_llm_async(PROFILE, matched, on_section=on_section))
+
+    assert completions.calls[0]["stream"] is True
+    assert completions.last_stream.closed
+    assert report == _parse_llm_response(LLM_OUTPUT, matched)
+    assert ("Israel Police Requirements", True) in received
+    assert sorted(title for title, _ in received) == sorted(section.title for section in report.sections)
+
+
+class PromptAwareCompletions(FakeCompletions):
+    """Answers report, section and summary prompts with matching canned text."""
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        prompt = kwargs["messages"][-1]["content"]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if prompt.startswith("Write the "):
+            authority = prompt[len("Write the "):prompt.index(" section of")]
+            content = f"- {authority} bullet"
+        elif prompt.startswith("Generate a licensing report"):
+            requested = re.findall(r"^## (.+) Requirements$", prompt, re.M)
+            content = "## Summary\nFull report summary.\n\n"
+            content += "".join(f"## {authority} Requirements\n- {authority} bullet\n\n" for authority in requested)
+            content += "## Recommendations\n- Apply early"
+        else:
+            content = "## Summary\nFan-out summary.\n\n## Recommendations\n- Apply early"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_fanout_runs_sections_concurrently_and_caches_them(monkeypatch):
+    """One call per authority plus a summary, overlapping; sections are reused."""
+    completions = PromptAwareCompletions(delay=0.1)
+    install_fake_runtime(monkeypatch, completions, max_concurrency=10)
+    monkeypatch.setenv("LLM_FANOUT", "true")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.setattr(llm, "report_cache", ReportCache())
+    matched = match_rules(PROFILE, load_rules())
+    authorities = list(dict.fromkeys(rule["authority"] for rule in matched))
+    received = []
+
+    start = time.perf_counter()
+    report = asyncio.run(call_llm_async(PROFILE, matched, on_section=lambda section: received.append(section.title)))
+    elapsed = time.perf_counter() - start
+
+    assert len(completions.calls) == len(authorities) + 1
+    assert completions.max_in_flight == len(authorities) + 1
+    assert elapsed < 0.1 * len(completions.calls)
+    assert report.summary == "Fan-out summary."
+    assert report.recommendations == ["Apply early"]
+    assert [section.title for section in report.sections] == [f"{a} Requirements" for a in authorities]
+    assert report.sections[0].content == f"## {authorities[0]} Requirements\n- {authorities[0]} bullet"
+    assert sorted(received) == sorted(section.title for section in report.sections)
+    assert validate_report_references(report, [rule["id"] for rule in matched])
+
+    # A different profile with the same matches only needs a new summary
+    completions.calls.clear()
+    other = dict(PROFILE, size_m2=PROFILE["size_m2"] + 50)
+    assert match_rules(other, load_rules()) == matched
+    again = asyncio.run(call_llm_async(other, matched))
+    assert len(completions.calls) == 1
+    assert again.sections == report.sections
+
+
+def test_report_reuses_cached_sections_across_profiles(monkeypatch):
+    """A profile differing in one flag only asks the LLM for the changed section."""
+    completions = PromptAwareCompletions(delay=0)
+    install_fake_runtime(monkeypatch, completions, max_concurrency=10)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.setattr(llm, "report_cache", ReportCache())
+    rules = load_rules()
+
+    dry = dict(PROFILE, has_misting=False)
+    first = asyncio.run(call_llm_async(dry, match_rules(dry, rules)))
+    assert len(completions.calls) == 1
+    assert "## Ministry of Health Requirements" in completions.calls[0]["messages"][-1]["content"]
+
+    misting = dict(PROFILE, has_misting=True)
+    matched = match_rules(misting, rules)
+    second = asyncio.run(call_llm_async(misting, matched))
+    prompt = completions.calls[1]["messages"][-1]["content"]
+    requested = re.findall(r"^## (.+) Requirements$", prompt, re.M)
+
+    # Only Health gained a rule, so only its section is generated
+    assert requested == ["Ministry of Health"]
+    assert completions.calls[1]["max_tokens"] < completions.calls[0]["max_tokens"]
+    assert second.summary == "Full report summary."
+    unchanged = [section for section in first.sections if section.title != "Ministry of Health Requirements"]
+    assert unchanged and all(section in second.sections for section in unchanged)
+    health = next(section for section in second.sections if section.title == "Ministry of Health Requirements")
+    assert health.rule_ids == [rule["id"] for rule in matched if rule["authority"] == "Ministry of Health"]
+    assert validate_report_references(second, [rule["id"] for rule in matched])
+
+
+def test_equivalent_concurrent_requests_share_one_call(monkeypatch):
+    """Requests with the same report key await a single in-flight completion."""
+    completions = FakeCompletions(delay=0.05)
+    install_fake_runtime(monkeypatch, completions, max_concurrency=10)
+    rules = load_rules()
+    # Same size bucket as PROFILE, so an equivalent report
+    equivalent = dict(PROFILE, size_m2=125)
+    other = dict(PROFILE, serves_alcohol=False)
+
+    async def run():
+        return await asyncio.gather(
+            *(call_llm_async(PROFILE, match_rules(PROFILE, rules)) for _ in range(5)),
+            call_llm_async(equivalent, match_rules(equivalent, rules)),
+            call_llm_async(other, match_rules(other, rules))
+        )
+
+    reports = asyncio.run(run())
+
+    assert len(completions.calls) == 2
+    assert all(report == reports[0] for report in reports[:6])
+    assert len(llm.report_flights) == 0
+
+
+def test_coalesced_streaming_callers_all_receive_sections(monkeypatch):
+    """Followers get the sections the shared stream produced, before and after they joined."""
+    completions = FakeCompletions(delay=0)
+    install_fake_runtime(monkeypatch, completions, max_concurrency=10)
+    matched = match_rules(PROFILE, load_rules())
+    received = {name: [] for name in ("leader", "follower", "plain")}
+
+    async def run():
+        leader = asyncio.ensure_future(call_llm_async(PROFILE, matched, on_section=received["leader"].append))
+        # Join mid-stream, after the first section has been emitted
+        while not received["leader"]:
+            await asyncio.sleep(0)
+        return await asyncio.gather(
+            leader,
+            call_llm_async(PROFILE, matched, on_section=received["follower"].append),
+            call_llm_async(PROFILE, matched)
+        )
+
+    reports = asyncio.run(run())
+
+    assert len(completions.calls) == 1 and completions.calls[0]["stream"] is True
+    assert reports[0] == reports[1] == reports[2]
+    titles = sorted(section.title for section in reports[0].sections)
+    assert sorted(section.title for section in received["leader"]) == titles
+    assert sorted(section.title for section in received["follower"]) == titles
+
+
+def test_failed_generation_is_not_shared_with_later_requests(monkeypatch):
+    """Every waiter sees the failure; the next request starts a fresh call."""
+    completions = FakeCompletions(delay=0.02)
+    install_fake_runtime(monkeypatch, completions, max_concurrency=10)
+    monkeypatch.setattr(llm, "retry_policy", llm.RetryPolicy(max_attempts=1))
+    matched = match_rules(PROFILE, load_rules())
+    original_create = completions.create
+
+    async def failing_create(**kwargs):
+        completions.calls.append(kwargs)
+        await asyncio.sleep(0.02)
+        raise ValueError("bad request")
+
+    completions.create = failing_create
+
+    async def run():
+        return await asyncio.gather(*(call_llm_async(PROFILE, matched) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert len(completions.calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    completions.create = original_create
+    assert isinstance(asyncio.run(call_llm_async(PROFILE, matched)), ReportJSON)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test cases for the single-pass LLM report parser.
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm import DEFAULT_RECOMMENDATIONS, AuthorityAliases, _parse_llm_response
+
+
+AUTHORITIES = ["Israel Police", "Ministry of Health", "Fire & Rescue Authority"]
+
+
+def make_rules(authorities):
+    """One high-priority rule per authority."""
+    return [
+        {
+            "id": f"R-{i}",
+            "title": f"Rule {i}",
+            "desc_en": f"Requirement {i}",
+            "desc_he": f"דרישה {i}",
+            "authority": authority,
+            "priority": "high" if i % 2 == 0 else "low"
+        }
+        for i, authority in enumerate(authorities)
+    ]
+
+
+def test_alias_matching_normalizes_headers():
+    """Case, '&' vs 'and' and run-together names all resolve to the authority."""
+    aliases = AuthorityAliases(tuple(AUTHORITIES))
+
+    assert aliases.find("## ISRAEL POLICE requirements") == ["Israel Police"]
+    assert aliases.find("## Fire and Rescue Authority") == ["Fire & Rescue Authority"]
+    assert aliases.find("## FireAndRescueAuthority:") == ["Fire & Rescue Authority"]
+    assert aliases.find("## Ministry of Health / Israel Police") == ["Ministry of Health", "Israel Police"]
+    assert aliases.find("## Fire Safety") == []
+
+
+def test_parse_sections_summary_and_recommendations():
+    """One pass fills every section, the summary and the recommendations."""
+    rules = make_rules(AUTHORITIES)
+    output = """## Summary
+Three authorities are involved.
+
+## Israel Police Requirements
+- CCTV
+
+- Guard at entrance
+## Fire and Rescue Authority Requirements
+* Extinguishers
+## Recommendations
+- Start with the Police
+• Book a fire inspection
+"""
+    report = _parse_llm_response(output, rules)
+
+    assert report.summary == "Three authorities are involved."
+    assert report.recommendations == ["Start with the Police", "Book a fire inspection"]
+    assert [section.title for section in report.sections] == [f"{a} Requirements" for a in AUTHORITIES]
+
+    police, health, fire = report.sections
+    assert police.content == "## Israel Police Requirements\n- CCTV\n- Guard at entrance"
+    assert police.priority == "high"
+    assert fire.content == "## Fire and Rescue Authority Requirements\n* Extinguishers"
+    # The model skipped Health, so its section is built from the rules
+    assert health.content.startswith("Requirements from Ministry of Health:")
+    assert health.rule_ids == ["R-1"]
+    assert health.priority == "medium"
+
+
+def test_parse_fallbacks_for_unstructured_output():
+    """Without headers the summary comes from the leading lines and defaults fill the rest."""
+    rules = make_rules(AUTHORITIES)
+
+    report = _parse_llm_response("", rules)
+    assert report.summary.startswith("Business licensing assessment identified 3 requirements")
+    assert report.recommendations == DEFAULT_RECOMMENDATIONS
+
+    report = _parse_llm_response("short\nThis business needs three separate licensing approvals.\n", rules)
+    assert report.summary == "This business needs three separate licensing approvals."
+
+
+def test_parse_cost_independent_of_authority_count():
+    """Micro-benchmark: 100x more authorities barely changes the parse time."""
+    output = "## Summary\nA summary line for the benchmark report.\n"
+    for authority in AUTHORITIES:
+        output += f"## {authority} Requirements\n" + "- a requirement line for this authority\n" * 1500
+    output += "## Recommendations\n- Apply early\n"
+
+    def best_time(rules):
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            _parse_llm_response(output, rules)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    few = best_time(make_rules(AUTHORITIES))
+    many = best_time(make_rules(AUTHORITIES + [f"Municipal Department {i}" for i in range(297)]))
+
+    # The old per-authority rescans were ~80x slower here
+    assert many < few * 3, f"3 authorities: {few:.4f}s, 300 authorities: {many:.4f}s"
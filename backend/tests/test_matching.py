@@ -5,11 +5,16 @@ Test cases for the matching engine.
 
 import json
 import os
+import random
 import sys
+import tracemalloc
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from matching import match_rules
+from matching import BoundIndex, ProfileTable, build_profile_table, compile_rules, match_rules, match_rules_batch
+
+FLAGS = ["serves_alcohol", "uses_gas", "has_misting", "offers_delivery"]
+AUTHORITIES = ["Israel Police", "Ministry of Health", "Fire & Rescue Authority"]
 
 
 def get_ids(rules):
@@ -153,10 +158,185 @@ def test_edge_thresholds():
     assert "R-MoH-Food-Temps" in ids
 
 
+def test_declarative_guard_suppression():
+    """A matched guard drops the rules named in its `suppresses` clause."""
+    rules = [
+        {"id": "R-Guard", "authority": "Ministry of Health", "priority": "high",
+         "triggers": {"flags": {"uses_gas": False}},
+         "suppresses": {"authorities": ["Fire & Rescue Authority"], "rule_ids": ["R-Health-Gas"]}},
+        {"id": "R-Fire-General", "authority": "Fire & Rescue Authority", "priority": "high", "triggers": {}},
+        {"id": "R-Health-Gas", "authority": "Ministry of Health", "priority": "low", "triggers": {}},
+        {"id": "R-Health-General", "authority": "Ministry of Health", "priority": "medium", "triggers": {}}
+    ]
+    profile = {"size_m2": 80, "seats": 20, "serves_alcohol": False, "uses_gas": False,
+               "has_misting": False, "offers_delivery": False}
+
+    for ruleset in (rules, compile_rules(rules)):
+        assert get_ids(match_rules(profile, ruleset)) == ["R-Guard", "R-Health-General"]
+        assert get_ids(match_rules(dict(profile, uses_gas=True), ruleset)) == [
+            "R-Fire-General", "R-Health-General", "R-Health-Gas"
+        ]
+
+
+def random_profile(rng):
+    """Random business profile covering the trigger boundaries."""
+    profile = {"size_m2": rng.randint(0, 600), "seats": rng.randint(0, 400)}
+    for flag in FLAGS:
+        profile[flag] = rng.random() < 0.5
+    return profile
+
+
+def random_rulebook(rng, count):
+    """Synthetic rulebook with mixed open/closed bounds and flags."""
+    rules = []
+    for i in range(count):
+        triggers = {}
+        for trigger, top in (("area", 600), ("seats", 400)):
+            bounds = {}
+            if rng.random() < 0.5:
+                bounds["min"] = rng.randint(0, top)
+            if rng.random() < 0.5:
+                bounds["max"] = rng.randint(bounds.get("min", 0), top)
+            if bounds or rng.random() < 0.2:
+                triggers[trigger] = bounds
+        flags = {flag: rng.random() < 0.5 for flag in FLAGS if rng.random() < 0.3}
+        if flags:
+            triggers["flags"] = flags
+        rule = {
+            "id": f"R-Synthetic-{i}",
+            "title": f"Synthetic rule {i}",
+            "authority": rng.choice(AUTHORITIES),
+            "priority": rng.choice(["high", "medium", "low"]),
+            "triggers": triggers
+        }
+        if rng.random() < 0.02:
+            rule["suppresses"] = {"authorities": [rng.choice(AUTHORITIES)]}
+        elif rng.random() < 0.02:
+            rule["suppresses"] = {"rule_ids": [f"R-Synthetic-{rng.randrange(count)}" for _ in range(5)]}
+        rules.append(rule)
+    return rules
+
+
+def test_compiled_matches_linear_scan():
+    """Compiled index returns exactly the same ordered results as the linear scan."""
+    rng = random.Random(42)
+    rules = load_rules()
+    compiled = compile_rules(rules)
+
+    for _ in range(500):
+        profile = random_profile(rng)
+        assert get_ids(match_rules(profile, compiled)) == get_ids(match_rules(profile, rules))
+
+    synthetic = random_rulebook(rng, 2000)
+    compiled = compile_rules(synthetic)
+    for _ in range(200):
+        profile = random_profile(rng)
+        assert get_ids(match_rules(profile, compiled)) == get_ids(match_rules(profile, synthetic))
+
+
+def test_bound_index_is_linear_in_rules():
+    """A 50k-rule index stays a few MB and agrees with a direct bounds check."""
+    rng = random.Random(5)
+    rules = random_rulebook(rng, 50_000)
+
+    tracemalloc.start()
+    try:
+        index = BoundIndex("area", rules)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Full-width prefix/suffix masks would need ~300 MB here
+    assert peak < 16 * 1024 * 1024
+
+    for value in (0, 0.5, 150, 300, 599.5, 600, 10 ** 6):
+        expected = sum(
+            1 << i for i, rule in enumerate(rules)
+            if rule["triggers"].get("area", {}).get("min", value) <= value
+            <= rule["triggers"].get("area", {}).get("max", value)
+        )
+        assert index.mask(value) == expected
+
+
+def test_batch_matches_single_profile():
+    """Vectorized batch matching agrees with match_rules row by row."""
+    rng = random.Random(7)
+    profiles = [random_profile(rng) for _ in range(300)]
+
+    for rules in (load_rules(), random_rulebook(rng, 500)):
+        batch = match_rules_batch(profiles, compile_rules(rules), chunk_size=64)
+        assert len(batch) == len(profiles)
+        for profile, matches in zip(profiles, batch):
+            assert get_ids(matches) == get_ids(match_rules(profile, rules))
+
+
+def test_batch_matches_single_profile_for_non_boolean_flags():
+    """Flag values like 1, "yes" or None compare the same way in both paths."""
+    rng = random.Random(13)
+    profiles = []
+    for _ in range(200):
+        profile = random_profile(rng)
+        for flag in FLAGS:
+            profile[flag] = rng.choice([True, False, 1, 0, 1.0, "yes", "", None])
+        profiles.append(profile)
+
+    for rules in (load_rules(), random_rulebook(rng, 200)):
+        for ruleset in (rules, compile_rules(rules)):
+            batch = match_rules_batch(profiles, ruleset)
+            for profile, matches in zip(profiles, batch):
+                assert get_ids(matches) == get_ids(match_rules(profile, rules))
+
+
+def test_profile_table_matches_linear_scan():
+    """Every profile class resolves to the same ordered matches, endpoints included."""
+    rng = random.Random(11)
+    for rules in (load_rules(), random_rulebook(rng, 60)):
+        table = ProfileTable(compile_rules(rules))
+        values = {"size_m2": [0, 0.5, 10 ** 6], "seats": [0, 0.5, 10 ** 6]}
+        for point in table.area_points:
+            values["size_m2"] += [point - 1, point, point + 0.5]
+        for point in table.seats_points:
+            values["seats"] += [point - 1, point, point + 0.5]
+
+        for _ in range(2000):
+            profile = random_profile(rng)
+            profile["size_m2"] = rng.choice(values["size_m2"])
+            profile["seats"] = rng.choice(values["seats"])
+            assert get_ids(match_rules(profile, table)) == get_ids(match_rules(profile, rules))
+
+
+def test_profile_table_is_compact():
+    """The real rulebook collapses to a few dozen outcomes; oversized tables are skipped."""
+    compiled = compile_rules(load_rules())
+    table = build_profile_table(compiled)
+
+    assert len(table.outcomes) <= len(table) <= 2 ** 4 * (2 * len(table.seats_points) + 1) * (2 * len(table.area_points) + 1)
+    assert len({tuple(ids) for ids in table.outcome_ids}) == len(table.outcomes)
+    assert all(cls["matches"] == list(table.outcome_ids[cls["outcome"]]) for cls in table.classes())
+    assert build_profile_table(compiled, max_cells=len(table) - 1) is None
+
+
+def test_profile_table_falls_back_for_non_boolean_flags():
+    """Flag values outside True/False are matched by the compiled rules."""
+    rules = load_rules()
+    table = ProfileTable(compile_rules(rules))
+    profile = {"size_m2": 50, "seats": 10, "serves_alcohol": 1, "uses_gas": None}
+
+    assert table.lookup(profile) is None
+    assert get_ids(match_rules(profile, table)) == get_ids(match_rules(profile, rules))
+
+
 if __name__ == "__main__":
     test_cafe_exempt()
     test_steakhouse()
     test_ghost_kitchen()
     test_large_hall()
     test_edge_thresholds()
+    test_declarative_guard_suppression()
+    test_compiled_matches_linear_scan()
+    test_bound_index_is_linear_in_rules()
+    test_batch_matches_single_profile()
+    test_batch_matches_single_profile_for_non_boolean_flags()
+    test_profile_table_matches_linear_scan()
+    test_profile_table_is_compact()
+    test_profile_table_falls_back_for_non_boolean_flags()
     print("All tests passed!")
\ No newline at end of file
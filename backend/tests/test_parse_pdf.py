@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test cases for clause segmentation and page extraction in the PDF ingestion script.
+"""
+
+import json
+import os
+import sys
+
+# Add scripts directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts"))
+import parse_pdf
+from parse_pdf import clause_to_rule, iter_pages, segment_clauses, to_logical, write_rules_jsonl
+
+# Two pages in visual order, as pdfplumber extracts them from the source PDF
+PAGES = [
+    "\n".join([
+        "לארשי תרטשמ - 3 קרפ",
+        "תופסונ תוארוה .3.2",
+        "תושירדהמ רוטפ םירכשמ תואקשמ לש הכירצו השגה ,הריכמ אלל הבישי תומוקמ 200 דע קסע .3.2.2",
+        ".הז טירפב תועיפומה",
+        "ןוישירה תלבקל םיאנתה",
+        "(ס\"מט) רוגס לגעמב היזיוולט תומלצמ .3.3",
+        "הטלקה .3.3.4",
+        ".המוליצ דעוממ תוחפל םוי 14 ךשמל רמשית הטלקהה (1)",
+        "6",
+    ]),
+    "\n".join([
+        ".הטלקהב הייפצ רשפאמה ךסמ רבוחי הטלקהה תכרעמל (2)",
+        "תואירבה דרשמ - 4 קרפ",
+        ".םיאנת .4.1",
+        "7",
+    ]),
+]
+
+
+def write_pdf(path, page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects),))
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def test_to_logical_keeps_numbers_and_latin_runs():
+    """Hebrew is reversed, numbers and Latin words keep their order, brackets mirror."""
+    assert to_logical("תופסונ תוארוה .3.2") == "3.2. הוראות נוספות"
+    assert to_logical(".FPS 25-מ התוחפ היהת אל") == "לא תהיה פחותה מ-25 FPS."
+    assert to_logical(".הטלקהה (1)") == "(1) ההקלטה."
+    assert to_logical("DISK ON KEY") == "DISK ON KEY"
+
+
+def test_segment_clauses_across_pages():
+    """Clauses carry their number, page and chapter authority; headings are dropped."""
+    clauses = {clause["number"]: clause for clause in segment_clauses(PAGES)}
+
+    assert list(clauses) == ["3.2.2", "3.3.4", "4.1"]
+    assert clauses["3.2.2"]["text"] == (
+        "עסק עד 200 מקומות ישיבה ללא מכירה, הגשה וצריכה של משקאות משכרים פטור מהדרישות "
+        "המופיעות בפריט זה."
+    )
+    assert clauses["3.3.4"]["text"].split("\n") == [
+        "הקלטה",
+        "(1) ההקלטה תישמר למשך 14 יום לפחות ממועד צילומה.",
+        "(2) למערכת ההקלטה יחובר מסך המאפשר צפייה בהקלטה.",
+    ]
+    assert clauses["3.3.4"]["page"] == 1
+    assert clauses["3.3.4"]["authority"] == "Israel Police"
+    assert clauses["4.1"]["authority"] == "Ministry of Health"
+
+    rule = clause_to_rule(clauses["3.2.2"])
+    assert rule["id"] == "PDF-3.2.2"
+    assert rule["source_ref"] == "§3.2.2"
+
+
+def test_iter_pages_is_lazy(tmp_path, monkeypatch):
+    """Pages are read one at a time as the consumer asks for them."""
+    pdf_path = str(tmp_path / "rules.pdf")
+    write_pdf(pdf_path, ["Page one", "Page two", "Page three"])
+    fingerprinted = []
+    fingerprint = parse_pdf.page_fingerprint
+    monkeypatch.setattr(parse_pdf, "page_fingerprint",
+                        lambda page: fingerprinted.append(page.page_number) or fingerprint(page))
+
+    pages = iter_pages(pdf_path, cache_dir=None, workers=1)
+    assert fingerprinted == []
+    assert next(pages) == "Page one"
+    assert fingerprinted == [1]
+    assert next(pages) == "Page two"
+    assert fingerprinted == [1, 2]
+    assert list(pages) == ["Page three"]
+
+
+def test_page_cache_reuses_unchanged_pages(tmp_path):
+    """A warm run reads every page from the cache; an edited page alone is re-extracted."""
+    pdf_path = str(tmp_path / "rules.pdf")
+    cache_dir = str(tmp_path / "cache")
+    write_pdf(pdf_path, ["Page one", "Page two", "Page three"])
+
+    def run(workers=1):
+        stats = {}
+        return list(iter_pages(pdf_path, cache_dir=cache_dir, workers=workers, stats=stats)), stats
+
+    assert run() == (["Page one", "Page two", "Page three"], {"cached": 0, "extracted": 3})
+    assert len(os.listdir(cache_dir)) == 3
+    assert run() == (["Page one", "Page two", "Page three"], {"cached": 3, "extracted": 0})
+
+    write_pdf(pdf_path, ["Page one", "Page two, revised", "Page three"])
+    assert run() == (["Page one", "Page two, revised", "Page three"], {"cached": 2, "extracted": 1})
+    assert run(workers=2) == (["Page one", "Page two, revised", "Page three"], {"cached": 3, "extracted": 0})
+
+
+def test_pool_extraction_matches_serial(tmp_path):
+    """Extracting in a process pool yields the same pages, in order, as extracting inline."""
+    pdf_path = str(tmp_path / "rules.pdf")
+    write_pdf(pdf_path, [f"Clause {i}" for i in range(1, 8)])
+    serial = list(iter_pages(pdf_path, cache_dir=None, workers=1))
+    stats = {}
+    assert list(iter_pages(pdf_path, cache_dir=None, workers=2, stats=stats)) == serial
+    assert serial == [f"Clause {i}" for i in range(1, 8)]
+    assert stats == {"cached": 0, "extracted": 7}
+
+    # Pool output fills the cache with the same text a serial run reads back
+    cache_dir = str(tmp_path / "cache")
+    list(iter_pages(pdf_path, cache_dir=cache_dir, workers=2))
+    stats = {}
+    assert list(iter_pages(pdf_path, cache_dir=cache_dir, workers=1, stats=stats)) == serial
+    assert stats == {"cached": 7, "extracted": 0}
+
+
+def test_write_rules_jsonl_round_trips(tmp_path):
+    """One JSON object per line, written from a generator, reading back unchanged."""
+    clauses = list(segment_clauses(PAGES))
+    path = str(tmp_path / "rules.jsonl")
+    assert write_rules_jsonl((clause_to_rule(clause) for clause in clauses), path) == 3
+
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    lines = text.split("\n")
+    assert lines[-1] == "" and len(lines) == 4
+    assert [json.loads(line) for line in lines[:-1]] == [clause_to_rule(clause) for clause in clauses]
+    # Hebrew is written as-is, not as \u escapes
+    assert "הקלטה" in text
+    assert write_rules_jsonl([], path) == 0
+    assert os.path.getsize(path) == 0
+
+
+if __name__ == "__main__":
+    test_to_logical_keeps_numbers_and_latin_runs()
+    test_segment_clauses_across_pages()
+    print("All parse_pdf tests passed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test cases for prompt compression and token budgeting.
+"""
+
+import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm import SYSTEM_PROMPT, _completion_tokens, _count_tokens, _create_llm_prompt
+from matching import match_rules
+from prompt_budget import completion_tokens, compress_rules, count_tokens
+
+
+PROFILE = {
+    "size_m2": 300,
+    "seats": 250,
+    "serves_alcohol": True,
+    "uses_gas": True,
+    "has_misting": True,
+    "offers_delivery": True
+}
+
+
+def load_rules():
+    """Load rules from requirements.json."""
+    data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "requirements.json")
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_prompt_stays_within_budget(monkeypatch):
+    """Shrinking the budget drops descriptions but never rule IDs or titles."""
+    matched = match_rules(PROFILE, load_rules())
+
+    full = _create_llm_prompt(PROFILE, matched)
+    for rule in matched:
+        assert rule["desc_en"] in full
+
+    monkeypatch.setenv("LLM_PROMPT_TOKENS", "900")
+    compact = _create_llm_prompt(PROFILE, matched)
+    assert _count_tokens(SYSTEM_PROMPT) + _count_tokens(compact) <= 900
+    assert _count_tokens(compact) < _count_tokens(full)
+    for rule in matched:
+        assert rule["id"] in compact
+        assert rule["title"] in compact
+    # Only the matched authorities get a section template
+    assert compact.count("## ") == 2 + len({rule["authority"] for rule in matched})
+
+
+def test_low_priority_detail_dropped_first():
+    """Hebrew text of low-priority rules goes before anything of high-priority rules."""
+    rules = [
+        {"id": "R-High", "authority": "Ministry of Health", "priority": "high", "title": "High",
+         "desc_en": "Keep food hot.", "desc_he": "לשמור על מזון חם."},
+        {"id": "R-Low", "authority": "Ministry of Health", "priority": "low", "title": "Low",
+         "desc_en": "Post a sign.", "desc_he": "לתלות שלט בכניסה לעסק."}
+    ]
+    _, full_tokens = compress_rules(rules, budget=10000)
+
+    text, tokens = compress_rules(rules, budget=full_tokens - 1)
+    assert tokens < full_tokens
+    assert "לשמור על מזון חם." in text
+    assert "לתלות שלט" not in text
+    assert "Post a sign." in text
+
+    text, _ = compress_rules(rules, budget=0)
+    assert "R-High" in text and "R-Low" in text
+    assert "EN:" not in text and "HE:" not in text
+
+
+def test_repeated_sentences_written_once_per_authority():
+    """Boilerplate shared by an authority's rules is rendered once."""
+    boilerplate = "Follow the Ministry of Health guidance."
+    rules = [
+        {"id": f"R-{i}", "authority": authority, "priority": "high", "title": f"Rule {i}",
+         "desc_en": f"Requirement number {i}. {boilerplate}", "desc_he": ""}
+        for i, authority in enumerate(["Ministry of Health", "Ministry of Health", "Israel Police"])
+    ]
+    text, _ = compress_rules(rules, budget=10000)
+
+    assert text.count(boilerplate) == 2
+    assert "Requirement number 1." in text
+    assert "HE:" not in text
+
+
+def test_completion_tokens_follow_section_count():
+    """max_tokens grows with the sections to write and respects the cap."""
+    assert completion_tokens(1, cap=2000) < completion_tokens(3, cap=2000)
+    assert completion_tokens(20, cap=2000) == 2000
+
+    matched = match_rules(PROFILE, load_rules())
+    authorities = len({rule["authority"] for rule in matched})
+    assert _completion_tokens(matched) == completion_tokens(authorities, cap=2000)
+    assert count_tokens("שלום") > 0
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Test cases for the content-addressed report cache.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import llm
+from llm import call_llm, invalidate_cached_reports, report_cache_key, _generate_mock_report
+from matching import match_rules
+from report_cache import ReportCache
+
+
+PROFILE = {
+    "size_m2": 120,
+    "seats": 80,
+    "serves_alcohol": True,
+    "uses_gas": True,
+    "has_misting": False,
+    "offers_delivery": False
+}
+
+
+def load_rules():
+    """Load rules from requirements.json."""
+    data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "requirements.json")
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction():
+    """Least recently used entries are evicted first."""
+    cache = ReportCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are not served."""
+    clock = FakeClock()
+    cache = ReportCache(ttl_seconds=60, clock=clock)
+    cache.set("a", "1")
+
+    clock.now += 59
+    assert cache.get("a") == "1"
+    clock.now += 2
+    assert cache.get("a") is None
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    """The optional disk tier serves entries to a fresh cache instance."""
+    db_path = str(tmp_path / "reports.sqlite")
+    ReportCache(db_path=db_path).set("a", "1")
+
+    restarted = ReportCache(db_path=db_path)
+    assert len(restarted) == 0
+    assert restarted.get("a") == "1"
+    assert len(restarted) == 1
+
+
+def test_disk_tier_is_bounded(tmp_path, monkeypatch):
+    """Expired rows and the oldest rows beyond max_disk_entries are purged from disk."""
+    import report_cache
+    monkeypatch.setattr(report_cache, "PURGE_INTERVAL", 1)
+    clock = FakeClock()
+    db_path = str(tmp_path / "reports.sqlite")
+    cache = ReportCache(ttl_seconds=60, db_path=db_path, clock=clock, max_disk_entries=2)
+    cache.set("old", "0", tags=["rule:R-1"])
+    clock.now += 61
+    for key in ("a", "b", "c"):
+        cache.set(key, key, tags=["rule:R-1"])
+        clock.now += 1
+
+    db = cache._db
+    assert [key for (key,) in db.execute("SELECT key FROM reports ORDER BY created")] == ["b", "c"]
+    assert {key for (key,) in db.execute("SELECT key FROM report_tags")} == {"b", "c"}
+
+
+def test_disk_read_errors_are_misses(tmp_path):
+    """A failing disk tier makes lookups miss instead of raising."""
+    cache = ReportCache(db_path=str(tmp_path / "reports.sqlite"))
+    cache.set("a", "1")
+    cache._entries.clear()
+    cache._db.close()
+    assert cache.get("a") is None
+
+
+def test_async_disk_tier_runs_off_the_loop(tmp_path, monkeypatch):
+    """aget/aset keep SQLite I/O on a worker thread; memory hits stay on the loop."""
+    db_path = str(tmp_path / "reports.sqlite")
+    cache = ReportCache(db_path=db_path)
+    disk_threads = []
+    for name in ("_get_disk", "_set_disk"):
+        method = getattr(cache, name)
+
+        def record(*args, method=method):
+            disk_threads.append(threading.current_thread())
+            return method(*args)
+        monkeypatch.setattr(cache, name, record)
+
+    async def run():
+        await cache.aset("a", "1", tags=["rule:R-1"])
+        cache._entries.clear()
+        assert await cache.aget("a") == "1"
+        assert await cache.aget("a") == "1"
+        assert await cache.aget("missing") is None
+
+    asyncio.run(run())
+    # One write and two disk reads; the second "a" lookup hits memory
+    assert len(disk_threads) == 3
+    assert threading.main_thread() not in disk_threads
+    assert ReportCache(db_path=db_path).get("a") == "1"
+    assert cache.invalidate(["rule:R-1"]) == 1
+
+
+def test_invalidate_by_tag(tmp_path):
+    """Only entries carrying an invalidated tag are dropped, from both tiers."""
+    db_path = str(tmp_path / "reports.sqlite")
+    cache = ReportCache(max_entries=2, db_path=db_path)
+    cache.set("a", "1", tags=["rule:R-1", "rule:R-2"])
+    cache.set("b", "2", tags=["rule:R-2"])
+    cache.set("c", "3", tags=["rule:R-3"])
+
+    # "a" was evicted from memory but is still on disk and still tagged
+    assert cache.invalidate(["rule:R-2"]) == 2
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert ReportCache(db_path=db_path).get("b") is None
+
+    # Tags of entries promoted from disk are kept
+    restarted = ReportCache(db_path=db_path)
+    assert restarted.get("c") == "3"
+    assert restarted.invalidate(["rule:R-3", "rule:R-unknown"]) == 1
+    assert restarted.get("c") is None
+    assert restarted.invalidate([]) == 0
+
+
+def test_cache_key_is_content_addressed():
+    """Keys change with rule content and flags, not with nearby sizes."""
+    rules = match_rules(PROFILE, load_rules())
+    key = report_cache_key(PROFILE, rules, "sk-test")
+
+    assert report_cache_key(dict(PROFILE, size_m2=125), rules, "sk-test") == key
+    assert report_cache_key(dict(PROFILE, has_misting=True), rules, "sk-test") != key
+    assert report_cache_key(PROFILE, rules, "sk-other") != key
+
+    edited = [dict(rules[0], desc_en="Changed text")] + rules[1:]
+    assert report_cache_key(PROFILE, edited, "sk-test") != key
+
+
+def test_call_llm_serves_repeat_assessments_from_cache(monkeypatch):
+    """A repeated assessment does not call the LLM again."""
+    calls = []
+
+    def fake_generate(profile, matched_rules, api_key):
+        calls.append(profile)
+        return _generate_mock_report(profile, matched_rules)
+
+    monkeypatch.setenv("LLM_MOCK_MODE", "false")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test-cache")
+    monkeypatch.setattr(llm, "report_cache", ReportCache())
+    monkeypatch.setattr(llm, "_generate_llm_report", fake_generate)
+
+    rules = match_rules(PROFILE, load_rules())
+    first = call_llm(PROFILE, rules)
+    second = call_llm(PROFILE, rules)
+
+    assert len(calls) == 1
+    assert second == first
+
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    call_llm(PROFILE, rules)
+    assert len(calls) == 2
+
+
+def test_changed_rules_invalidate_their_reports(monkeypatch):
+    """Reports are dropped when a rule they cite changes or their match outcome disappears."""
+    monkeypatch.setenv("LLM_MOCK_MODE", "false")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test-cache")
+    monkeypatch.setattr(llm, "report_cache", ReportCache())
+    monkeypatch.setattr(llm, "_generate_llm_report", lambda profile, rules, api_key: _generate_mock_report(profile, rules))
+
+    rules = load_rules()
+    steakhouse = match_rules(PROFILE, rules)
+    cafe_profile = dict(PROFILE, seats=40, serves_alcohol=False)
+    cafe = match_rules(cafe_profile, rules)
+    call_llm(PROFILE, steakhouse)
+    call_llm(cafe_profile, cafe)
+    assert len(llm.report_cache) == 2
+
+    # A rule only the steakhouse report cites
+    only_steakhouse = next(rule["id"] for rule in steakhouse if rule not in cafe)
+    assert invalidate_cached_reports([only_steakhouse]) == 1
+    assert len(llm.report_cache) == 1
+
+    assert invalidate_cached_reports([], outcomes=[[rule["id"] for rule in reversed(cafe)]]) == 1
+    assert len(llm.report_cache) == 0
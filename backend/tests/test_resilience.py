@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test cases for LLM retries and the circuit breaker.
+"""
+
+import asyncio
+import os
+import random
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resilience import (CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retries,
+                        call_with_retries_async, is_transient)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def flaky(failures, error=TimeoutError("upstream timed out")):
+    """A call that raises `error` `failures` times, then returns 'ok'."""
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return "ok"
+    return call, calls
+
+
+def test_breaker_opens_after_threshold_and_probes_after_reset():
+    """Closed -> open after N failures -> one half-open probe -> closed."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_breaker():
+    """A failing half-open probe restarts the reset timeout."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now = 15
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+
+
+def test_success_resets_consecutive_failures():
+    """Only consecutive failures count towards the threshold."""
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_backoff_is_jittered_and_capped():
+    """Delays are drawn from [0, min(max_delay, base * 2**(attempt-1))]."""
+    policy = RetryPolicy(max_attempts=10, base_delay=0.5, max_delay=4, rng=random.Random(1))
+    for attempt in range(1, 10):
+        ceiling = min(4, 0.5 * 2 ** (attempt - 1))
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_transient_errors_are_retried():
+    """A call that fails twice and then succeeds returns after three attempts."""
+    sleeps = []
+    breaker = CircuitBreaker(failure_threshold=5)
+    call, calls = flaky(2)
+
+    result = call_with_retries(call, RetryPolicy(max_attempts=3, rng=random.Random(0)), breaker, sleep=sleeps.append)
+
+    assert result == "ok"
+    assert len(calls) == 3 and len(sleeps) == 2
+    assert breaker.state == "closed"
+
+
+def test_retries_are_bounded():
+    """The last transient error is raised once the attempts are used up."""
+    call, calls = flaky(10)
+    with pytest.raises(TimeoutError):
+        call_with_retries(call, RetryPolicy(max_attempts=3), CircuitBreaker(), sleep=lambda _: None)
+    assert len(calls) == 3
+
+
+def test_permanent_errors_are_not_retried_or_counted():
+    """Errors that retrying cannot fix are raised at once and do not trip the breaker."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    call, calls = flaky(10, error=ValueError("bad request"))
+    assert not is_transient(ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        call_with_retries(call, RetryPolicy(max_attempts=3), breaker, sleep=lambda _: None)
+
+    assert len(calls) == 1
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_fails_fast():
+    """Retries stop as soon as the breaker opens, and later calls never run."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    call, calls = flaky(10)
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retries(call, RetryPolicy(max_attempts=5), breaker, sleep=lambda _: None)
+    assert len(calls) == 2
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retries(call, RetryPolicy(max_attempts=5), breaker, sleep=lambda _: None)
+    assert len(calls) == 2
+
+
+def test_async_retries():
+    """The async variant retries without blocking the loop."""
+    breaker = CircuitBreaker(failure_threshold=5)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise asyncio.TimeoutError()
+        return "ok"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001)
+    assert asyncio.run(call_with_retries_async(call, policy, breaker)) == "ok"
+    assert len(attempts) == 2
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test cases for the compiled binary rulebook artifact.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import responses
+from matching import CompiledRules, calculate_tightness, match_rules, priority_order
+from rule_artifact import ArtifactRule, artifact_path_for, load_artifact, read_artifact_if_fresh, write_artifact
+from rule_store import RuleStore
+
+
+def load_rules():
+    """Load rules from requirements.json."""
+    data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "requirements.json")
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compile_to(tmp_path, rules):
+    """Write rules as requirements.json plus its artifact; return the JSON path."""
+    path = tmp_path / "requirements.json"
+    raw = json.dumps(rules, ensure_ascii=False).encode("utf-8")
+    path.write_bytes(raw)
+    write_artifact(rules, artifact_path_for(str(path)), hashlib.sha256(raw).hexdigest())
+    return path
+
+
+def test_artifact_round_trips_rules(tmp_path):
+    """Mapped rules equal the JSON rules, including key order, floats and empty bounds."""
+    rules = load_rules()
+    rules.append(dict(rules[1], id="R-Float-Bounds", triggers={"area": {"min": 10.5}, "seats": {}}))
+    artifact = load_artifact(artifact_path_for(str(compile_to(tmp_path, rules))))
+
+    assert all(isinstance(rule, ArtifactRule) for rule in artifact.rules)
+    assert [dict(rule) for rule in artifact.rules] == rules
+    assert [list(rule) for rule in artifact.rules] == [list(rule) for rule in rules]
+    assert artifact.rules[-1]["triggers"] == {"area": {"min": 10.5}, "seats": {}}
+    assert artifact.rules[0].get("suppresses") == rules[0]["suppresses"]
+    assert artifact.rules[1].get("suppresses") is None
+
+    authorities = sorted({rule["authority"] for rule in rules})
+    assert artifact.sort_keys == tuple(
+        (priority_order(rule["priority"]), calculate_tightness(rule), authorities.index(rule["authority"]))
+        for rule in rules
+    )
+
+    # Serialized like the JSON rules on both /requirements encoder paths
+    assert json.loads(responses.dumps({"requirements": artifact.rules})) == {"requirements": rules}
+    assert json.loads(responses._splice({"requirements": artifact.rules})) == {"requirements": rules}
+
+
+def test_artifact_keeps_source_key_order(tmp_path):
+    """Rules and triggers keep their JSON key order, so /requirements bodies and ETags match."""
+    rules = load_rules()
+    rules[2] = {key: rules[2][key] for key in reversed(list(rules[2]))}
+    rules[3]["triggers"] = {"flags": {"uses_gas": True, "serves_alcohol": False}, "seats": {"max": 80, "min": 10}}
+    del rules[4]["source_ref"]
+    artifact = load_artifact(artifact_path_for(str(compile_to(tmp_path, rules))))
+
+    assert [list(rule) for rule in artifact.rules] == [list(rule) for rule in rules]
+    assert json.dumps(artifact.rules[3]["triggers"]) == json.dumps(rules[3]["triggers"])
+    assert artifact.rules[4].get("source_ref") is None
+
+    from_json = responses.RequirementsPayload(rules).body(None, None)
+    from_artifact = responses.RequirementsPayload(artifact.rules).body(None, None)
+    assert from_artifact.bodies == from_json.bodies
+    assert from_artifact.etags == from_json.etags
+
+
+def test_artifact_matches_like_json(tmp_path):
+    """Compiling from the artifact's rules and sort keys matches exactly like the JSON."""
+    rules = load_rules()
+    artifact = load_artifact(artifact_path_for(str(compile_to(tmp_path, rules))))
+    compiled = CompiledRules(artifact.rules, artifact.sort_keys)
+
+    for size in (40, 120, 300):
+        for seats in (20, 50, 80, 200, 201, 300):
+            for alcohol in (False, True):
+                profile = {"size_m2": size, "seats": seats, "serves_alcohol": alcohol,
+                           "uses_gas": True, "has_misting": alcohol, "offers_delivery": not alcohol}
+                expected = [rule["id"] for rule in match_rules(profile, rules)]
+                assert [rule["id"] for rule in match_rules(profile, compiled)] == expected
+
+
+def test_store_uses_only_a_fresh_artifact(tmp_path):
+    """The store maps the artifact while it matches the JSON and parses the JSON otherwise."""
+    rules = load_rules()
+    path = compile_to(tmp_path, rules)
+
+    store = RuleStore(str(path), check_interval=0)
+    first = store.get()
+    assert first.artifact_path == artifact_path_for(str(path))
+    assert isinstance(first.rules[0], ArtifactRule)
+
+    # Edited JSON without recompiling: the stale artifact is ignored
+    rules[1]["title"] = "Edited title"
+    path.write_text(json.dumps(rules, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(first.mtime_ns + 10 ** 9, first.mtime_ns + 10 ** 9))
+    second = store.get()
+    assert second.version == 2
+    assert second.artifact_path is None
+    assert second.rules[1]["title"] == "Edited title"
+
+
+def test_store_checks_artifact_structure(tmp_path):
+    """An artifact whose hash matches but whose rules are malformed is not trusted."""
+    rules = load_rules()
+    path = compile_to(tmp_path, rules)
+    broken = [dict(rule) for rule in rules]
+    broken[1]["id"] = broken[0]["id"]
+    write_artifact(broken, artifact_path_for(str(path)), hashlib.sha256(path.read_bytes()).hexdigest())
+
+    rulebook = RuleStore(str(path), check_interval=0).get()
+    assert rulebook.artifact_path is None
+    assert [rule["id"] for rule in rulebook.rules] == [rule["id"] for rule in rules]
+
+
+def test_invalid_artifact_is_ignored(tmp_path):
+    """A corrupt or truncated artifact falls back to the JSON."""
+    path = tmp_path / "requirements.bin"
+    for content in (b"", b"not an artifact", b"LRBK" + bytes(20)):
+        path.write_bytes(content)
+        assert read_artifact_if_fresh(str(path), "0" * 64) is None
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_artifact_round_trips_rules, test_artifact_keeps_source_key_order, test_artifact_matches_like_json,
+                 test_store_uses_only_a_fresh_artifact, test_store_checks_artifact_structure,
+                 test_invalid_artifact_is_ignored):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("All rule artifact tests passed!")
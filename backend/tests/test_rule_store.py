@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Test cases for the process-wide rulebook store.
+"""
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from matching import CompiledRules, match_rules
+from responses import RequirementsResponses
+from rule_store import RuleStore, diff_rules, validate_rules
+
+
+def load_rules():
+    """Load rules from requirements.json."""
+    data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "requirements.json")
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_rules(path, rules, mtime_ns=None):
+    """Write a rulebook and optionally pin its mtime."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rules, f, ensure_ascii=False)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_loads_once_and_compiles(tmp_path):
+    """Rules are parsed once and exposed as an immutable compiled rulebook."""
+    path = tmp_path / "requirements.json"
+    rules = load_rules()
+    write_rules(path, rules)
+
+    store = RuleStore(str(path), check_interval=0)
+    first = store.get()
+    second = store.get()
+
+    assert first is second
+    assert first.version == 1
+    assert isinstance(first.compiled, CompiledRules)
+    assert isinstance(first.rules, tuple)
+    with pytest.raises(AttributeError):
+        first.compiled.rules = ()
+
+    profile = {
+        "size_m2": 120, "seats": 80, "serves_alcohol": True,
+        "uses_gas": True, "has_misting": False, "offers_delivery": False
+    }
+    assert match_rules(profile, first.compiled) == match_rules(profile, rules)
+    assert first.matcher is first.table
+    assert match_rules(profile, first.matcher) == match_rules(profile, rules)
+
+
+def test_hot_reload_on_mtime_change(tmp_path):
+    """Changing the file swaps in a new version."""
+    path = tmp_path / "requirements.json"
+    rules = load_rules()
+    write_rules(path, rules, mtime_ns=1_000_000_000)
+
+    store = RuleStore(str(path), check_interval=0)
+    assert len(store.get().rules) == len(rules)
+
+    write_rules(path, rules[:3], mtime_ns=2_000_000_000)
+    reloaded = store.get()
+    assert reloaded.version == 2
+    assert len(reloaded.rules) == 3
+
+
+def test_invalid_reload_keeps_previous_version(tmp_path):
+    """A broken edit never replaces a good rulebook."""
+    path = tmp_path / "requirements.json"
+    rules = load_rules()
+    write_rules(path, rules, mtime_ns=1_000_000_000)
+
+    store = RuleStore(str(path), check_interval=0)
+    good = store.get()
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[{not json")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+
+    assert store.get() is good
+
+
+def test_validate_rules_rejects_bad_rulebooks():
+    """Validation catches structural problems before compiling."""
+    with pytest.raises(ValueError, match="list of rules"):
+        validate_rules({"id": "R-1"})
+
+    rule = dict(load_rules()[0])
+    rule["priority"] = "urgent"
+    with pytest.raises(ValueError, match="Invalid priority"):
+        validate_rules([rule])
+
+    del rule["triggers"]
+    with pytest.raises(ValueError, match="Missing required field 'triggers'"):
+        validate_rules([rule])
+
+
+def test_validate_rules_checks_suppresses_clause():
+    """Guard clauses must be well-formed and reference existing rules."""
+    rules = load_rules()
+    validate_rules(rules)
+
+    rules[0]["suppresses"] = {"authority": "Israel Police"}
+    with pytest.raises(ValueError, match="Unknown suppresses key"):
+        validate_rules(rules)
+
+    rules[0]["suppresses"] = {"rule_ids": ["R-Does-Not-Exist"]}
+    with pytest.raises(ValueError, match="suppresses unknown rule"):
+        validate_rules(rules)
+
+
+def test_diff_rules():
+    """The diff separates added, removed, edited and re-triggered rules."""
+    old = load_rules()
+    new = [dict(rule) for rule in old[1:]]
+    new[0]["desc_en"] = "Edited text"
+    new[1]["triggers"] = {"seats": {"min": 10}}
+    new.append(dict(old[2], id="R-New"))
+
+    diff = diff_rules(old, new)
+    assert diff.added == {"R-New"}
+    assert diff.removed == {old[0]["id"]}
+    assert diff.changed == {old[1]["id"], old[2]["id"]}
+    assert diff.triggers_changed == {old[2]["id"]}
+    assert diff.affected == {old[0]["id"], old[1]["id"], old[2]["id"]}
+    assert diff.matching_changed and not diff.reordered
+
+    assert not diff_rules(old, [dict(rule) for rule in old])
+    reordered = diff_rules(old, old[1:] + old[:1])
+    assert reordered.reordered and reordered.matching_changed and not reordered.changed
+
+
+def test_text_edit_reuses_compiled_rules(tmp_path):
+    """An edit that cannot change any match shares the previous indexes and outcomes."""
+    path = tmp_path / "requirements.json"
+    rules = load_rules()
+    write_rules(path, rules, mtime_ns=1_000_000_000)
+    store = RuleStore(str(path), check_interval=0)
+    first = store.get()
+
+    rules[3]["desc_en"] = "Edited text"
+    write_rules(path, rules, mtime_ns=2_000_000_000)
+    second = store.get()
+
+    assert second.diff.changed == {rules[3]["id"]} and not second.diff.matching_changed
+    assert second.diff.dropped_outcomes == frozenset()
+    assert second.compiled.flag_masks is first.compiled.flag_masks
+    assert second.table.cells is first.table.cells
+    for profile in ({"size_m2": 120, "seats": 80, "serves_alcohol": True, "uses_gas": True,
+                     "has_misting": False, "offers_delivery": True},
+                    {"size_m2": 40, "seats": 20, "serves_alcohol": False, "uses_gas": False,
+                     "has_misting": False, "offers_delivery": False}):
+        expected = match_rules(profile, rules)
+        assert match_rules(profile, second.matcher) == expected
+        assert match_rules(profile, second.compiled) == expected
+    edited = next(rule for outcome in second.table.outcomes for rule in outcome if rule["id"] == rules[3]["id"])
+    assert edited["desc_en"] == "Edited text"
+
+
+def test_listeners_get_the_diff(tmp_path):
+    """Listeners run after the swap, with the diff and the outcomes no profile produces any more."""
+    path = tmp_path / "requirements.json"
+    rules = load_rules()
+    write_rules(path, rules, mtime_ns=1_000_000_000)
+    store = RuleStore(str(path), check_interval=0)
+    seen = []
+    store.add_listener(lambda previous, rulebook: seen.append((previous, rulebook, store.get())))
+    first = store.get()
+    assert seen == []
+
+    # Guards no longer exempt small venues without alcohol from Police rules
+    del rules[0]["suppresses"]
+    write_rules(path, rules, mtime_ns=2_000_000_000)
+    second = store.get()
+
+    assert len(seen) == 1
+    previous, rulebook, current = seen[0]
+    assert previous is first and rulebook is second and current is second
+    assert rulebook.diff.triggers_changed == {rules[0]["id"]}
+    assert rulebook.diff.dropped_outcomes
+    assert all(rules[0]["id"] in outcome for outcome in rulebook.diff.dropped_outcomes)
+
+
+def test_background_reload_does_not_block_readers(tmp_path):
+    """With background reloads, readers get the current version while the next one builds."""
+    path = tmp_path / "requirements.json"
+    rules = load_rules()
+    write_rules(path, rules, mtime_ns=1_000_000_000)
+    store = RuleStore(str(path), check_interval=0, background=True)
+    first = store.get()
+
+    started, release = threading.Event(), threading.Event()
+    build = store._build
+
+    def slow_build(stat, current):
+        started.set()
+        release.wait(5)
+        return build(stat, current)
+
+    store._build = slow_build
+    write_rules(path, rules[:3], mtime_ns=2_000_000_000)
+    assert store.get() is first
+    assert started.wait(5)
+    assert store.get() is first
+
+    release.set()
+    store.wait_for_reload(5)
+    assert store.get().version == 2
+    assert len(store.get().rules) == 3
+
+
+def test_requirements_bodies_carried_over(tmp_path):
+    """After a reload only /requirements bodies containing touched rules are re-encoded."""
+    path = tmp_path / "requirements.json"
+    rules = load_rules()
+    write_rules(path, rules, mtime_ns=1_000_000_000)
+    store = RuleStore(str(path), check_interval=0)
+    responses = RequirementsResponses()
+
+    old = responses.payload(store.get())
+    filters = [(None, None), ("Israel Police", None), ("Ministry of Health", None), (None, "medium"),
+               ("Israel Police", "medium")]
+    old_bodies = {key: old.body(*key) for key in filters}
+
+    police = next(rule for rule in rules if rule["authority"] == "Israel Police" and rule["priority"] == "high")
+    police["title"] = "Edited title"
+    write_rules(path, rules, mtime_ns=2_000_000_000)
+    new = responses.payload(store.get())
+
+    assert new.body(None, None) is not old_bodies[(None, None)]
+    assert new.body("Israel Police", None) is not old_bodies[("Israel Police", None)]
+    assert new.body("Ministry of Health", None) is old_bodies[("Ministry of Health", None)]
+    assert new.body(None, "medium") is old_bodies[(None, "medium")]
+    assert new.body("Israel Police", "medium") is old_bodies[("Israel Police", "medium")]
+    assert b"Edited title" in new.body("Israel Police", None).bodies["identity"]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test cases for single-flight call coalescing.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    """Same key -> one call; different keys -> separate calls."""
+    flights = SingleFlight()
+    calls = []
+
+    async def work(key):
+        async def call(publish):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return f"result-{key}"
+        return await flights.do(key, call)
+
+    async def run():
+        return await asyncio.gather(work("a"), work("a"), work("a"), work("b"))
+
+    results = asyncio.run(run())
+
+    assert sorted(calls) == ["a", "b"]
+    assert [result for result, _ in results] == ["result-a", "result-a", "result-a", "result-b"]
+    assert [shared for _, shared in results] == [False, True, True, False]
+    assert len(flights) == 0
+
+
+def test_late_joiners_receive_earlier_events():
+    """Events published before a caller joined are replayed to it."""
+    flights = SingleFlight()
+    seen = {"first": [], "second": []}
+
+    async def call(publish):
+        publish(1)
+        await asyncio.sleep(0.02)
+        publish(2)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flights.do("k", call, on_event=seen["first"].append))
+        await asyncio.sleep(0.01)
+        second = await flights.do("k", call, on_event=seen["second"].append)
+        return await first, second
+
+    asyncio.run(run())
+    assert seen == {"first": [1, 2], "second": [1, 2]}
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    """The call keeps running for the remaining callers."""
+    flights = SingleFlight()
+
+    async def call(publish):
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def run():
+        first = asyncio.ensure_future(flights.do("k", call))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flights.do("k", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == ("ok", True)
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    """A failed call is raised to all waiters and the key is freed."""
+    flights = SingleFlight()
+    attempts = []
+
+    async def call(publish):
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    async def run():
+        results = await asyncio.gather(flights.do("k", call), flights.do("k", call), return_exceptions=True)
+        return results, await flights.do("k", call)
+
+    results, retry = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == ("ok", False)
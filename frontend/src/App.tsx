@@ -1,16 +1,30 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import Header from './components/Header';
 import AssessmentForm from './components/AssessmentForm';
 import Summary from './components/Summary';
 import Obligations from './components/Obligations';
 import NextActions from './components/NextActions';
 import CitationsTable from './components/CitationsTable';
+import ReportSections from './components/ReportSections';
 import Toast from './components/Toast';
-import { assess, getRequirements, Profile, AssessmentResult, Rule } from './lib/api';
+import {
+  assessDeferred,
+  streamReport,
+  getRequirements,
+  Profile,
+  AssessmentResult,
+  Report,
+  ReportSection,
+  Rule
+} from './lib/api';
 
 interface AppState {
   profile: Profile;
   loading: boolean;
+  // Matches are shown while the report is still being generated
+  reportLoading: boolean;
+  // Whether result.report was written by the LLM rather than synthesized from the matches
+  generatedReport: boolean;
   error?: string;
   result?: AssessmentResult;
   requirementsIndex: Record<string, Rule>;
@@ -28,6 +42,8 @@ function App() {
       has_misting: false,
     },
     loading: false,
+    reportLoading: false,
+    generatedReport: false,
     requirementsIndex: {},
     showToast: false,
   });
@@ -54,58 +70,117 @@ function App() {
     loadRequirements();
   }, []);
 
+  // Bumped per submission and reset, so a stale report stream cannot overwrite newer results
+  const submission = useRef(0);
+
+  // Basic report built from the matched rules, for when no LLM report is available
+  const synthesizeReport = (matches: string[]): Report => {
+    const sections = matches.map(ruleId => {
+      const rule = state.requirementsIndex[ruleId];
+      return {
+        title: rule?.title || 'Unknown Requirement',
+        content: rule?.desc_en || 'Details not available',
+        rule_ids: [ruleId],
+        priority: (rule?.priority as "high" | "medium" | "low") || 'medium'
+      };
+    });
+
+    const highPriorityCount = sections.filter(s => s.priority === 'high').length;
+    const authorities = Array.from(new Set(matches
+      .map(ruleId => state.requirementsIndex[ruleId]?.authority)
+      .filter(Boolean)
+    ));
+
+    return {
+      summary: `Your restaurant matches ${matches.length} licensing requirements. Review the detailed obligations below and prioritize high-priority items for faster compliance.`,
+      sections,
+      total_rules: matches.length,
+      high_priority_count: highPriorityCount,
+      recommendations: [
+        'Contact relevant authorities to confirm specific requirements',
+        'Gather required documentation and certificates',
+        'Schedule necessary inspections with regulatory bodies',
+        'Begin implementation of high-priority compliance measures'
+      ],
+      authorities
+    };
+  };
+
+  // Report holding the sections streamed so far; summary and recommendations come with the final report
+  const partialReport = (matches: string[], sections: ReportSection[]): Report => ({
+    summary: '',
+    sections,
+    total_rules: matches.length,
+    high_priority_count: matches.filter(ruleId => state.requirementsIndex[ruleId]?.priority === 'high').length,
+    recommendations: [],
+    authorities: []
+  });
+
   const handleFormSubmit = async (profile: Profile) => {
+    const current = ++submission.current;
     setState(prev => ({ ...prev, loading: true, error: undefined }));
 
     try {
-      const result = await assess(profile);
+      const deferred = await assessDeferred(profile);
+      if (current !== submission.current) return;
 
       // Debug logging
-      console.log('API Response:', result);
-      console.log('Matches count:', result.matches?.length);
-      console.log('Report total_rules:', result.report?.total_rules);
-      console.log('Report sections count:', result.report?.sections?.length);
-
-      // If report is null, synthesize a basic one
-      if (!result.report) {
-        const sections = result.matches.map(ruleId => {
-          const rule = state.requirementsIndex[ruleId];
-          return {
-            title: rule?.title || 'Unknown Requirement',
-            content: rule?.desc_en || 'Details not available',
-            rule_ids: [ruleId],
-            priority: (rule?.priority as "high" | "medium" | "low") || 'medium'
-          };
-        });
+      console.log('API Response:', deferred);
+      console.log('Matches count:', deferred.matches?.length);
 
-        const highPriorityCount = sections.filter(s => s.priority === 'high').length;
-        const authorities = Array.from(new Set(result.matches
-          .map(ruleId => state.requirementsIndex[ruleId]?.authority)
-          .filter(Boolean)
-        ));
-
-        result.report = {
-          summary: `Your restaurant matches ${result.matches.length} licensing requirements. Review the detailed obligations below and prioritize high-priority items for faster compliance.`,
-          sections,
-          total_rules: result.matches.length,
-          high_priority_count: highPriorityCount,
-          recommendations: [
-            'Contact relevant authorities to confirm specific requirements',
-            'Gather required documentation and certificates',
-            'Schedule necessary inspections with regulatory bodies',
-            'Begin implementation of high-priority compliance measures'
-          ],
-          authorities
-        };
-      }
+      const matches = deferred.matches;
+      const job = deferred.report_job;
+      const result: AssessmentResult = {
+        matches,
+        report: deferred.report ?? (job ? null : synthesizeReport(matches))
+      };
 
+      // Show the matches now; the report fills in below
       setState(prev => ({
         ...prev,
         loading: false,
+        reportLoading: !!job,
+        generatedReport: !!deferred.report,
         result,
-        showToast: true
+        showToast: !job
       }));
+      if (!job) return;
+
+      const sections: ReportSection[] = [];
+      try {
+        const report = await streamReport(job, section => {
+          if (current !== submission.current) return;
+          sections.push(section);
+          setState(prev => ({
+            ...prev,
+            generatedReport: true,
+            result: { matches, report: partialReport(matches, [...sections]) }
+          }));
+        });
+        if (current !== submission.current) return;
+
+        console.log('Report total_rules:', report.total_rules);
+        console.log('Report sections count:', report.sections?.length);
+        setState(prev => ({
+          ...prev,
+          reportLoading: false,
+          generatedReport: true,
+          result: { matches, report },
+          showToast: true
+        }));
+      } catch (error) {
+        if (current !== submission.current) return;
+        console.error('Report generation failed:', error);
+        setState(prev => ({
+          ...prev,
+          reportLoading: false,
+          generatedReport: false,
+          result: { matches, report: synthesizeReport(matches) },
+          showToast: true
+        }));
+      }
     } catch (error) {
+      if (current !== submission.current) return;
       setState(prev => ({
         ...prev,
         loading: false,
@@ -141,8 +216,11 @@ function App() {
   };
 
   const handleResetForm = () => {
+    submission.current++;
     setState(prev => ({
       ...prev,
+      reportLoading: false,
+      generatedReport: false,
       result: undefined,
       error: undefined,
       showToast: false
@@ -165,6 +243,12 @@ function App() {
               matchesCount={state.result.matches.length}
               onExportPDF={handleExportPDF}
             />
+            {(state.reportLoading || state.generatedReport) && (
+              <ReportSections
+                sections={state.result.report?.sections ?? []}
+                loading={state.reportLoading}
+              />
+            )}
             <Obligations
               report={state.result.report}
               matches={state.result.matches}
@@ -0,0 +1,60 @@
+import { Sparkles, Loader2 } from 'lucide-react';
+import { ReportSection } from '../lib/api';
+
+interface ReportSectionsProps {
+  sections: ReportSection[];
+  loading: boolean;
+}
+
+export default function ReportSections({ sections, loading }: ReportSectionsProps) {
+  const getPriorityColor = (priority: string) => {
+    switch (priority) {
+      case 'high': return 'bg-red-100 text-red-800 border-red-200';
+      case 'medium': return 'bg-yellow-100 text-yellow-800 border-yellow-200';
+      case 'low': return 'bg-green-100 text-green-800 border-green-200';
+      default: return 'bg-gray-100 text-gray-800 border-gray-200';
+    }
+  };
+
+  return (
+    <div className="max-w-4xl mx-auto">
+      <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6">
+        <div className="flex items-center gap-2 mb-6">
+          <Sparkles className="h-5 w-5 text-purple-600" />
+          <h2 className="text-xl font-semibold text-gray-900">Detailed Report</h2>
+        </div>
+
+        <div className="space-y-4">
+          {/* Sections appear one by one as the report is generated */}
+          {sections.map((section) => (
+            <div key={section.title} className="border border-gray-200 rounded-lg p-4">
+              <div className="flex items-center gap-2 mb-2">
+                <span className={`inline-flex items-center px-2.5 py-0.5 rounded-md text-xs font-medium border ${getPriorityColor(section.priority)}`}>
+                  {section.priority.charAt(0).toUpperCase() + section.priority.slice(1)}
+                </span>
+                <h3 className="font-semibold text-gray-900">{section.title}</h3>
+              </div>
+
+              <p className="text-gray-700 text-sm whitespace-pre-line mb-2">{section.content}</p>
+
+              <div className="flex flex-wrap gap-1">
+                {section.rule_ids.map((ruleId) => (
+                  <code key={ruleId} className="text-xs text-gray-500 bg-gray-100 px-1.5 py-0.5 rounded">
+                    {ruleId}
+                  </code>
+                ))}
+              </div>
+            </div>
+          ))}
+
+          {loading && (
+            <div className="flex items-center gap-2 text-sm text-gray-500" role="status">
+              <Loader2 className="h-4 w-4 animate-spin" />
+              Generating detailed report…
+            </div>
+          )}
+        </div>
+      </div>
+    </div>
+  );
+}
@@ -28,6 +28,18 @@ export interface AssessmentResult {
   report: Report | null;
 }
 
+export interface ReportJobRef {
+  id: string;
+  status: "pending" | "running" | "done" | "failed";
+  url: string;
+  events: string;
+}
+
+export interface DeferredAssessmentResult extends AssessmentResult {
+  report_job?: ReportJobRef;
+  error?: string;
+}
+
 export interface Rule {
   id: string;
   title: string;
@@ -57,6 +69,49 @@ export async function assess(profile: Profile): Promise<AssessmentResult> {
   return response.json();
 }
 
+// Returns matches immediately; the report follows via streamReport()
+export async function assessDeferred(profile: Profile): Promise<DeferredAssessmentResult> {
+  const response = await fetch(`${API_BASE}/assess?report=deferred`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(profile),
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+// Resolves with the finished report; each section is passed to onSection as the LLM writes it
+export function streamReport(
+  job: ReportJobRef,
+  onSection?: (section: ReportSection) => void
+): Promise<Report> {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_BASE}${job.events}`);
+
+    source.addEventListener("section", (event) => {
+      onSection?.(JSON.parse((event as MessageEvent).data));
+    });
+
+    source.addEventListener("report", (event) => {
+      source.close();
+      resolve(JSON.parse((event as MessageEvent).data));
+    });
+
+    // Fired both for a failed job (with data) and for connection errors
+    source.addEventListener("error", (event) => {
+      source.close();
+      const data = (event as MessageEvent).data;
+      reject(new Error(data ? JSON.parse(data).error : "Report stream failed"));
+    });
+  });
+}
+
 export async function getRequirements(): Promise<Rule[]> {
   const response = await fetch(`${API_BASE}/requirements`);
 
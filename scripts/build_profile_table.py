@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Enumerate every distinct match outcome of requirements.json.
+
+Matching depends only on the four boolean flags and on which elementary
+interval between the rules' area/seat endpoints a profile falls into, so the
+whole profile space is a small set of classes. This builds the same
+`ProfileTable` the backend precomputes when it loads the rulebook, prints its
+size, and optionally writes it out as a compact JSON lookup table (cell ->
+outcome index, outcome -> sorted matched IDs) for review or diffing between
+rulebook versions.
+
+Usage:
+    python scripts/build_profile_table.py
+    python scripts/build_profile_table.py --output profile_table.json --classes
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from matching import ProfileTable, compile_rules
+from rule_store import DEFAULT_RULES_PATH, validate_rules
+
+
+def table_document(table: ProfileTable, rules_sha256: str, include_classes: bool) -> Dict[str, Any]:
+    """JSON-serializable form of the table."""
+    document = {
+        "rules_sha256": rules_sha256,
+        "area_points": table.area_points,
+        "seats_points": table.seats_points,
+        "flags": list(table.flags),
+        # Row-major over (area cell, seats cell, flag bits); flag i is bit i
+        "cells": list(table.cells),
+        "outcomes": [list(ids) for ids in table.outcome_ids]
+    }
+    if include_classes:
+        document["classes"] = list(table.classes())
+    return document
+
+
+def main():
+    """Build the profile table and report on it."""
+    parser = argparse.ArgumentParser(description="Precompute all match outcomes of the rulebook")
+    parser.add_argument("--rules", default=DEFAULT_RULES_PATH, help="Path to requirements.json")
+    parser.add_argument("--output", help="Write the table as JSON to this path")
+    parser.add_argument("--classes", action="store_true", help="Include a readable description of every cell")
+    args = parser.parse_args()
+
+    with open(args.rules, 'rb') as f:
+        raw = f.read()
+    rules = validate_rules(json.loads(raw))
+
+    table = ProfileTable(compile_rules(rules))
+    print(f"Rules:    {len(rules)}")
+    print(f"Area:     {len(table.area_points)} endpoints {table.area_points}")
+    print(f"Seats:    {len(table.seats_points)} endpoints {table.seats_points}")
+    print(f"Flags:    {', '.join(table.flags)}")
+    print(f"Cells:    {len(table)} ({table.cells.itemsize * len(table)} bytes)")
+    print(f"Outcomes: {len(table.outcomes)} distinct matched-ID lists")
+
+    if args.output:
+        document = table_document(table, hashlib.sha256(raw).hexdigest(), args.classes)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, separators=(",", ":"))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
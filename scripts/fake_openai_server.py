@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat-completions API.
+
+Speaks the `POST /v1/chat/completions` wire protocol (plain JSON and
+`stream: true` Server-Sent Events) with configurable latency, error rates and
+streaming speed, so the real network path of the backend - client, timeouts,
+retries, streaming and parsing - can be exercised and load-tested offline.
+
+The completion text is derived from the prompt: the `## <Authority>
+Requirements` headers the report prompt asks for, the rule IDs it lists, and
+the summary/recommendation sections.
+
+Usage:
+    python scripts/fake_openai_server.py --port 8001 --latency lognormal:0.8,0.4 --error-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=sk-fake uvicorn app:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "normal", "lognormal", "exponential"]
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Build a latency sampler (seconds) from a spec string.
+
+    Formats: `fixed:S`, `uniform:LO,HI`, `normal:MEAN,STDDEV`,
+    `lognormal:MEDIAN,SIGMA`, `exponential:MEAN`. Samples are never negative.
+    """
+    name, _, args = spec.partition(":")
+    try:
+        params = [float(value) for value in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Invalid latency parameters in '{spec}'")
+
+    if name == "fixed" and len(params) == 1:
+        return lambda: params[0]
+    if name == "uniform" and len(params) == 2:
+        return lambda: rng.uniform(params[0], params[1])
+    if name == "normal" and len(params) == 2:
+        return lambda: max(rng.gauss(params[0], params[1]), 0.0)
+    if name == "lognormal" and len(params) == 2:
+        median, sigma = params
+        return lambda: median * rng.lognormvariate(0.0, sigma)
+    if name == "exponential" and len(params) == 1:
+        return lambda: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    raise ValueError(f"Invalid latency spec '{spec}' (distributions: {', '.join(LATENCY_DISTRIBUTIONS)})")
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake server."""
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    error_codes: List[int] = field(default_factory=lambda: [429, 500, 503])
+    hang_rate: float = 0.0
+    hang_seconds: float = 120.0
+    tokens_per_second: float = 0.0
+    chunk_chars: int = 16
+    seed: Optional[int] = None
+
+
+@dataclass
+class FakeLLMStats:
+    """Counters exposed on `GET /stats`."""
+    requests: int = 0
+    streamed: int = 0
+    errors: int = 0
+    hangs: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"requests": self.requests, "streamed": self.streamed, "errors": self.errors, "hangs": self.hangs}
+
+
+def fake_completion_text(prompt: str) -> str:
+    """Plausible report text for one of the backend's prompts."""
+    section = re.match(r"Write the (.+?) section of", prompt)
+    rule_ids = re.findall(r"ID: (\S+)", prompt)
+    if section:
+        return "\n".join(f"- {rule_id}: requirement applies / הדרישה חלה" for rule_id in rule_ids) or "- No requirements"
+
+    text = "## Summary\nThe business must satisfy the licensing requirements listed below before opening.\n\n"
+    for authority in re.findall(r"^## (.+) Requirements\s*$", prompt, re.M):
+        text += f"## {authority} Requirements\n"
+        text += f"- Follow every {authority} rule listed for this business.\n\n"
+    text += "## Recommendations\n- Contact the authorities early\n- Address high-priority items first\n"
+    return text
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    """FastAPI app implementing the chat-completions endpoint."""
+    rng = random.Random(config.seed)
+    sample_latency = parse_latency(config.latency, rng)
+    stats = FakeLLMStats()
+    app = FastAPI(title="Fake OpenAI API")
+    app.state.stats = stats
+
+    @app.get("/stats")
+    def get_stats():
+        return stats.to_dict()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.requests += 1
+        roll = rng.random()
+
+        if roll < config.hang_rate:
+            # Simulates an upstream that never answers within the client timeout
+            stats.hangs += 1
+            await asyncio.sleep(config.hang_seconds)
+        elif roll < config.hang_rate + config.error_rate:
+            stats.errors += 1
+            await asyncio.sleep(sample_latency())
+            status = rng.choice(config.error_codes)
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": f"Simulated upstream error {status}", "type": "server_error", "code": None}}
+            )
+
+        model = body.get("model", "gpt-3.5-turbo")
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        text = fake_completion_text(prompt)
+        # ~4 characters per token; cut off like a real completion hitting max_tokens
+        max_chars = int(body.get("max_tokens") or 0) * 4
+        finish_reason = "length" if max_chars and len(text) > max_chars else "stop"
+        if max_chars:
+            text = text[:max_chars]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        # Latency is time to first byte; streamed chunks follow at tokens_per_second
+        await asyncio.sleep(sample_latency())
+
+        if body.get("stream"):
+            stats.streamed += 1
+            return StreamingResponse(
+                _stream_chunks(text, completion_id, created, model, finish_reason, config),
+                media_type="text/event-stream"
+            )
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": finish_reason
+            }],
+            "usage": _usage(prompt, text)
+        }
+
+    return app
+
+
+async def _stream_chunks(text: str, completion_id: str, created: int, model: str, finish_reason: str,
+                         config: FakeLLMConfig) -> AsyncIterator[str]:
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    size = max(config.chunk_chars, 1)
+    delay = size / 4 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+    yield chunk({"role": "assistant", "content": ""})
+    for start in range(0, len(text), size):
+        if delay:
+            await asyncio.sleep(delay)
+        yield chunk({"content": text[start:start + size]})
+    yield chunk({}, finish_reason=finish_reason)
+    yield "data: [DONE]\n\n"
+
+
+def _usage(prompt: str, text: str) -> Dict[str, int]:
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(text) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+def main():
+    """Run the fake server."""
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="Time to first byte, e.g. fixed:0.5, uniform:0.2,2, lognormal:0.8,0.5, exponential:1")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-codes", default="429,500,503", help="Comma-separated HTTP statuses for errors")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that stall")
+    parser.add_argument("--hang-seconds", type=float, default=120.0, help="How long stalled requests take")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Streaming speed after the first byte (0 = as fast as possible)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_codes=[int(code) for code in args.error_codes.split(",") if code],
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed
+    )
+
+    import uvicorn
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the `/assess` endpoint.
+
+Drives the API open-loop at a target request rate: request i is scheduled at
+`start + i / rps` whatever happened to earlier requests, and its latency is
+measured from that scheduled time, so a backlog inside the client (all
+workers busy) counts against the server instead of silently lowering the
+offered load. Reports p50/p95/p99 latency, throughput and outcome counts.
+
+Pair it with scripts/fake_openai_server.py to load-test the real LLM path:
+    python scripts/fake_openai_server.py --latency lognormal:1.0,0.5 &
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=sk-fake uvicorn app:app --app-dir backend &
+    python scripts/load_test.py --rps 50 --duration 30
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+OUTCOMES = ["ok", "no_report", "http_error", "failed"]
+
+
+def random_profiles(count: int, seed: int) -> List[Dict[str, Any]]:
+    """`count` distinct-ish business profiles; more profiles mean fewer cache hits."""
+    rng = random.Random(seed)
+    return [
+        {
+            "size_m2": rng.randint(20, 500),
+            "seats": rng.randint(0, 400),
+            "serves_alcohol": rng.random() < 0.5,
+            "uses_gas": rng.random() < 0.6,
+            "has_misting": rng.random() < 0.2,
+            "offers_delivery": rng.random() < 0.4
+        }
+        for _ in range(count)
+    ]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def send_assessment(url: str, profile: Dict[str, Any], timeout: float) -> str:
+    """POST one profile and classify the outcome."""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(profile).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = json.loads(response.read())
+    except urllib.error.HTTPError:
+        return "http_error"
+    except Exception:
+        return "failed"
+    if body.get("report") is None and body.get("report_job") is None:
+        return "no_report"
+    return "ok"
+
+
+def run_load(url: str, rps: float, duration: float, concurrency: int, timeout: float,
+             profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run the open-loop schedule and collect latency statistics."""
+    total = max(int(rps * duration), 1)
+    results: List[Tuple[str, float]] = []
+    lock = threading.Lock()
+
+    def task(index: int, scheduled: float) -> None:
+        outcome = send_assessment(url, profiles[index % len(profiles)], timeout)
+        latency = time.perf_counter() - scheduled
+        with lock:
+            results.append((outcome, latency))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, i, scheduled)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    ok_latencies = sorted(latency for outcome, latency in results if outcome == "ok")
+    return {
+        "requests": len(results),
+        "target_rps": rps,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+        "ok_rps": len(ok_latencies) / elapsed if elapsed else 0.0,
+        "outcomes": {outcome: sum(1 for o, _ in results if o == outcome) for outcome in OUTCOMES},
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else float("nan"),
+            "mean": sum(latencies) / len(latencies) if latencies else float("nan")
+        }
+    }
+
+
+def print_summary(stats: Dict[str, Any]) -> None:
+    print(f"Requests:   {stats['requests']} in {stats['elapsed_seconds']:.1f}s "
+          f"(target {stats['target_rps']:.1f} rps)")
+    print(f"Throughput: {stats['throughput_rps']:.1f} rps, {stats['ok_rps']:.1f} rps with a report")
+    print("Outcomes:   " + ", ".join(f"{name}={count}" for name, count in stats["outcomes"].items()))
+    latency = stats["latency"]
+    print(f"Latency:    p50={latency['p50'] * 1000:.0f}ms p95={latency['p95'] * 1000:.0f}ms "
+          f"p99={latency['p99'] * 1000:.0f}ms max={latency['max'] * 1000:.0f}ms mean={latency['mean'] * 1000:.0f}ms")
+
+
+def main():
+    """Run a load test against a running backend."""
+    parser = argparse.ArgumentParser(description="Open-loop load test for POST /assess")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load")
+    parser.add_argument("--concurrency", type=int, default=512, help="Max requests in flight")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--report", choices=["inline", "deferred"], default="inline",
+                        help="Report mode passed to /assess")
+    parser.add_argument("--profiles", type=int, default=200,
+                        help="Distinct profiles to cycle through (more = fewer cache hits)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the statistics as JSON")
+    args = parser.parse_args()
+
+    url = f"{args.url.rstrip('/')}/assess?report={args.report}"
+    stats = run_load(url, args.rps, args.duration, args.concurrency, args.timeout,
+                     random_profiles(args.profiles, args.seed))
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print_summary(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,82 +2,481 @@
 """
 ETL script for business licensing requirements.
 Validates and processes requirements.json from PDF source.
+
+Once requirements.json passes validation it is compiled into
+data/requirements.bin (see backend/rule_artifact.py), which the backend
+memory-maps at startup instead of parsing the JSON.
+
+With `--pdf`, draft rules are extracted from the Hebrew source PDF:
+
+1. Every page is fingerprinted by hashing its content streams and font
+   names, which needs no text extraction.
+2. Pages whose fingerprint is not in the page cache are extracted with
+   pdfplumber in a process pool. Each worker opens the PDF once.
+3. The text comes out in visual order, so it is converted back to logical
+   order and segmented into numbered clauses (3.2.2. ...) across page
+   breaks. Each clause becomes one draft rule whose `source_ref` is the
+   clause number (§3.2.2).
+
+Pages, clauses and rules are produced by generators and written out as JSON
+Lines while the PDF is read, so memory stays flat however long the document
+is. Re-running on a new revision of the PDF only extracts the pages whose
+content changed. Drafts still need translation, triggers and review before
+they go into requirements.json.
+
+Usage:
+    python scripts/parse_pdf.py
+    python scripts/parse_pdf.py --no-compile
+    python scripts/parse_pdf.py --pdf docs/pdfs/18-07-2022_4.2A.pdf --output rules_draft.jsonl
 """
 
+import argparse
+import hashlib
 import json
 import os
-from typing import Dict, List, Any
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 import pdfplumber
+from pdfminer.pdftypes import resolve1
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from rule_artifact import artifact_path_for, write_artifact
+from schema import RuleIssue, validate_rulebook
+
+REQUIREMENTS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "requirements.json")
+
+# Bump when the extraction settings change so cached pages are re-extracted
+EXTRACTOR_VERSION = "1"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".pdf_cache")
+
+# Chapter titles (substrings) to the authority names used in requirements.json
+AUTHORITIES = {
+    "משטרת ישראל": "Israel Police",
+    "משרד הבריאות": "Ministry of Health",
+    "כבאות והצלה": "Fire & Rescue Authority"
+}
+
+HEBREW = re.compile(r"[\u0590-\u05FF]")
+# Left-to-right runs inside a Hebrew line: numbers, and Latin words with the
+# spaces between them. Everything else is reordered one character at a time.
+LTR_RUN = re.compile(
+    r"[A-Za-z](?:[0-9A-Za-z.,:/%\-]*[0-9A-Za-z])?(?: [A-Za-z](?:[0-9A-Za-z.,:/%\-]*[0-9A-Za-z])?)*"
+    r"|\d(?:[0-9.,:/%*\-]*\d)?"
+)
+MIRRORED = str.maketrans("()[]{}<>", ")(][}{><")
+
+CHAPTER = re.compile(r"^פרק (\d+)\s*-\s*(.+)$")
+CLAUSE = re.compile(r"^(\d+(?:\.\d+)+)\.?\s+(.+)$")
+ITEM = re.compile(r"^(?:\(\d+\)|\([א-ת]\)|\d+\))\s")
+PAGE_NUMBER = re.compile(r"^\d+$")
+# Table of contents lines end in dot leaders
+DOT_LEADER = re.compile(r"\.{4,}|…")
+
+# Worker process state: the PDF opened once by `_init_worker`
+_worker_pdf = None
+
+
+def page_fingerprint(page) -> str:
+    """
+    Hash of what determines a page's text: its content streams and fonts.
+
+    Object numbers are left out so an incremental revision of the PDF does
+    not change the fingerprints of untouched pages.
+    """
+    digest = hashlib.sha256(EXTRACTOR_VERSION.encode("utf-8"))
+    contents = page.page_obj.contents
+    for stream in contents if isinstance(contents, list) else [contents]:
+        stream = resolve1(stream)
+        if stream is not None:
+            digest.update(stream.get_data())
+    fonts = resolve1(resolve1(page.page_obj.resources or {}).get("Font")) or {}
+    for name in sorted(fonts):
+        font = resolve1(fonts[name]) or {}
+        digest.update(f"{name}={font.get('BaseFont')};".encode("utf-8"))
+    digest.update(repr(page.mediabox).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _init_worker(pdf_path: str) -> None:
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+
+def _extract_page(page_index: int) -> Tuple[int, str]:
+    page = _worker_pdf.pages[page_index]
+    text = page.extract_text() or ""
+    # Drop the parsed layout so worker memory stays flat across pages
+    page.close()
+    return page_index, text
+
+
+def _cache_path(cache_dir: str, fingerprint: str) -> str:
+    return os.path.join(cache_dir, f"{fingerprint}.json")
+
+
+def _read_cached_page(cache_dir: Optional[str], fingerprint: str) -> Optional[str]:
+    if not cache_dir:
+        return None
+    try:
+        with open(_cache_path(cache_dir, fingerprint), 'r', encoding='utf-8') as f:
+            return json.load(f)["text"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_cached_page(cache_dir: str, fingerprint: str, text: str) -> None:
+    path = _cache_path(cache_dir, fingerprint)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": EXTRACTOR_VERSION, "text": text}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _extracted_text(fingerprint: str, value: Any, cache_dir: Optional[str]) -> str:
+    """Text of a queued page: cached text, or the result of its extraction."""
+    if isinstance(value, str):
+        return value
+    _, text = value.result()
+    if cache_dir:
+        _write_cached_page(cache_dir, fingerprint, text)
+    return text
+
+
+def iter_pages(pdf_path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+               workers: Optional[int] = None, stats: Optional[Dict[str, int]] = None) -> Iterator[str]:
+    """
+    Yield the text of every page in order, reusing cached pages by content hash.
+
+    Pages are extracted at most two per worker ahead of the consumer and
+    each page's parsed layout is dropped as soon as its text is taken, so
+    memory does not grow with the number of pages.
+
+    Args:
+        pdf_path: Path to the PDF
+        cache_dir: Directory of cached page texts; None disables the cache
+        workers: Extraction processes (default: CPU count); 1 extracts inline
+        stats: Optional dict that receives "cached" and "extracted" counts
+
+    Yields:
+        Text of each page in visual order, as pdfplumber extracts it
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = stats if stats is not None else {}
+    stats.setdefault("cached", 0)
+    stats.setdefault("extracted", 0)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    pool = None
+    # (fingerprint, text or Future) in page order
+    queue: Deque[Tuple[str, Any]] = deque()
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                fingerprint = page_fingerprint(page)
+                text = _read_cached_page(cache_dir, fingerprint)
+                if text is not None:
+                    stats["cached"] += 1
+                    queue.append((fingerprint, text))
+                elif workers <= 1:
+                    stats["extracted"] += 1
+                    text = page.extract_text() or ""
+                    if cache_dir:
+                        _write_cached_page(cache_dir, fingerprint, text)
+                    queue.append((fingerprint, text))
+                else:
+                    stats["extracted"] += 1
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                   initargs=(pdf_path,))
+                    queue.append((fingerprint, pool.submit(_extract_page, page.page_number - 1)))
+                page.close()
+
+                while queue and (len(queue) > 2 * workers or isinstance(queue[0][1], str)):
+                    yield _extracted_text(*queue.popleft(), cache_dir)
+
+        while queue:
+            yield _extracted_text(*queue.popleft(), cache_dir)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def to_logical(line: str) -> str:
+    """
+    Convert a visual-order line of Hebrew text back to logical order.
+
+    Hebrew characters come out reversed while numbers and Latin words keep
+    their left-to-right order, so the line is split into LTR runs and single
+    characters, the order of those is reversed and brackets are mirrored.
+    Lines without Hebrew are returned unchanged.
+    """
+    if not HEBREW.search(line):
+        return line
+    tokens = []
+    position = 0
+    for match in LTR_RUN.finditer(line):
+        tokens.extend(c.translate(MIRRORED) for c in line[position:match.start()])
+        tokens.append(match.group())
+        position = match.end()
+    tokens.extend(c.translate(MIRRORED) for c in line[position:])
+    return "".join(reversed(tokens)).strip()
+
+
+def _authority(chapter_title: str) -> str:
+    for name, authority in AUTHORITIES.items():
+        if name in chapter_title:
+            return authority
+    return "TODO"
 
-def extract_rules_from_pdf(pdf_path: str) -> List[Dict[str, Any]]:
-    """Extract rules from a PDF file. Placeholder implementation."""
-    """Attempt to parse rules directly from the Hebrew PDF."""
-    rules = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_number, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text()
-            if not text:
+
+def segment_clauses(pages: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Split page texts into numbered clauses, yielding each once it is complete.
+
+    A clause starts at a numbered line (3.2.2. ...) and runs until the next
+    one, across page breaks. Only the clause being read and the one before it
+    are held, so pages can be streamed from `iter_pages`. Sub-items ((1), (א)) start a new line of the
+    clause text; other lines continue the previous one. An unnumbered line
+    without final punctuation that directly precedes a numbered line is a
+    heading and is dropped, as are numbered headings without text of their
+    own (3.1. הגדרות directly followed by 3.1.1.).
+
+    Args:
+        pages: Page texts in visual order, as yielded by `iter_pages`
+
+    Yields:
+        Clause dictionaries with number, page, chapter, authority, heading
+        and text
+    """
+    # Closed segments waiting to see whether the next one is their child
+    segments: List[Dict[str, Any]] = []
+    seen = set()
+    current: Optional[Dict[str, Any]] = None
+    chapter = {"number": None, "title": "", "authority": "TODO"}
+    pending: Optional[str] = None
+
+    def ready(final: bool) -> Iterator[Dict[str, Any]]:
+        while len(segments) > (0 if final else 1):
+            segment = segments.pop(0)
+            following = segments[0]["number"] if segments else ""
+            if not segment.pop("body") and following.startswith(segment["number"] + "."):
                 continue
+            segment["text"] = "\n".join(segment.pop("lines"))
+            yield segment
 
-            # Example: naive filtering for "סעיף" or "דרישות"
-            for line in text.splitlines():
-                if "דרישות" in line or "סעיף" in line:
-                    rules.append({
-                        "id": f"PDF-{page_number}-{len(rules)+1}",
-                        "title": line.strip()[:60],
-                        "desc_he": line.strip(),
-                        "desc_en": "TODO: manual translation",
-                        "authority": "TODO",
-                        "priority": "medium",
-                        "source_ref": f"PDF p.{page_number}",
-                        "triggers": {}
-                    })
-    return rules
-def validate_rule_schema(rule: Dict[str, Any]) -> bool:
-    """Validate a single rule against required schema."""
-    required_fields = ["id", "title", "desc_he", "desc_en", "authority", "priority", "source_ref", "triggers"]
-    
-    for field in required_fields:
-        if field not in rule:
-            print(f"Missing required field '{field}' in rule {rule.get('id', 'unknown')}")
-            return False
-    
-    # Validate priority values
-    if rule["priority"] not in ["high", "medium", "low"]:
-        print(f"Invalid priority '{rule['priority']}' in rule {rule['id']}")
-        return False
-    
-    # Validate triggers structure
-    if not isinstance(rule["triggers"], dict):
-        print(f"Invalid triggers structure in rule {rule['id']}")
-        return False
-    
-    return True
+    def close(keep_pending: bool) -> None:
+        nonlocal current, pending
+        if current is not None:
+            if pending is not None and keep_pending:
+                current["lines"].append(pending)
+                current["body"] = True
+            segments.append(current)
+        current = pending = None
+
+    for page_number, text in enumerate(pages, start=1):
+        lines = [to_logical(line) for line in text.splitlines()]
+        lines = [line for line in lines if line]
+        if lines and PAGE_NUMBER.match(lines[-1]):
+            lines.pop()
+        for line in lines:
+            if DOT_LEADER.search(line):
+                continue
+
+            heading = CHAPTER.match(line)
+            if heading:
+                close(keep_pending=False)
+                yield from ready(final=False)
+                chapter = {"number": heading.group(1), "title": heading.group(2).strip(),
+                           "authority": _authority(heading.group(2))}
+                continue
+
+            numbered = CLAUSE.match(line)
+            if numbered and numbered.group(1) not in seen and (
+                    chapter["number"] is None or numbered.group(1).split(".")[0] == chapter["number"]):
+                close(keep_pending=False)
+                yield from ready(final=False)
+                seen.add(numbered.group(1))
+                current = {
+                    "number": numbered.group(1),
+                    "page": page_number,
+                    "chapter": chapter["title"],
+                    "authority": chapter["authority"],
+                    "heading": numbered.group(2).strip(),
+                    "lines": [numbered.group(2).strip()],
+                    "body": False
+                }
+                continue
+
+            if current is None:
+                continue
+            if pending is not None:
+                current["lines"].append(pending)
+                pending = None
+            if ITEM.match(line):
+                current["lines"].append(line)
+            elif current["lines"][-1].endswith((".", ":")) and not line.endswith((".", ":", ",")):
+                # Either a heading before the next clause or a new paragraph
+                pending = line
+                continue
+            else:
+                current["lines"][-1] += " " + line
+            current["body"] = True
+    close(keep_pending=True)
+    yield from ready(final=True)
+
+
+def clause_to_rule(clause: Dict[str, Any]) -> Dict[str, Any]:
+    """Draft rule for a clause; translation and triggers are filled in by hand."""
+    return {
+        "id": f"PDF-{clause['number']}",
+        "title": clause["heading"][:60],
+        "desc_he": clause["text"],
+        "desc_en": "TODO: manual translation",
+        "authority": clause["authority"],
+        "priority": "medium",
+        "source_ref": f"§{clause['number']}",
+        "triggers": {}
+    }
+
+
+def iter_rules_from_pdf(pdf_path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                        workers: Optional[int] = None,
+                        stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield draft rules, one per numbered clause, from the Hebrew PDF.
 
-def load_requirements() -> List[Dict[str, Any]]:
-    """Load and validate requirements.json."""
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "requirements.json")
+    Args:
+        pdf_path: Path to the PDF
+        cache_dir: Directory of cached page texts; None disables the cache
+        workers: Extraction processes (default: CPU count)
+        stats: Optional dict that receives page counts from `iter_pages`
+
+    Yields:
+        Draft rule dictionaries in document order
+    """
+    for clause in segment_clauses(iter_pages(pdf_path, cache_dir, workers, stats)):
+        yield clause_to_rule(clause)
+
+
+def extract_rules_from_pdf(pdf_path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                           workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """All draft rules of the PDF as a list; see `iter_rules_from_pdf`."""
+    return list(iter_rules_from_pdf(pdf_path, cache_dir, workers))
+
+
+def write_rules_jsonl(rules: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Write rules as JSON Lines as they are produced.
+
+    Returns:
+        Number of rules written
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for rule in rules:
+            f.write(json.dumps(rule, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+def load_requirements() -> Tuple[bytes, List[Dict[str, Any]]]:
+    """
+    Load requirements.json.
+
+    Returns:
+        The file's bytes and the rules parsed from them; the rules are empty
+        if the file is missing or not a JSON list
+    """
+    data_path = REQUIREMENTS_PATH
     
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            requirements = json.load(f)
+        with open(data_path, 'rb') as f:
+            raw = f.read()
+        requirements = json.loads(raw)
     except FileNotFoundError:
         print(f"Error: {data_path} not found")
-        return []
+        return b"", []
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON in requirements.json: {e}")
-        return []
+        return raw, []
     
     if not isinstance(requirements, list):
         print("Error: requirements.json must contain a list of rules")
-        return []
+        return raw, []
     
-    return requirements
+    return raw, requirements
+
+def extract_main(args) -> int:
+    """Extract draft rules from the PDF and write them out as they are found."""
+    print(f"🔍 Extracting {args.pdf}...")
+    stats: Dict[str, int] = {}
+    counts: Dict[str, int] = {}
+
+    def counted(rules: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for rule in rules:
+            counts[rule["authority"]] = counts.get(rule["authority"], 0) + 1
+            yield rule
+
+    rules = counted(iter_rules_from_pdf(args.pdf, None if args.no_cache else args.cache_dir, args.workers, stats))
+    if args.output:
+        write_rules_jsonl(rules, args.output)
+    else:
+        deque(rules, maxlen=0)
+
+    print(f"Pages: {stats['cached'] + stats['extracted']} ({stats['cached']} cached, {stats['extracted']} extracted)")
+    print(f"📋 Found {sum(counts.values())} clauses")
+    for authority, count in sorted(counts.items()):
+        print(f"   {authority}: {count}")
+    if args.output:
+        print(f"✅ Wrote {args.output}")
+    return 0
+
+def compile_requirements(requirements: List[Dict[str, Any]], raw: bytes) -> int:
+    """
+    Write the compiled rulebook artifact next to requirements.json.
+
+    Args:
+        requirements: Rules validated from `raw`
+        raw: The requirements.json bytes they were parsed from; the artifact
+            is tagged with their hash, so an edit made since they were read
+            leaves it stale instead of mislabelled
+    """
+    path = artifact_path_for(REQUIREMENTS_PATH)
+    try:
+        size = write_artifact(requirements, path, hashlib.sha256(raw).hexdigest())
+    except ValueError as e:
+        print(f"❌ Cannot compile rulebook: {e}")
+        return 1
+    print(f"📦 Compiled {os.path.normpath(path)} ({size} bytes)")
+    return 0
+
+def print_issue(issue: RuleIssue, indent: str) -> None:
+    """Print one validation issue with its JSON path."""
+    icon = "❌" if issue.severity == "error" else "⚠️"
+    print(f"{indent}{icon} {issue}")
 
 def main():
     """Main validation and processing function."""
+    parser = argparse.ArgumentParser(description="Validate requirements.json or extract draft rules from the PDF")
+    parser.add_argument("--pdf", help="Extract draft rules from this PDF instead of validating")
+    parser.add_argument("--output", help="Write extracted rules as JSON Lines to this path")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Per-page extraction cache")
+    parser.add_argument("--no-cache", action="store_true", help="Extract every page")
+    parser.add_argument("--workers", type=int, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--no-compile", action="store_true", help="Validate without writing the compiled artifact")
+    args = parser.parse_args()
+    if args.pdf:
+        return extract_main(args)
+
     print("🔍 Loading requirements.json...")
-    requirements = load_requirements()
+    raw, requirements = load_requirements()
     
     if not requirements:
         print("❌ No requirements loaded")
@@ -85,29 +484,43 @@ def main():
     
     print(f"📋 Found {len(requirements)} rules")
     
+    rules, issues = validate_rulebook(requirements)
+    by_rule: Dict[Optional[int], List[RuleIssue]] = {}
+    for issue in issues:
+        by_rule.setdefault(issue.index, []).append(issue)
+    for issue in by_rule.get(None, []):
+        print_issue(issue, "  ")
+
     valid_count = 0
     authorities = set()
     
     for i, rule in enumerate(requirements):
-        print(f"  Rule {i+1}: {rule.get('id', 'unknown')}")
+        print(f"  Rule {i+1}: {rule.get('id', 'unknown') if isinstance(rule, dict) else 'unknown'}")
+        rule_issues = by_rule.get(i, [])
+        for issue in rule_issues:
+            print_issue(issue, "    ")
         
-        if validate_rule_schema(rule):
-            valid_count += 1
-            authorities.add(rule["authority"])
-        else:
+        if any(issue.severity == "error" for issue in rule_issues):
             print(f"    ❌ Validation failed")
             continue
+        valid_count += 1
+        authorities.add(rule["authority"])
             
         print(f"    ✅ Valid - {rule['title']}")
         print(f"       Source: {rule['source_ref']}")
     
+    errors = sum(issue.severity == "error" for issue in issues)
+    
     print(f"\n📊 Summary:")
     print(f"   Total rules: {len(requirements)}")
     print(f"   Valid rules: {valid_count}")
+    print(f"   Errors: {errors}, warnings: {len(issues) - errors}")
     print(f"   Authorities: {', '.join(sorted(authorities))}")
     
-    if valid_count == len(requirements):
+    if rules is not None and not errors:
         print("✅ All rules passed validation")
+        if not args.no_compile:
+            return compile_requirements(rules, raw)
         return 0
     else:
         print(f"❌ {len(requirements) - valid_count} rules failed validation")